@@ -0,0 +1,6 @@
+"""
+Offline performance benchmarks for the extraction pipeline.
+
+Run with:
+    python -m benchmarks.run_benchmark --pages 100 500 --latency 0.2
+"""
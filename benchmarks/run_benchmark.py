@@ -0,0 +1,257 @@
+"""
+Reproducible end-to-end benchmark of the extraction pipeline.
+
+Responsibility:
+- Generate synthetic reports of the requested sizes (fixed seed)
+- Run run_extraction against a stub Ollama server with fixed latency
+- Report throughput, per-stage p50/p95 and peak RSS per scenario, with
+  and without table pre-extraction (which can leave the LLM idle)
+
+Usage:
+    python -m benchmarks.run_benchmark --pages 100 500 --latency 0.2 \
+        --workers 1 4 --json output/benchmarks.json
+
+Everything runs in a temporary directory; no real model is needed.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_pdf import generate_report_pdf
+from config.indicators import INDICATORS
+from src import metrics
+from src.extractor import run_extraction
+from src.llm_backends import cache_reuse
+from src.metrics import RunMetrics, current_rss_mb
+
+
+COMPANY = "BENCH"
+
+# Seconds between RSS samples while a scenario runs
+RSS_INTERVAL_S = 0.05
+
+TABLE_MODES = {"off": [False], "on": [True], "both": [False, True]}
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def _pid_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def process_tree_rss_mb() -> float:
+    """
+    RSS of this process plus all its descendants (e.g. PDF worker
+    processes) in MiB. Outside Linux only this process is measured.
+    """
+    if not os.path.exists("/proc/self/task"):
+        return current_rss_mb() or 0.0
+
+    total, pending = 0.0, [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        total += _pid_rss_mb(pid)
+        pending += _child_pids(pid)
+    return total
+
+
+@contextmanager
+def sample_rss_peak(interval_s: float = RSS_INTERVAL_S) -> Iterator[Dict[str, float]]:
+    """
+    Samples process_tree_rss_mb() in a background thread while the
+    block runs; the yielded dict holds the peak in "rss_peak_mb".
+    """
+    peak = {"rss_peak_mb": process_tree_rss_mb()}
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.wait(interval_s):
+            peak["rss_peak_mb"] = max(peak["rss_peak_mb"], process_tree_rss_mb())
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield peak
+    finally:
+        done.set()
+        thread.join()
+        peak["rss_peak_mb"] = max(peak["rss_peak_mb"], process_tree_rss_mb())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extraction pipeline benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.1,
+        help="Stub LLM latency per request in seconds",
+    )
+    parser.add_argument(
+        "--tokens-per-s",
+        type=float,
+        default=0.0,
+        help="Stub generation speed; 0 returns the answer at once",
+    )
+    parser.add_argument(
+        "--prefill-tokens-per-s",
+        type=float,
+        default=0.0,
+        help="Stub prompt evaluation speed for tokens not in its prefix cache",
+    )
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument(
+        "--tables",
+        choices=sorted(TABLE_MODES),
+        default="both",
+        help="Table pre-extraction: off (every indicator hits the stub LLM), on, or both",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="Prompt with each indicator's K most relevant pages only",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def run_scenario(
+    workdir: Path,
+    page_mapping: Dict[str, Any],
+    pages: int,
+    workers: int,
+    stream: bool,
+    tables: bool,
+    top_k: Optional[int],
+) -> Dict[str, Any]:
+    """
+    One cold run (fresh stores) of the pipeline over the synthetic report.
+
+    rss_peak_mb is sampled throughout the run and covers the PDF worker
+    processes as well (see process_tree_rss_mb).
+    """
+    db_path = workdir / f"extractions_{pages}_{workers}_{'tables' if tables else 'llm'}.sqlite"
+    run_metrics = RunMetrics()
+
+    started = time.perf_counter()
+    with sample_rss_peak() as rss, metrics.activate(run_metrics):
+        run_extraction(
+            [COMPANY],
+            str(db_path),
+            workers=workers,
+            stream=stream,
+            tables=tables,
+            top_k=top_k,
+            page_mapping={COMPANY: page_mapping},
+        )
+    wall_time_s = time.perf_counter() - started
+
+    summary = run_metrics.summary()
+    # Pages parsed for text plus pages scanned for tables
+    pages_read = sum(
+        summary.get(stage, {}).get("pages", 0) for stage in ("pdf_read", "pdf_tables")
+    )
+
+    return {
+        "pages": pages,
+        "workers": workers,
+        "tables": tables,
+        "wall_time_s": wall_time_s,
+        "pages_read": pages_read,
+        "pages_per_s": pages_read / wall_time_s if wall_time_s else 0.0,
+        "indicators_per_s": len(INDICATORS) / wall_time_s if wall_time_s else 0.0,
+        "llm_calls": summary.get("llm_invoke", {}).get("count", 0),
+        "kv_cache_reuse": cache_reuse(summary.get("llm_invoke", {})),
+        "rss_peak_mb": rss["rss_peak_mb"],
+        "stages": {
+            name: {key: stats[key] for key in ("count", "p50_s", "p95_s", "total_s")}
+            for name, stats in summary.items()
+        },
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    reuse = result["kv_cache_reuse"]
+    print(
+        f"\n📈 {result['pages']} pages, {result['workers']} worker(s), "
+        f"tables {'on' if result['tables'] else 'off'}: "
+        f"{result['wall_time_s']:.2f}s, "
+        f"{result['pages_per_s']:.1f} pages/s, "
+        f"{result['indicators_per_s']:.2f} indicators/s, "
+        f"{result['llm_calls']} LLM calls, "
+        + (f"{reuse:.0%} prompt tokens from KV cache, " if reuse is not None else "")
+        + f"peak RSS {result['rss_peak_mb']:.0f} MiB"
+    )
+    for name, stats in result["stages"].items():
+        print(
+            f"   {name:<12} n={stats['count']:<4} "
+            f"p50={stats['p50_s'] * 1000:8.1f}ms  p95={stats['p95_s'] * 1000:8.1f}ms"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as tmp, StubOllamaServer(
+        latency_s=args.latency,
+        tokens_per_s=args.tokens_per_s,
+        prefill_tokens_per_s=args.prefill_tokens_per_s,
+    ) as server:
+        os.environ["OLLAMA_HOST"] = server.base_url
+        workdir = Path(tmp)
+
+        for pages in args.pages:
+            pdf_path = str(workdir / f"report_{pages}.pdf")
+            print(f"📝 Generating {pages}-page synthetic report...")
+            page_mapping = generate_report_pdf(pdf_path, pages, INDICATORS, seed=args.seed)
+
+            for workers in args.workers:
+                for tables in TABLE_MODES[args.tables]:
+                    result = run_scenario(
+                        workdir,
+                        page_mapping,
+                        pages,
+                        workers,
+                        args.stream,
+                        tables,
+                        args.top_k,
+                    )
+                    results.append(result)
+
+        print(f"\n🔁 Stub LLM served {server.requests} requests")
+
+    for result in results:
+        print_result(result)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Stub of Ollama's /api/generate and /api/chat endpoints for offline
+benchmarks.
+
+Responsibility:
+- Answer extraction prompts with well-formed JSON for the requested
+  indicators, after a configurable delay
+- Imitate Ollama's streaming (NDJSON) and non-streaming responses,
+  including prompt_eval_count / eval_count / *_duration counters
+- Imitate prefix (KV cache) reuse: only the part of a prompt that
+  differs from the previous one is "evaluated" and charged prefill time
+
+No real inference happens here.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from src.chunker import estimate_tokens
+
+
+# Indicator lines as the agent's prompt lists them: "- Name (unit): definition"
+_INDICATOR_RE = re.compile(r"^- (.+?) \((.+?)\): ", re.MULTILINE)
+
+
+class StubOllamaServer:
+    """
+    Threaded local HTTP server; use as a context manager.
+
+    Latency model per request: latency_s
+    + evaluated_prompt_tokens / prefill_tokens_per_s
+    + generated_tokens / tokens_per_s (a rate of 0 means free).
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        tokens_per_s: float = 0.0,
+        prefill_tokens_per_s: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.requests = 0
+        self._last_prompt = ""
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                stub._handle(self, self.path, payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubOllamaServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ------------------------
+    # RESPONSES
+    # ------------------------
+    @staticmethod
+    def answer_for(prompt: str) -> str:
+        """
+        Deterministic JSON answer for every indicator listed in the prompt.
+        """
+        answer = {}
+        for index, (name, unit) in enumerate(_INDICATOR_RE.findall(prompt)):
+            answer[name] = {
+                "value": 1000 + index,
+                "unit": unit,
+                "confidence": 0.9,
+                "source_page": None,
+                "notes": "stub",
+            }
+        return json.dumps(answer)
+
+    def _handle(
+        self,
+        handler: BaseHTTPRequestHandler,
+        path: str,
+        payload: Dict[str, Any],
+    ) -> None:
+        chat = path.endswith("/api/chat")
+        if chat:
+            prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+        else:
+            prompt = payload.get("prompt", "")
+
+        def content(text: str) -> Dict[str, Any]:
+            if chat:
+                return {"message": {"role": "assistant", "content": text}}
+            return {"response": text}
+
+        with self._lock:
+            self.requests += 1
+            cached = len(os.path.commonprefix([self._last_prompt, prompt]))
+            self._last_prompt = prompt
+
+        text = self.answer_for(prompt)
+        generated_tokens = estimate_tokens(text)
+        evaluated_tokens = estimate_tokens(prompt[cached:])
+
+        gen_s = generated_tokens / self.tokens_per_s if self.tokens_per_s else 0.0
+        prefill_s = (
+            evaluated_tokens / self.prefill_tokens_per_s if self.prefill_tokens_per_s else 0.0
+        )
+        final = {
+            "done": True,
+            "prompt_eval_count": evaluated_tokens,
+            "eval_count": generated_tokens,
+            "prompt_eval_duration": int(prefill_s * 1e9),
+            "eval_duration": int(gen_s * 1e9),
+        }
+
+        time.sleep(self.latency_s + prefill_s)
+
+        if not payload.get("stream"):
+            time.sleep(gen_s)
+            self._send_json(handler, {**content(text), **final})
+            return
+
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+        events: List[Dict[str, Any]] = [{**content(t), "done": False} for t in tokens]
+        events.append({**content(""), **final})
+        delay = gen_s / max(len(tokens), 1)
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        try:
+            for event in events:
+                line = (json.dumps(event) + "\n").encode()
+                handler.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                handler.wfile.flush()
+                time.sleep(delay)
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            handler.close_connection = True
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, body: Dict[str, Any]) -> None:
+        encoded = json.dumps(body).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(encoded)))
+        handler.end_headers()
+        handler.wfile.write(encoded)
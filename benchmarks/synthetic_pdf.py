@@ -0,0 +1,146 @@
+"""
+Synthetic ESG-style annual report PDFs for benchmarking.
+
+Responsibility:
+- Generate reproducible N-page reports with narrative filler text
+- Place each indicator's figure in a ruled table on a known page
+- Return a page mapping in the same shape as config.pages.PAGE_MAPPING
+
+No LLM, no storage logic here.
+"""
+
+import random
+from typing import Any, Dict, List
+
+import fitz  # PyMuPDF
+
+
+FILLER_WORDS = (
+    "sustainability climate governance stakeholders transition risk "
+    "portfolio financed emissions disclosure materiality assessment "
+    "workforce diversity strategy taxonomy alignment reporting period "
+    "double materiality value chain board oversight remuneration policy"
+).split()
+
+# Where each category's tables sit, as a fraction of the document length
+CATEGORY_POSITION = {
+    "Environmental": 0.15,
+    "Social": 0.40,
+    "Governance": 0.70,
+}
+
+MARGIN = 50
+LINE_HEIGHT = 13
+RANGE_WIDTH = 10
+
+
+def _filler_lines(rng: random.Random, count: int) -> List[str]:
+    return [" ".join(rng.choice(FILLER_WORDS) for _ in range(12)) for _ in range(count)]
+
+
+def _figures(rng: random.Random, value_type: str) -> List[str]:
+    """
+    Current and prior year figures, formatted like a report would.
+    """
+    if value_type == "percentage":
+        current = rng.uniform(5, 95)
+        return [f"{current:.1f}", f"{min(current * rng.uniform(0.8, 1.2), 100):.1f}"]
+    if value_type == "year":
+        year = str(rng.randint(2030, 2050))
+        return [year, year]
+
+    current = rng.randint(1_000, 2_000_000)
+    return [f"{current:,}", f"{int(current * rng.uniform(0.8, 1.2)):,}"]
+
+
+def _ascii(text: str) -> str:
+    # The built-in PDF fonts have no euro sign
+    return text.replace("€", "EUR ")
+
+
+def _draw_table(page: fitz.Page, top: float, rows: List[List[str]]) -> float:
+    """
+    Draws a ruled table (so page.find_tables() can detect it) and
+    returns the y coordinate below it.
+    """
+    column_x = [MARGIN, MARGIN + 200, MARGIN + 280, MARGIN + 360, 595 - MARGIN]
+    row_height = 18
+
+    for index, row in enumerate(rows):
+        y = top + index * row_height
+        for col, cell in enumerate(row):
+            page.insert_text((column_x[col] + 3, y + 13), cell, fontsize=9)
+
+    bottom = top + len(rows) * row_height
+    for index in range(len(rows) + 1):
+        y = top + index * row_height
+        page.draw_line((column_x[0], y), (column_x[-1], y))
+    for x in column_x:
+        page.draw_line((x, top), (x, bottom))
+
+    return bottom
+
+
+def generate_report_pdf(
+    pdf_path: str,
+    pages: int,
+    indicators: List[Dict[str, Any]],
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Writes a `pages`-page synthetic report to pdf_path.
+
+    Every indicator gets a one-row table (label, current year, prior
+    year, unit) on a page determined by its category. Returns the page
+    mapping for the report, with ranges of RANGE_WIDTH pages around each
+    table, overlapping within a category like real mappings do.
+    """
+    rng = random.Random(seed)
+    lines_per_page = int((842 - 2 * MARGIN) / LINE_HEIGHT) - 2
+
+    tables_on_page: Dict[int, List[Dict[str, Any]]] = {}
+    mapping: Dict[str, Any] = {"__pdf_path__": pdf_path}
+
+    by_category: Dict[str, List[Dict[str, Any]]] = {}
+    for indicator in indicators:
+        by_category.setdefault(indicator["category"], []).append(indicator)
+
+    for category, members in by_category.items():
+        anchor = max(int(pages * CATEGORY_POSITION.get(category, 0.5)), 1)
+        for offset, indicator in enumerate(members):
+            page_number = min(anchor + offset // 3, pages)
+            tables_on_page.setdefault(page_number, []).append(indicator)
+
+            start = max(page_number - RANGE_WIDTH // 2, 1)
+            mapping[indicator["name"]] = (start, min(start + RANGE_WIDTH, pages))
+
+    doc = fitz.open()
+    for page_number in range(1, pages + 1):
+        page = doc.new_page(width=595, height=842)
+        y = MARGIN
+
+        page.insert_text((MARGIN, y), f"Sustainability statement - page {page_number}", fontsize=11)
+        y += 2 * LINE_HEIGHT
+
+        for indicator in tables_on_page.get(page_number, []):
+            current, previous = _figures(rng, indicator["value_type"])
+            # Reports state one unit, e.g. "MWh" for "MWh or GJ"
+            unit = indicator["expected_unit"].split(" or ")[0]
+            y = _draw_table(
+                page,
+                y,
+                [
+                    ["Indicator", "2024", "2023", "Unit"],
+                    [indicator["name"], current, previous, _ascii(unit)],
+                ],
+            ) + LINE_HEIGHT
+
+        remaining = int((842 - MARGIN - y) / LINE_HEIGHT)
+        for line in _filler_lines(rng, min(remaining, lines_per_page)):
+            page.insert_text((MARGIN, y), line, fontsize=9)
+            y += LINE_HEIGHT
+
+    doc.save(pdf_path)
+    doc.close()
+
+    return mapping
@@ -10,6 +10,7 @@ Design principles:
   - extraction loop
   - LLM prompt construction
   - page reference mapping
+  - table pre-extraction (row labels are matched on name and synonyms)
   - database & CSV schema
 
 If indicators change, only this file should need updating.
@@ -26,6 +27,13 @@ INDICATORS = [
         "definition": "Direct greenhouse gas emissions from owned or controlled sources.",
         "expected_unit": "tCO2e",
         "value_type": "number",
+        "synonyms": [
+            "Scope 1 emissions",
+            "Scope 1 GHG emissions",
+            "Gross Scope 1 GHG emissions",
+            "Direct GHG emissions (Scope 1)",
+            "Scope 1",
+        ],
     },
     {
         "name": "Total Scope 2 GHG Emissions",
@@ -34,6 +42,15 @@ INDICATORS = [
         "definition": "Indirect greenhouse gas emissions from the generation of purchased energy.",
         "expected_unit": "tCO2e",
         "value_type": "number",
+        "synonyms": [
+            "Scope 2 emissions",
+            "Scope 2 GHG emissions",
+            "Gross market-based Scope 2 GHG emissions",
+            "Gross location-based Scope 2 GHG emissions",
+            "Scope 2 (market-based)",
+            "Scope 2 (location-based)",
+            "Scope 2",
+        ],
     },
     {
         "name": "Total Scope 3 GHG Emissions",
@@ -42,6 +59,12 @@ INDICATORS = [
         "definition": "All other indirect greenhouse gas emissions occurring in the value chain.",
         "expected_unit": "tCO2e",
         "value_type": "number",
+        "synonyms": [
+            "Scope 3 emissions",
+            "Scope 3 GHG emissions",
+            "Gross indirect (Scope 3) GHG emissions",
+            "Scope 3",
+        ],
     },
     {
         "name": "GHG Emissions Intensity",
@@ -50,6 +73,12 @@ INDICATORS = [
         "definition": "Greenhouse gas emissions per unit of revenue.",
         "expected_unit": "tCO2e per €M revenue",
         "value_type": "number",
+        "synonyms": [
+            "GHG intensity",
+            "GHG intensity per net revenue",
+            "Emissions intensity",
+            "Carbon intensity",
+        ],
     },
     {
         "name": "Total Energy Consumption",
@@ -58,6 +87,11 @@ INDICATORS = [
         "definition": "Total energy consumed by the organization across operations.",
         "expected_unit": "MWh or GJ",
         "value_type": "number",
+        "synonyms": [
+            "Total energy consumption from own operations",
+            "Energy consumption",
+            "Total energy use",
+        ],
     },
     {
         "name": "Renewable Energy Percentage",
@@ -66,6 +100,12 @@ INDICATORS = [
         "definition": "Percentage of total energy consumption derived from renewable sources.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Share of renewable energy",
+            "Renewable energy share",
+            "Share of renewable sources in total energy consumption",
+            "Renewable electricity (%)",
+        ],
     },
     {
         "name": "Net Zero Target Year",
@@ -74,6 +114,11 @@ INDICATORS = [
         "definition": "Year by which the organization commits to achieving net zero emissions.",
         "expected_unit": "year",
         "value_type": "year",
+        "synonyms": [
+            "Net zero target",
+            "Net zero by",
+            "Net-zero target year",
+        ],
     },
     {
         "name": "Green Financing Volume",
@@ -82,6 +127,12 @@ INDICATORS = [
         "definition": "Total volume of financing allocated to green or sustainable activities.",
         "expected_unit": "€ millions",
         "value_type": "number",
+        "synonyms": [
+            "Green financing",
+            "Green lending",
+            "Sustainable finance volume",
+            "Climate action financing",
+        ],
     },
 
     # ------------------------------------------------------------------
@@ -94,6 +145,14 @@ INDICATORS = [
         "definition": "Total number of employees, typically expressed as full-time equivalents (FTE).",
         "expected_unit": "FTE",
         "value_type": "number",
+        "synonyms": [
+            "Total number of employees",
+            "Number of employees",
+            "Employees (headcount)",
+            "Total headcount",
+            "Total workforce",
+            "Headcount",
+        ],
     },
     {
         "name": "Female Employees",
@@ -102,6 +161,12 @@ INDICATORS = [
         "definition": "Percentage of employees who identify as female.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Female employees (%)",
+            "Women in workforce",
+            "Share of female employees",
+            "Women (%)",
+        ],
     },
     {
         "name": "Gender Pay Gap",
@@ -110,6 +175,11 @@ INDICATORS = [
         "definition": "Difference in average pay between male and female employees.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Unadjusted gender pay gap",
+            "Gender pay gap (mean)",
+            "Mean gender pay gap",
+        ],
     },
     {
         "name": "Training Hours per Employee",
@@ -118,6 +188,11 @@ INDICATORS = [
         "definition": "Average number of training hours completed per employee during the reporting year.",
         "expected_unit": "hours",
         "value_type": "number",
+        "synonyms": [
+            "Average training hours per employee",
+            "Average hours of training per employee",
+            "Training hours per FTE",
+        ],
     },
     {
         "name": "Employee Turnover Rate",
@@ -126,6 +201,11 @@ INDICATORS = [
         "definition": "Percentage of employees who left the organization during the reporting year.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Employee turnover",
+            "Turnover rate",
+            "Voluntary turnover rate",
+        ],
     },
     {
         "name": "Work-Related Accidents",
@@ -134,6 +214,12 @@ INDICATORS = [
         "definition": "Number of work-related accidents recorded during the reporting year.",
         "expected_unit": "count",
         "value_type": "number",
+        "synonyms": [
+            "Number of recordable work-related accidents",
+            "Recordable work-related accidents",
+            "Work-related injuries",
+            "Number of work-related accidents",
+        ],
     },
     {
         "name": "Collective Bargaining Coverage",
@@ -142,6 +228,11 @@ INDICATORS = [
         "definition": "Percentage of employees covered by collective bargaining agreements.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Employees covered by collective bargaining agreements",
+            "Collective bargaining coverage (%)",
+            "Covered by collective bargaining",
+        ],
     },
 
     # ------------------------------------------------------------------
@@ -154,6 +245,12 @@ INDICATORS = [
         "definition": "Percentage of board members who identify as female.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Women on the board",
+            "Female board members",
+            "Board gender diversity",
+            "Female directors (%)",
+        ],
     },
     {
         "name": "Board Meetings",
@@ -162,6 +259,11 @@ INDICATORS = [
         "definition": "Total number of board meetings held during the reporting year.",
         "expected_unit": "count/year",
         "value_type": "number",
+        "synonyms": [
+            "Number of board meetings",
+            "Board meetings held",
+            "Meetings of the board",
+        ],
     },
     {
         "name": "Corruption Incidents",
@@ -170,6 +272,11 @@ INDICATORS = [
         "definition": "Number of confirmed corruption or bribery incidents during the reporting year.",
         "expected_unit": "count",
         "value_type": "number",
+        "synonyms": [
+            "Confirmed incidents of corruption",
+            "Incidents of corruption or bribery",
+            "Convictions for corruption",
+        ],
     },
     {
         "name": "Avg Payment Period to Suppliers",
@@ -178,6 +285,12 @@ INDICATORS = [
         "definition": "Average number of days taken to pay suppliers.",
         "expected_unit": "days",
         "value_type": "number",
+        "synonyms": [
+            "Average payment period",
+            "Average days to pay suppliers",
+            "Average time taken to pay invoices",
+            "Payment days",
+        ],
     },
     {
         "name": "Suppliers Screened for ESG",
@@ -186,5 +299,10 @@ INDICATORS = [
         "definition": "Percentage of suppliers screened using environmental, social, or governance criteria.",
         "expected_unit": "%",
         "value_type": "percentage",
+        "synonyms": [
+            "Suppliers screened using ESG criteria",
+            "New suppliers screened",
+            "Share of suppliers assessed on ESG criteria",
+        ],
     },
 ]
@@ -0,0 +1,149 @@
+"""
+Token-budgeted chunking of category text and merging of chunk results.
+
+Responsibility:
+- Estimate prompt size in tokens
+- Split page-marked text at page boundaries so each chunk fits a budget
+- Merge per-chunk extraction results into one result per indicator
+
+No LLM, no PDF logic here.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.planner import PAGE_MARKER
+
+
+# Conservative average for English report text with the Qwen/Llama
+# tokenizers; overestimating keeps prompts inside the context window.
+CHARS_PER_TOKEN = 3.5
+
+_MARKER_RE = re.compile(
+    "^" + re.escape(PAGE_MARKER).replace(r"\{page\}", r"(\d+)") + "$",
+    re.MULTILINE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_page_blocks(text: str) -> List[Tuple[Optional[int], str]]:
+    """
+    Splits page-marked text (see planner.build_page_text) into
+    (page_number, block_text) pairs, markers included in block_text.
+
+    Text without markers comes back as a single (None, text) block.
+    """
+    starts = [m.start() for m in _MARKER_RE.finditer(text)]
+    if not starts:
+        return [(None, text)] if text else []
+
+    blocks = []
+    if starts[0] > 0:
+        blocks.append((None, text[: starts[0]].rstrip("\n")))
+
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(text)
+        block = text[start:end].rstrip("\n")
+        page = int(_MARKER_RE.match(block).group(1))
+        blocks.append((page, block))
+
+    return blocks
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """
+    Splits one page that alone exceeds the budget on line boundaries,
+    repeating its page marker so every piece stays attributable.
+    """
+    first_line, _, body = block.partition("\n")
+    marker = first_line if _MARKER_RE.match(first_line) else ""
+    if not marker:
+        body = block
+
+    room = max(max_chars - len(marker) - 1, 1)
+    pieces, current = [], ""
+
+    for line in body.split("\n"):
+        while len(line) > room:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:room])
+            line = line[room:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > room:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+
+    return [f"{marker}\n{piece}" if marker else piece for piece in pieces]
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Packs page blocks greedily into chunks of at most max_tokens.
+
+    Pages are never split unless a single page is larger than the budget.
+    """
+    max_chars = max(int(max_tokens * CHARS_PER_TOKEN), 1)
+
+    chunks, current = [], ""
+    for _, block in split_page_blocks(text):
+        pieces = [block] if len(block) <= max_chars else _split_oversized(block, max_chars)
+
+        for piece in pieces:
+            candidate = f"{current}\n{piece}" if current else piece
+            if len(candidate) > max_chars and current:
+                chunks.append(current)
+                current = piece
+            else:
+                current = candidate
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def _rank(result: Dict[str, Any], order: int) -> Tuple:
+    """
+    Sort key for candidate results: a value beats no value, then higher
+    confidence, then the earlier source page, then the earlier chunk.
+    """
+    has_value = result.get("value") is not None
+
+    try:
+        confidence = float(result.get("confidence") or 0.0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+
+    page = result.get("source_page")
+    page = page if isinstance(page, int) else math.inf
+
+    return (not has_value, -confidence, page, order)
+
+
+def merge_results(
+    chunk_results: List[Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reduces per-chunk extraction results to one result per indicator.
+    """
+    candidates: Dict[str, List[Tuple[Tuple, Dict[str, Any]]]] = {}
+
+    for order, results in enumerate(chunk_results):
+        for name, result in results.items():
+            if isinstance(result, dict):
+                candidates.setdefault(name, []).append((_rank(result, order), result))
+
+    return {
+        name: min(options, key=lambda option: option[0])[1]
+        for name, options in candidates.items()
+    }
@@ -1,45 +1,106 @@
 
-from typing import Dict, Any
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
-from src.pdf_reader import read_pdf_pages
+import fitz  # PyMuPDF
 
+from src import metrics
+from src.pdf_reader import extract_pages, iter_pdf_pages
+from src.planner import merge_page_ranges
 
-def _docling_extract(pdf_path: str) -> Dict[str, Any]:
+
+# One converter per process: building it loads Docling's layout and
+# table models, which takes far longer than converting a few pages.
+_CONVERTER = None
+
+
+def _get_converter():
+    """Returns this process's DocumentConverter, creating it on first use.
+
+    Docling is imported lazily so importing this module does not trigger
+    heavy dependency initialisation at import time.
+    """
+    global _CONVERTER
+
+    if _CONVERTER is None:
+        try:
+            from docling.document_converter import DocumentConverter
+        except Exception as e:
+            raise ImportError(
+                "Docling import failed. Activate your virtualenv and install docling.\n"
+                "Example (PowerShell):\n  python -m venv .venv\n  .venv\\Scripts\\Activate.ps1\n"
+                "Then: pip install docling\n"
+                f"Original error: {e}"
+            ) from e
+
+        _CONVERTER = DocumentConverter()
+
+    return _CONVERTER
+
+
+def _docling_extract(
+    pdf_path: str,
+    page_range: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
     """Use Docling when available and configured correctly.
 
-    This function imports Docling lazily so importing this module does not
-    trigger heavy dependency initialisation at import time.
+    Converts the whole document, or only the inclusive 1-indexed
+    page_range, with the process-wide converter.
     """
-    try:
-        from docling.document_converter import DocumentConverter
-    except Exception as e:
-        raise ImportError(
-            "Docling import failed. Activate your virtualenv and install docling.\n"
-            "Example (PowerShell):\n  python -m venv .venv\n  .venv\\Scripts\\Activate.ps1\n"
-            "Then: pip install docling\n"
-            f"Original error: {e}"
-        ) from e
-
-    converter = DocumentConverter()
-    doc = converter.convert(pdf_path)
+    converter = _get_converter()
+
+    if page_range is None:
+        result = converter.convert(pdf_path)
+    else:
+        result = converter.convert(pdf_path, page_range=page_range)
+    document = result.document
 
     tables = []
     sections = []
 
-    for item in doc.document_items:
-        if item.type == "table":
-            tables.append({
-                "page": item.provenance.page_no,
-                "rows": item.export_to_dataframe().to_dict(orient="records"),
+    for table in document.tables:
+        tables.append({
+            "page": table.prov[0].page_no if table.prov else None,
+            "rows": table.export_to_dataframe(doc=document).to_dict(orient="records"),
+        })
+
+    for item in document.texts:
+        if str(item.label) == "section_header":
+            sections.append({
+                "page": item.prov[0].page_no if item.prov else None,
+                "title": item.text,
             })
-        elif item.type == "section":
-            sections.append({"page": item.provenance.page_no, "title": item.text})
 
     return {"tables": tables, "sections": sections}
 
 
-def extract_structured_content(pdf_path: str) -> Dict[str, Any]:
-    """Try using Docling; on fatal errors provide guidance or fall back.
+def _fallback_extract(
+    pdf_path: str,
+    page_range: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    # Each page as one "row" with key 'text'. One open, one pass over the
+    # requested pages; blank pages are skipped.
+    if page_range is None:
+        page_texts = iter_pdf_pages(pdf_path)
+    else:
+        start, end = page_range
+        page_texts = extract_pages(pdf_path, range(start, end + 1)).items()
+
+    tables = [
+        {"page": page_number, "rows": [{"text": page_text}]}
+        for page_number, page_text in page_texts
+        if page_text.strip()
+    ]
+
+    return {"tables": tables, "sections": []}
+
+
+def _convert_shard(
+    pdf_path: str,
+    page_range: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """Converts one shard, falling back to plain page text on fatal errors.
 
     - If Docling is missing, raise ImportError with installation hint so the
       caller can activate the venv and install it.
@@ -47,24 +108,97 @@ def extract_structured_content(pdf_path: str) -> Dict[str, Any]:
       to a simple per-page text reader to keep the pipeline running.
     """
     try:
-        return _docling_extract(pdf_path)
+        return _docling_extract(pdf_path, page_range)
     except ImportError:
         # Surface the error so the user can install Docling in the venv.
         raise
     except Exception:
-        # Fallback: return each page as one "row" with key 'text'.
-        tables = []
-        page_index = 1
-        while True:
-            try:
-                page_text = read_pdf_pages(pdf_path, page_index, page_index)
-            except Exception:
-                break
-
-            if not page_text.strip():
-                break
-
-            tables.append({"page": page_index, "rows": [{"text": page_text}]})
-            page_index += 1
-
-        return {"tables": tables, "sections": []}
+        return _fallback_extract(pdf_path, page_range)
+
+
+def referenced_pages(company_pages: Dict[str, Any]) -> List[int]:
+    """Every page a company's mapping (PAGE_MAPPING shape) points at."""
+    return merge_page_ranges(
+        page_range
+        for key, page_range in company_pages.items()
+        if key != "__pdf_path__" and page_range
+    )
+
+
+def shard_pages(pages: Iterable[int], shard_size: int = 10) -> List[Tuple[int, int]]:
+    """Splits pages into inclusive ranges of consecutive pages.
+
+    Gaps always start a new shard, so unreferenced pages are never
+    converted, and no shard spans more than shard_size pages.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+
+    shards: List[Tuple[int, int]] = []
+    for page in sorted(set(pages)):
+        if shards:
+            start, end = shards[-1]
+            if page == end + 1 and page - start < shard_size:
+                shards[-1] = (start, page)
+                continue
+        shards.append((page, page))
+    return shards
+
+
+def _init_docling_worker() -> None:
+    # Load the models once per worker, before the first shard arrives.
+    # A missing install is reported by the first shard instead, since an
+    # initializer error would only surface as a broken pool.
+    try:
+        _get_converter()
+    except ImportError:
+        pass
+
+
+def extract_structured_content(
+    pdf_path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: int = 1,
+    shard_size: int = 10,
+) -> Dict[str, Any]:
+    """Try using Docling; on fatal errors provide guidance or fall back.
+
+    By default the whole document is converted in one call. Given pages
+    (e.g. referenced_pages(PAGE_MAPPING[company])), only those are
+    converted, in shards of consecutive pages. With workers > 1 the
+    shards (of the given pages or of the whole document) are converted
+    in a process pool, one converter per worker.
+
+    Results are merged in page order. A shard whose conversion fails
+    falls back to per-page text; a missing Docling install raises
+    ImportError.
+    """
+    if pages is None and workers <= 1:
+        return _convert_shard(pdf_path)
+
+    if pages is None:
+        with fitz.open(pdf_path) as doc:
+            pages = range(1, len(doc) + 1)
+    shards = shard_pages(pages, shard_size)
+
+    with metrics.stage("docling_convert") as sample:
+        if workers > 1 and len(shards) > 1:
+            # Spawned, not forked: Docling's model runtimes start threads
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(shards)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_docling_worker,
+            ) as executor:
+                results = list(
+                    executor.map(_convert_shard, [pdf_path] * len(shards), shards)
+                )
+        else:
+            results = [_convert_shard(pdf_path, shard) for shard in shards]
+
+        sample["pages"] = sum(end - start + 1 for start, end in shards)
+        sample["shards"] = len(shards)
+
+    return {
+        "tables": [table for result in results for table in result["tables"]],
+        "sections": [section for result in results for section in result["sections"]],
+    }
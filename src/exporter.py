@@ -1,16 +1,17 @@
 """
-CSV exporter for extraction results.
+CSV / Parquet exporter for extraction results.
 
 Responsibility:
-- Read all rows from SQLite
-- Write them into a CSV file
+- Stream rows from SQLite in fixed-size batches
+  (latest value per company/indicator by default)
+- Write them into a CSV file, or a Parquet file when pyarrow is installed
 
 No LLM, no PDF logic here.
 """
 
 import csv
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Optional
 
 from src.storage import ExtractionStore
 
@@ -18,19 +19,38 @@ from src.storage import ExtractionStore
 def export_to_csv(
     db_path: str,
     output_csv_path: str,
+    latest_only: bool = True,
+    batch_size: int = 1000,
+    company: Optional[str] = None,
+    run_id: Optional[str] = None,
+    category: Optional[str] = None,
 ):
     """
     Export extraction results from SQLite to CSV.
 
+    Rows are streamed from the database straight into the CSV writer, so
+    memory use stays constant however large the history is.
+
     Args:
         db_path: Path to SQLite database
         output_csv_path: Path where CSV should be written
+        latest_only: Export only the newest row per (company, indicator);
+            False exports the full history of every run
+        batch_size: Rows fetched from SQLite per round trip
+        company, run_id, category: Optional filters
     """
 
     store = ExtractionStore(db_path=db_path)
-    rows: List[Dict[str, Any]] = store.fetch_all_as_dicts()
+    batches = store.iter_batches(
+        batch_size=batch_size,
+        latest_only=latest_only,
+        company=company,
+        run_id=run_id,
+        category=category,
+    )
 
-    if not rows:
+    first_batch = next(batches, None)
+    if not first_batch:
         print("⚠ No data found in database. CSV not created.")
         return
 
@@ -40,9 +60,83 @@ def export_to_csv(
     with open(output_path, mode="w", newline="", encoding="utf-8") as csvfile:
         writer = csv.DictWriter(
             csvfile,
-            fieldnames=rows[0].keys(),
+            fieldnames=first_batch[0].keys(),
         )
         writer.writeheader()
-        writer.writerows(rows)
+        writer.writerows(first_batch)
+        for rows in batches:
+            writer.writerows(rows)
 
     print(f"✅ CSV exported successfully: {output_path}")
+
+
+def _arrow_schema(pa: Any) -> Any:
+    return pa.schema([
+        ("id", pa.int64()),
+        ("run_id", pa.string()),
+        ("company", pa.string()),
+        ("indicator_name", pa.string()),
+        ("category", pa.string()),
+        ("esrs", pa.string()),
+        ("value", pa.string()),
+        ("unit", pa.string()),
+        ("confidence", pa.float64()),
+        ("source_page", pa.int64()),
+        ("source_section", pa.string()),
+        ("notes", pa.string()),
+        ("extracted_at", pa.string()),
+    ])
+
+
+def export_to_parquet(
+    db_path: str,
+    output_parquet_path: str,
+    latest_only: bool = True,
+    batch_size: int = 10_000,
+    company: Optional[str] = None,
+    run_id: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """
+    Export extraction results from SQLite to a Parquet file.
+
+    Each batch becomes one row group, so memory use is bounded by
+    batch_size. Requires pyarrow, which is imported lazily.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except Exception as e:
+        raise ImportError(
+            "Parquet export needs pyarrow. Install it in your virtualenv:\n"
+            "  pip install pyarrow\n"
+            f"Original error: {e}"
+        ) from e
+
+    store = ExtractionStore(db_path=db_path)
+    schema = _arrow_schema(pa)
+
+    output_path = Path(output_parquet_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    with pq.ParquetWriter(str(output_path), schema) as writer:
+        for rows in store.iter_batches(
+            batch_size=batch_size,
+            latest_only=latest_only,
+            company=company,
+            run_id=run_id,
+            category=category,
+        ):
+            # value is TEXT in SQLite but may hold numbers; keep it textual
+            for row in rows:
+                if row["value"] is not None:
+                    row["value"] = str(row["value"])
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            written += len(rows)
+
+    if not written:
+        print("⚠ No data found in database. Parquet file is empty.")
+        return
+
+    print(f"✅ Parquet exported successfully: {output_path}")
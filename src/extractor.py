@@ -1,104 +1,649 @@
-from typing import List, Dict, Any
+import json
+import multiprocessing
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-from src.pdf_reader import read_pdf_pages
+from src import metrics
+from src.metrics import RunMetrics
+
+from src.chunker import merge_results
+from src.page_cache import PageTextCache
+from src.page_ranker import RANKER_VERSION, select_pages
+from src.pdf_reader import DocumentPool, extract_tables
+from src.planner import build_page_text, merge_page_ranges, plan_category_pages
+from src.table_extractor import TABLE_EXTRACTOR_VERSION, extract_from_tables
+from src.text_store import PageTextStore
 from src.llm_agent import LLMExtractionAgent
+from src.llm_backends import LLMBackend, cache_reuse
+from src.llm_cache import LLMResponseCache
+from src.router import CascadeExtractionAgent
 from src.storage import ExtractionStore
 from config.indicators import INDICATORS
 from config.pages import PAGE_MAPPING
 
 
+# Per-process page cache used by PDF worker processes (see _init_worker)
+_WORKER_CACHE: Optional[PageTextCache] = None
+
+
 def run_extraction(
     companies: List[str],
     db_path: str,
-) -> None:
+    page_text_db_path: Optional[str] = None,
+    workers: int = 1,
+    llm_cache_path: Optional[str] = None,
+    stream: bool = False,
+    context_tokens: int = 8192,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    report_dir: Optional[str] = None,
+    page_mapping: Optional[Dict[str, Dict[str, Any]]] = None,
+    tables: bool = True,
+    top_k: Optional[int] = None,
+    retry_below: Optional[float] = 0.5,
+    backend: Optional[LLMBackend] = None,
+    small_backend: Optional[LLMBackend] = None,
+    escalate_below: float = 0.7,
+) -> str:
     """
     Runs ESG extraction pipeline with CATEGORY-BASED batching.
+
+    If page_text_db_path is given, extracted page text is persisted there
+    and reused by later runs as long as the PDF content is unchanged.
+
+    With workers > 1, PDF text extraction runs in a process pool while the
+    main process calls the LLM, so parsing of the next companies overlaps
+    with inference for the current one. Companies are still sent to the
+    LLM and persisted in the order given, so results are deterministic.
+
+    If llm_cache_path is given, LLM responses are cached there and reused
+    whenever the model, options and prompt are unchanged.
+
+    With stream=True, generation is streamed and cut off as soon as the
+    JSON answer for the requested indicators is complete.
+
+    Category text larger than context_tokens allows is split at page
+    boundaries and extracted chunk by chunk (see LLMExtractionAgent).
+
+    Rows are written under run_id (a new one if not given), which is
+    returned. Re-running with the same run_id replaces that run's rows.
+
+    Each (company, category) unit is checkpointed in the store together
+    with its rows. A unit that fails (e.g. an Ollama timeout) is recorded
+    as failed and the run carries on. With resume=True, units the run
+    already completed are skipped, so only failed or missing ones are
+    redone; without a run_id, the latest run is resumed.
+
+    Every unit is fingerprinted from its indicator definitions, page
+    ranges, PDF hash, model, options and prompt template. With
+    incremental=True, units whose fingerprint matches the last completed
+    run of that unit are skipped and their stored results left as they
+    are (fetch_latest_as_dicts / the CSV export still return them).
+
+    PDF reads, prompt construction, LLM calls (with Ollama's token
+    counts) and store writes are timed per call. The samples are stored
+    with the run and summarised (p50/p95 per stage, KV cache reuse where
+    the backend measures the prompt size, see llm_backends.cache_reuse)
+    in a JSON report,
+    printed and, if report_dir is given, written there as
+    run_<run_id>.json.
+
+    page_mapping overrides config.pages.PAGE_MAPPING (same shape), e.g.
+    for generated mappings or benchmarks.
+
+    With tables=True, tables on each indicator's pages are matched
+    against indicator names and synonyms first; indicators resolved
+    there are not sent to the LLM (see src.table_extractor).
+
+    With top_k set, the pages of each indicator's range are ranked by
+    lexical relevance (BM25, see src.page_ranker) and only the top_k
+    pages plus their neighbours go into the prompt; the full range is
+    kept when no page matches.
+
+    Indicators a category batch leaves without a value, or with a
+    confidence below retry_below, are re-prompted one by one with only
+    their own page range; the retries run concurrently and the better of
+    the two answers is kept. retry_below=None disables this.
+
+    backend replaces the default Ollama model with any LLMBackend, e.g.
+    an OpenAI-compatible local server or recorded responses (see
+    src.llm_backends.create_backend).
+
+    With small_backend set, every category is first sent to that (small,
+    fast) model; only indicators it answers with a confidence below
+    escalate_below, without a value, or with a schema or unit error go to
+    backend (see src.router.CascadeExtractionAgent). Each routing decision
+    is stored with the unit and the run report includes the hit rate.
     """
 
-    agent = LLMExtractionAgent()
-    store = ExtractionStore(db_path)
+    llm_cache = LLMResponseCache(llm_cache_path) if llm_cache_path else None
+    if small_backend is not None:
+        agent: LLMExtractionAgent = CascadeExtractionAgent(
+            small=small_backend,
+            large=backend,
+            escalate_below=escalate_below,
+            cache=llm_cache,
+            stream=stream,
+            context_tokens=context_tokens,
+        )
+    else:
+        agent = LLMExtractionAgent(
+            cache=llm_cache,
+            stream=stream,
+            context_tokens=context_tokens,
+            backend=backend,
+        )
+    if resume and run_id is None:
+        run_id = ExtractionStore(db_path).latest_run_id()
+        if run_id is None:
+            print("⚠ No previous run to resume, starting a new one.")
 
-    for company in companies:
-        print(f"\n=== Processing company: {company} ===")
+    store = ExtractionStore(db_path, run_id=run_id)
+    store.start_run()
+    print(f"🆔 Run ID: {store.run_id}")
+
+    completed = store.completed_units() if resume else set()
+    previous_fingerprints = store.completed_fingerprints() if incremental else {}
+
+    # Shared across companies and categories: each physical page is
+    # extracted at most once per run (in-process mode), and each PDF is
+    # hashed once for fingerprinting.
+    text_store = PageTextStore(page_text_db_path) if page_text_db_path else None
+    pool = DocumentPool()
+    page_cache = PageTextCache(store=text_store, pool=pool)
 
-        company_pages = PAGE_MAPPING.get(company)
+    # 1️⃣ Group indicators by category
+    indicators_by_category: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for indicator in INDICATORS:
+        indicators_by_category[indicator["category"]].append(indicator)
+
+    if page_mapping is None:
+        page_mapping = PAGE_MAPPING
+
+    jobs = []
+    for company in companies:
+        company_pages = page_mapping.get(company)
         if not company_pages:
             print(f"⚠ No page references found for {company}, skipping.")
             continue
 
-        # 1️⃣ Group indicators by category
-        indicators_by_category: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for indicator in INDICATORS:
-            indicators_by_category[indicator["category"]].append(indicator)
+        pdf_hash = page_cache.document_hash(company_pages["__pdf_path__"])
 
-        # 2️⃣ Process each category separately
+        pending = {}
+        fingerprints = {}
         for category, indicators in indicators_by_category.items():
-            print(f"\n📂 Category: {category}")
+            if (company, category) in completed:
+                continue
+            fingerprint = agent.unit_fingerprint(
+                indicators,
+                company_pages,
+                pdf_hash,
+                stages={
+                    "tables": TABLE_EXTRACTOR_VERSION if tables else None,
+                    "page_ranking": f"{RANKER_VERSION}-top{top_k}" if top_k else None,
+                    "retry": retry_below,
+                },
+            )
+            if previous_fingerprints.get((company, category)) == fingerprint:
+                print(f"✔ {company} / {category}: unchanged since last run, skipping.")
+                continue
+            pending[category] = indicators
+            fingerprints[category] = fingerprint
 
-            combined_text_parts = []
+        if not pending:
+            print(f"✔ {company}: nothing left to extract, skipping.")
+            continue
+        jobs.append((company, company_pages, pending, fingerprints))
 
-            for indicator in indicators:
-                page_range = company_pages.get(indicator["name"])
-                if not page_range:
-                    continue
+    failed: List[Tuple[str, str]] = []
 
-                start_page, end_page = page_range
-                print(
-                    f"  → Reading pages {start_page}-{end_page} "
-                    f"for indicator: {indicator['name']}"
+    # A caller (e.g. the benchmark harness) may already have activated
+    # its own RunMetrics; record into that one so it sees every sample.
+    run_metrics = metrics.current() or RunMetrics()
+    started = time.perf_counter()
+
+    try:
+        with metrics.activate(run_metrics):
+            if workers > 1:
+                prepared = _prepare_in_processes(
+                    [(company, pages, pending) for company, pages, pending, _ in jobs],
+                    page_text_db_path,
+                    workers,
+                    tables,
+                    top_k,
                 )
+                for (company, (categories, samples)), job in zip(prepared, jobs):
+                    run_metrics.extend(samples)
+                    fingerprints = job[3]
+                    failed += _extract_company(
+                        company, job[1], categories, agent, store, fingerprints,
+                        page_cache, retry_below,
+                    )
+            else:
+                for company, company_pages, pending, fingerprints in jobs:
+                    categories = _prepare_company(
+                        company_pages, pending, page_cache, tables, top_k
+                    )
+                    failed += _extract_company(
+                        company, company_pages, categories, agent, store, fingerprints,
+                        page_cache, retry_below,
+                    )
 
-                text = read_pdf_pages(
-                    pdf_path=company_pages["__pdf_path__"],
-                    start_page=start_page,
-                    end_page=end_page,
+                print(
+                    f"\n📄 Page cache: {page_cache.misses} pages extracted, "
+                    f"{page_cache.hits} served from cache, "
+                    f"{page_cache.store_hits} loaded from text store"
                 )
-                combined_text_parts.append(text)
+    finally:
+        pool.close()
 
-            if not combined_text_parts:
-                print("  ⚠ No text found for this category, skipping.")
-                continue
+    if llm_cache is not None:
+        stats = llm_cache.stats()
+        print(
+            f"\n🧠 LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['entries']} entries stored)"
+        )
+
+    report = run_metrics.report(store.run_id, time.perf_counter() - started)
+    report["kv_cache_reuse"] = cache_reuse(report["stages"].get("llm_invoke", {}))
+    if report["kv_cache_reuse"] is not None:
+        print(f"♻ KV cache: {report['kv_cache_reuse']:.0%} of prompt tokens served from cache")
+    routing = store.routing_stats()
+    if routing["indicators"]:
+        report["routing"] = routing
+        print(
+            f"🪜 Routing: small model kept {routing['hit_rate']:.0%} of "
+            f"{routing['indicators']} indicators, escalations: {routing['escalations']}"
+        )
+    store.save_metrics(run_metrics.samples)
+    print("\n📊 Run report:")
+    print(json.dumps(report, indent=2))
+    if report_dir:
+        report_path = Path(report_dir) / f"run_{store.run_id}.json"
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
 
-            combined_text = "\n".join(combined_text_parts)
+    if failed:
+        print(f"\n❌ {len(failed)} unit(s) failed:")
+        for company, category in failed:
+            print(f"  - {company} / {category}")
+        print(f"  Retry them with: --resume {store.run_id}")
+        return store.run_id
+
+    store.finish_run()
+    print("\n✅ Extraction completed (category-batch mode).")
 
-            print("🚀 Calling LLM (batch extraction)...")
-            batch_results = agent.extract_many(
-                indicators=indicators,
-                text=combined_text,
+    return store.run_id
+
+
+# ------------------------
+# PDF STAGE
+# ------------------------
+def _prepare_company(
+    company_pages: Dict[str, Any],
+    indicators_by_category: Dict[str, List[Dict[str, Any]]],
+    page_cache: PageTextCache,
+    tables: bool = True,
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Builds the prompt text of every category for one company.
+
+    With tables=True, indicators are first looked up in the tables on
+    their pages; only the unresolved ones ("pending") need the LLM, and
+    only their pages are read as text.
+
+    With top_k set, only each pending indicator's most relevant pages
+    (see select_pages) are put into the prompt.
+
+    Returns one entry per category with its indicators, the pending
+    ones, table results, page plan, the pages put into the prompt and
+    their combined text ("" when there is nothing to send to the LLM).
+    """
+    pdf_path = company_pages["__pdf_path__"]
+
+    tables_by_page = {}
+    if tables:
+        # Every page of the company once, whatever category it serves
+        all_indicators = [i for group in indicators_by_category.values() for i in group]
+        pages = merge_page_ranges(
+            company_pages[i["name"]] for i in all_indicators if i["name"] in company_pages
+        )
+        tables_by_page = extract_tables(
+            pdf_path,
+            pages,
+            pool=page_cache.pool,
+            keywords=[
+                label
+                for i in all_indicators
+                for label in [i["name"], *i.get("synonyms", [])]
+            ],
+        )
+
+    categories = []
+
+    for category, indicators in indicators_by_category.items():
+        resolved = {}
+        if tables:
+            with metrics.stage("table_match") as sample:
+                resolved = extract_from_tables(indicators, company_pages, tables_by_page)
+                sample["indicators"] = len(indicators)
+                sample["resolved"] = len(resolved)
+        pending = [i for i in indicators if i["name"] not in resolved]
+
+        # Union of every pending indicator's range, each page read once
+        plan = plan_category_pages(company_pages, pending)
+
+        page_texts = {}
+        if plan.pages:
+            page_texts = page_cache.get_pages(
+                pdf_path=pdf_path,
+                page_numbers=plan.pages,
             )
 
-            # 3️⃣ Persist results
-            for indicator in indicators:
-                name = indicator["name"]
-                result = batch_results.get(name)
-
-                if not result:
-                    store.insert(
-                        company=company,
-                        indicator_name=name,
-                        category=indicator["category"],
-                        esrs=indicator["esrs"],
-                        value=None,
-                        unit=indicator["expected_unit"],
-                        confidence=0.0,
-                        source_page=None,
-                        source_section=None,
-                        notes="Not found in batch extraction",
-                    )
-                    continue
-
-                store.insert(
-                    company=company,
-                    indicator_name=name,
-                    category=indicator["category"],
-                    esrs=indicator["esrs"],
-                    value=result.get("value"),
-                    unit=result.get("unit"),
-                    confidence=result.get("confidence", 0.0),
-                    source_page=result.get("source_page"),
-                    source_section=None,
-                    notes=result.get("notes"),
-                )
+        if top_k and page_texts:
+            with metrics.stage("page_ranking") as sample:
+                keep = set()
+                for indicator in pending:
+                    page_range = company_pages.get(indicator["name"])
+                    if page_range:
+                        keep.update(select_pages(indicator, page_range, page_texts, top_k))
+                sample["pages"] = len(page_texts)
+                sample["kept_pages"] = len(keep)
+            page_texts = {p: t for p, t in page_texts.items() if p in keep}
 
-    print("\n✅ Extraction completed (category-batch mode).")
+        categories.append(
+            {
+                "category": category,
+                "indicators": indicators,
+                "pending": pending,
+                "resolved": resolved,
+                "plan": plan,
+                "pages": sorted(page_texts),
+                "text": build_page_text(page_texts),
+            }
+        )
+
+    return categories
+
+
+def _init_worker(page_text_db_path: Optional[str]) -> None:
+    global _WORKER_CACHE
+
+    text_store = PageTextStore(page_text_db_path) if page_text_db_path else None
+    _WORKER_CACHE = PageTextCache(store=text_store, pool=DocumentPool())
+
+
+def _prepare_company_in_worker(
+    company_pages: Dict[str, Any],
+    indicators_by_category: Dict[str, List[Dict[str, Any]]],
+    tables: bool,
+    top_k: Optional[int],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Worker-process entry point; also returns the timing samples recorded
+    in the worker so the parent can add them to the run's metrics.
+    """
+    with metrics.activate(RunMetrics()) as worker_metrics:
+        categories = _prepare_company(
+            company_pages, indicators_by_category, _WORKER_CACHE, tables, top_k
+        )
+    return categories, worker_metrics.samples
+
+
+def _prepare_in_processes(
+    jobs: List[Tuple[str, Dict[str, Any], Dict[str, List[Dict[str, Any]]]]],
+    page_text_db_path: Optional[str],
+    workers: int,
+    tables: bool,
+    top_k: Optional[int],
+) -> Iterator[Tuple[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]]:
+    """
+    Submits every company to a process pool and yields the prepared
+    categories (and worker timing samples) in submission order as each
+    one becomes available.
+
+    Workers are spawned rather than forked: the main process already runs
+    HTTP client threads, and forking a multi-threaded process can deadlock.
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(page_text_db_path,),
+    ) as executor:
+        futures = [
+            (
+                company,
+                executor.submit(
+                    _prepare_company_in_worker,
+                    company_pages,
+                    indicators_by_category,
+                    tables,
+                    top_k,
+                ),
+            )
+            for company, company_pages, indicators_by_category in jobs
+        ]
+
+        for company, future in futures:
+            yield company, future.result()
+
+
+# ------------------------
+# LLM + PERSISTENCE STAGE
+# ------------------------
+def _extract_company(
+    company: str,
+    company_pages: Dict[str, Any],
+    categories: List[Dict[str, Any]],
+    agent: LLMExtractionAgent,
+    store: ExtractionStore,
+    fingerprints: Dict[str, str],
+    page_cache: PageTextCache,
+    retry_below: Optional[float] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Runs the LLM for every category of a company and persists each one
+    with its checkpoint.
+
+    Categories are extracted concurrently through the agent's
+    map_concurrently (sized to the client's num_parallel) and persisted
+    in category order as each one completes.
+    Targeted retries (see _retry_weak) belong to their category's unit.
+
+    Returns:
+        The (company, category) units that failed.
+    """
+    print(f"\n=== Processing company: {company} ===")
+
+    # 2️⃣ Process each category separately
+    ready = []
+    for entry in categories:
+        plan = entry["plan"]
+
+        print(f"\n📂 Category: {entry['category']}")
+
+        resolved = entry["resolved"]
+        if resolved:
+            print(
+                f"  📋 Resolved {len(resolved)}/{len(entry['indicators'])} "
+                f"indicators from tables"
+            )
+
+        if not entry["pending"] or (resolved and not entry["text"]):
+            # Nothing (left) for the LLM; persist the table results
+            rows = [
+                ExtractionStore.build_row(company, indicator, resolved.get(indicator["name"]))
+                for indicator in entry["indicators"]
+            ]
+            store.finish_unit(
+                company,
+                entry["category"],
+                status="done",
+                fingerprint=fingerprints.get(entry["category"]),
+                rows=rows,
+            )
+            continue
+
+        if not entry["text"]:
+            print("  ⚠ No text found for this category, skipping.")
+            store.finish_unit(
+                company,
+                entry["category"],
+                status="empty",
+                fingerprint=fingerprints.get(entry["category"]),
+            )
+            continue
+
+        print(
+            f"  → Read {len(plan.pages)} unique pages "
+            f"({plan.requested_pages} requested, "
+            f"{plan.duplicate_pages} duplicates removed)"
+        )
+        if len(entry["pages"]) < len(plan.pages):
+            print(f"  🎯 Kept {len(entry['pages'])} most relevant pages for the prompt")
+        ready.append(entry)
+
+    if not ready:
+        return []
+
+    print(f"🚀 Calling LLM (batch extraction, {len(ready)} categories)...")
+
+    for entry in ready:
+        prompt_hash = agent.prompt_hash(entry["pending"], entry["text"])
+        store.start_unit(
+            company,
+            entry["category"],
+            prompt_hash,
+            fingerprint=fingerprints.get(entry["category"]),
+        )
+
+    def extract(entry: Dict[str, Any]) -> Tuple[Any, Optional[Exception]]:
+        # A failing category must not take the others down with it
+        try:
+            return _timed_extract(
+                agent,
+                entry["pending"],
+                entry["text"],
+                company_pages,
+                page_cache,
+                retry_below,
+            ), None
+        except Exception as e:
+            return None, e
+
+    failed = []
+    outcomes = agent.map_concurrently(extract, ready)
+    for entry, (extracted, error) in zip(ready, outcomes):
+        category = entry["category"]
+        if error is not None:
+            print(f"  ❌ {category} failed: {error}")
+            store.finish_unit(company, category, status="failed", error=repr(error))
+            failed.append((company, category))
+            continue
+        batch_results, duration_s = extracted
+
+        # Table matches are deterministic and take precedence
+        batch_results = {**batch_results, **entry["resolved"]}
+
+        # 3️⃣ Persist results together with the checkpoint
+        rows = [
+            ExtractionStore.build_row(company, indicator, batch_results.get(indicator["name"]))
+            for indicator in entry["indicators"]
+        ]
+        routes = [
+            route
+            for route in (
+                ExtractionStore.build_route(indicator, batch_results.get(indicator["name"]))
+                for indicator in entry["pending"]
+            )
+            if route is not None
+        ]
+        store.finish_unit(
+            company,
+            category,
+            status="done",
+            duration_s=duration_s,
+            rows=rows,
+            routes=routes,
+        )
+
+    return failed
+
+
+def _timed_extract(
+    agent: LLMExtractionAgent,
+    indicators: List[Dict[str, Any]],
+    text: str,
+    company_pages: Dict[str, Any],
+    page_cache: PageTextCache,
+    retry_below: Optional[float] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], float]:
+    started = time.perf_counter()
+    results = agent.extract_many(indicators=indicators, text=text)
+    if retry_below is not None:
+        results = _retry_weak(
+            agent, indicators, text, results, company_pages, page_cache, retry_below
+        )
+    return results, time.perf_counter() - started
+
+
+def _needs_retry(result: Any, retry_below: float) -> bool:
+    if not isinstance(result, dict) or result.get("value") is None:
+        return True
+    try:
+        return float(result.get("confidence") or 0.0) < retry_below
+    except (TypeError, ValueError):
+        return True
+
+
+def _retry_weak(
+    agent: LLMExtractionAgent,
+    indicators: List[Dict[str, Any]],
+    text: str,
+    results: Dict[str, Dict[str, Any]],
+    company_pages: Dict[str, Any],
+    page_cache: PageTextCache,
+    retry_below: float,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Re-prompts missing or low-confidence indicators one by one, each with
+    only its own page range, and keeps the better answer per indicator.
+
+    Indicators without a range, or whose range text is exactly what the
+    batch already saw, are not retried (the answer would not change).
+    """
+    batches = []
+    for indicator in indicators:
+        page_range = company_pages.get(indicator["name"])
+        if not page_range or not _needs_retry(results.get(indicator["name"]), retry_below):
+            continue
+
+        start, end = page_range
+        page_texts = page_cache.get_pages(
+            pdf_path=company_pages["__pdf_path__"],
+            page_numbers=range(start, end + 1),
+        )
+        retry_text = build_page_text(page_texts)
+        if retry_text and retry_text != text:
+            batches.append(([indicator], retry_text))
+
+    if not batches:
+        return results
+
+    print(f"  🔁 Retrying {len(batches)} indicator(s) with their own pages")
+    with metrics.stage("llm_retry") as sample:
+        retried = agent.extract_batches(batches)
+        merged = merge_results([results, *retried])
+        sample["indicators"] = len(batches)
+        sample["recovered"] = sum(
+            1
+            for (indicator,), _ in batches
+            if not _needs_retry(merged.get(indicator["name"]), retry_below)
+        )
+    return merged
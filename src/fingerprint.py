@@ -0,0 +1,50 @@
+"""
+Fingerprints of extraction work units.
+
+Responsibility:
+- Hash everything that determines the result of one (company, category)
+  unit: indicator definitions, page ranges, PDF content, model, options,
+  prompt template and pre-LLM stages
+- Let incremental runs recompute only units whose inputs changed
+
+No LLM, no PDF logic here.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+
+def unit_fingerprint(
+    indicators: List[Dict[str, Any]],
+    company_pages: Dict[str, Any],
+    pdf_hash: str,
+    model: str,
+    options: Dict[str, Any],
+    prompt_template: str,
+    stages: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Stable SHA-256 over the inputs of one work unit.
+
+    Only the page ranges of the unit's own indicators are included, so
+    editing another category's range does not invalidate this unit.
+    stages names the version or settings of the non-LLM stages (table
+    matching, page ranking) that decide which indicators and pages reach
+    the prompt.
+    """
+    material = {
+        "indicators": sorted(indicators, key=lambda i: i["name"]),
+        "page_ranges": {
+            indicator["name"]: company_pages.get(indicator["name"])
+            for indicator in indicators
+        },
+        "pdf_hash": pdf_hash,
+        "model": model,
+        "options": options,
+        "prompt_template": prompt_template,
+        "stages": stages or {},
+    }
+
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
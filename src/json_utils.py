@@ -0,0 +1,250 @@
+"""
+Incremental JSON helpers for LLM output.
+
+Responsibility:
+- Follow a JSON object as it is generated, chunk by chunk
+- Report when the top-level object is complete, or when every
+  requested key already has a complete value
+- Recover every well-formed member of a malformed or truncated object
+
+No HTTP, no prompt logic here.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+_DECODER = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+
+
+class JSONObjectScanner:
+    """
+    Tracks the first top-level JSON object in a stream of text chunks.
+
+    Text before the opening brace (markdown fences, chatter) is ignored.
+    String literals and escapes are tracked so braces and commas inside
+    strings do not confuse the depth count.
+    """
+
+    def __init__(self, expected_keys: Optional[Iterable[str]] = None):
+        self.expected_keys = set(expected_keys or [])
+
+        self._buffer = []
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+
+        # Set once the object closed or was completed early.
+        # object_text is the (possibly closed-off) JSON text of result.
+        self.closed = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.object_text: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.closed
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consumes a chunk of generated text.
+
+        Returns True once generation can stop: either the top-level
+        object closed (self.result is None if it was not valid JSON), or
+        every expected key has a complete value, checked whenever a
+        top-level member ends.
+        """
+        if self.done:
+            return True
+
+        for char in chunk:
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            self._buffer.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close("".join(self._buffer))
+                    return True
+            elif char == "," and self._depth == 1 and self.expected_keys:
+                # A top-level member just ended: close the object and see
+                # whether everything we asked for is already there.
+                candidate = "".join(self._buffer[:-1]) + "}"
+                partial = self._load(candidate)
+                if partial is not None and self.expected_keys <= partial.keys():
+                    self._close(candidate)
+                    return True
+
+        return False
+
+    def _close(self, text: str) -> None:
+        self.closed = True
+        self.object_text = text
+        self.result = self._load(text)
+
+    @staticmethod
+    def _load(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+
+# ------------------------
+# TOLERANT PARSING
+# ------------------------
+def parse_partial_object(text: str) -> Dict[str, Any]:
+    """
+    Parses the first JSON object in text, member by member.
+
+    Members that decode are kept; a malformed member is skipped up to
+    the next comma at its level, and a malformed nested object keeps
+    whatever members of its own decoded. Text around the object
+    (markdown fences, chatter), trailing commas and a missing end
+    (truncated generation) are tolerated.
+
+    Returns an empty dict when there is no object at all.
+    """
+    if not text:
+        return {}
+
+    start = text.find("{")
+    if start < 0:
+        return {}
+
+    result, _ = _parse_object(text, start)
+    return result
+
+
+def _parse_object(text: str, index: int) -> Tuple[Dict[str, Any], int]:
+    """
+    Parses the object opening at text[index]; returns it and the index
+    just past its end (len(text) when it never closes).
+    """
+    result: Dict[str, Any] = {}
+    end = len(text)
+    index += 1
+
+    while True:
+        index = _skip_separators(text, index)
+        if index >= end:
+            return result, end
+        if text[index] == "}":
+            return result, index + 1
+        if text[index] != '"':
+            index = _skip_member(text, index)
+            continue
+
+        try:
+            key, index = _DECODER.raw_decode(text, index)
+        except json.JSONDecodeError:
+            # Unterminated key: the output was cut off here
+            return result, end
+
+        index = _skip_whitespace(text, index)
+        if index >= end or text[index] != ":":
+            continue
+        index = _skip_whitespace(text, index + 1)
+        if index >= end:
+            return result, end
+
+        try:
+            value, index = _DECODER.raw_decode(text, index)
+        except json.JSONDecodeError:
+            if text[index] == "{":
+                value, index = _parse_object(text, index)
+                if value:
+                    result[key] = value
+            else:
+                index = _skip_member(text, index)
+            continue
+
+        if index >= end and isinstance(value, (int, float)) and not isinstance(value, bool):
+            # A number at the very end may have been cut off mid-digits
+            return result, end
+        if not _member_ended(text, index):
+            # e.g. "value": 12,3 -- keeping 12 would be a wrong figure
+            index = _skip_member(text, _skip_separators(text, index))
+            continue
+
+        result[key] = value
+
+
+def _member_ended(text: str, index: int) -> bool:
+    """
+    Whether a value ending at index is followed by what a well-formed
+    object allows: the end, a "}", a "," then a key or "}", or (missing
+    comma, tolerated) the next key.
+    """
+    index = _skip_whitespace(text, index)
+    if index >= len(text) or text[index] in '}"':
+        return True
+    if text[index] != ",":
+        return False
+
+    index = _skip_separators(text, index)
+    return index >= len(text) or text[index] in '}"'
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    while index < len(text) and text[index] in " \t\r\n":
+        index += 1
+    return index
+
+
+def _skip_separators(text: str, index: int) -> int:
+    while index < len(text) and text[index] in _SEPARATORS:
+        index += 1
+    return index
+
+
+def _skip_member(text: str, index: int) -> int:
+    """
+    Index of the next "," or "}" at the current nesting level, skipping
+    over strings and nested brackets.
+    """
+    depth = 0
+    in_string = False
+    escape = False
+
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            if depth == 0 and char == "}":
+                return index
+            depth = max(depth - 1, 0)
+        elif char == "," and depth == 0:
+            return index
+        index += 1
+
+    return index
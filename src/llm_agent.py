@@ -1,17 +1,93 @@
-import json
-import re
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple, TypeVar
 
+from src import metrics
+from src.chunker import chunk_text, estimate_tokens, merge_results
+from src.fingerprint import unit_fingerprint
+from src.json_utils import parse_partial_object
+from src.llm_backends import LLMBackend
+from src.llm_cache import LLMResponseCache
 from src.ollama import OllamaLLM
 
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Part of unit fingerprints: bump when the output constraint or the
+# parsing of answers changes
+RESPONSE_FORMAT = "json-schema-1"
+
+# Identical for every call so Ollama can reuse its KV cache for it
+SYSTEM_PROMPT = """
+You are an information extraction system.
+
+You will be given document text, then a list of ESG indicators to
+extract from it.
+
+Rules:
+- Return ONLY valid JSON
+- Keys must match indicator names EXACTLY
+- Return an object for every indicator; if it is not found, set
+  "value" and "source_page" to null and "confidence" to 0
+- Do NOT infer or guess
+- Do NOT add commentary or explanations
+
+Return JSON in the following format:
+{
+  "Indicator Name": {
+    "value": number or null,
+    "unit": string,
+    "confidence": number between 0 and 1,
+    "source_page": number or null,
+    "notes": string
+  }
+}
+"""
+
+
 class LLMExtractionAgent:
     """
-    Batch extraction agent using a local Ollama LLM (Mistral).
+    Batch extraction agent using a local LLM.
+
+    The model is Ollama's qwen2.5:7b unless another LLMBackend is given
+    (see llm_backends.create_backend); the backend's capabilities decide
+    whether answers are streamed and constrained to a schema.
+
+    When a LLMResponseCache is given, responses are reused for identical
+    (model, options, prompt) combinations instead of re-running inference.
+
+    Prompts are kept inside context_tokens: text that does not fit is
+    split at page boundaries, the chunks are extracted concurrently and
+    their results merged per indicator.
+
+    Requests use a fixed system prompt followed by the document text and
+    only then the indicator list, so consecutive calls share the longest
+    possible prefix and Ollama can reuse its KV cache.
+
+    Generation is constrained to a JSON schema built from the requested
+    indicators, and answers are parsed indicator by indicator, so one
+    malformed field does not cost the whole category.
     """
 
-    def __init__(self):
-        self.model = OllamaLLM(model="qwen2.5:7b")
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        stream: bool = False,
+        context_tokens: int = 8192,
+        backend: Optional[LLMBackend] = None,
+    ):
+        if backend is None:
+            backend = OllamaLLM(model="qwen2.5:7b")
+        if stream:
+            backend.stream = True
+        self.model = backend
+        self.model.system = SYSTEM_PROMPT
+        self.model.options["num_ctx"] = context_tokens
+        self.context_tokens = context_tokens
+        self.cache = cache
+        # Prompt scaffolding tokens per indicator set (see text_token_budget)
+        self._overhead: Dict[Tuple[Tuple[str, str, str], ...], int] = {}
 
     def extract_many(
         self,
@@ -21,76 +97,221 @@ class LLMExtractionAgent:
         """
         Extracts all indicators in ONE batch LLM call.
 
+        If the prompt would not fit the context window, the text is
+        chunked at page boundaries and each chunk becomes its own call
+        (map); results are merged by confidence and source page (reduce).
+
         Returns:
             Dict[indicator_name -> extracted_fields]
             Empty dict if parsing fails.
         """
 
-        indicator_block = "\n".join(
-            f"- {i['name']} ({i['expected_unit']}): {i['definition']}"
-            for i in indicators
+        chunks = chunk_text(text, self.text_token_budget(indicators))
+        if len(chunks) <= 1:
+            return self._extract_once(indicators, text)
+
+        print(f"  ✂ Text exceeds context window, split into {len(chunks)} chunks")
+        chunk_results = list(self.map_concurrently(
+            lambda chunk: self._extract_once(indicators, chunk),
+            chunks,
+        ))
+        return merge_results(chunk_results)
+
+    def text_token_budget(self, indicators: List[Dict[str, Any]]) -> int:
+        """
+        Tokens left for document text once the prompt scaffolding and the
+        generated answer are accounted for.
+
+        The scaffolding is counted once per indicator set: backends with
+        an exact count ask the server, which is not worth a request per
+        extraction.
+        """
+        key = tuple(
+            (i["name"], i["expected_unit"], i["definition"]) for i in indicators
         )
+        overhead = self._overhead.get(key)
+        if overhead is None:
+            overhead = self.model.count_tokens(SYSTEM_PROMPT + self.build_prompt(indicators, ""))
+            self._overhead[key] = overhead
+        reserved = self.model.options.get("num_predict", 0)
+        return max(self.context_tokens - overhead - reserved, 1)
 
-        prompt = f"""
-You are an information extraction system.
+    def _extract_once(
+        self,
+        indicators: List[Dict[str, Any]],
+        text: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        with metrics.stage("prompt_build") as sample:
+            prompt = self.build_prompt(indicators, text)
+            sample["prompt_chars"] = len(prompt)
+            sample["prompt_tokens_est"] = estimate_tokens(prompt)
 
-Extract the following ESG indicators from the text.
+        key = None
+        if self.cache is not None:
+            key = self.prompt_key(prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._safe_parse_json(cached)
 
-Rules:
-- Return ONLY valid JSON
-- Keys must match indicator names EXACTLY
-- If an indicator is not found, return null
-- Do NOT infer or guess
-- Do NOT add commentary or explanations
+        capabilities = self.model.capabilities
+        schema = self.response_schema(indicators) if capabilities.json_schema else None
+        if self.model.stream and capabilities.streaming:
+            raw = self.model.invoke_stream(
+                prompt,
+                expected_keys=[i["name"] for i in indicators],
+                schema=schema,
+            )
+        else:
+            raw = self.model.invoke(prompt, schema=schema)
+        parsed = self._safe_parse_json(raw)
 
-Indicators:
-{indicator_block}
+        # Only usable answers are cached, so a bad generation is retried
+        if key is not None and parsed:
+            self.cache.put(key, self.model.model, raw)
 
-Text:
-{text}
+        return parsed
 
-Return JSON in the following format:
-{{
-  "Indicator Name": {{
-    "value": number or null,
-    "unit": string,
-    "confidence": number between 0 and 1,
-    "source_page": number or null,
-    "notes": string
-  }}
-}}
-"""
+    def extract_batches(
+        self,
+        batches: List[Tuple[List[Dict[str, Any]], str]],
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Runs extract_many for several (indicators, text) batches at once.
+
+        Requests are sent concurrently up to the client's num_parallel
+        limit. Results are returned in the same order as the batches.
+        """
+
+        return list(self.map_concurrently(lambda batch: self.extract_many(*batch), batches))
+
+    def map_concurrently(self, fn: Callable[[T], R], items: List[T]) -> Iterator[R]:
+        """
+        Maps fn over items on a thread pool sized to the client's
+        num_parallel limit.
 
-        raw = self.model.invoke(prompt)
+        Results are yielded in item order as soon as each is ready, so a
+        caller can persist early results while later items still run. An
+        exception raised by fn is re-raised at its item.
+        """
+        if len(items) <= 1:
+            yield from (fn(item) for item in items)
+            return
+
+        workers = min(len(items), self.model.num_parallel)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(fn, items)
 
-        return self._safe_parse_json(raw)
+    def prompt_hash(
+        self,
+        indicators: List[Dict[str, Any]],
+        text: str,
+    ) -> str:
+        """
+        Identifies the full request for a batch: model, options and prompt.
+        """
+        return self.prompt_key(self.build_prompt(indicators, text))
+
+    def prompt_key(self, prompt: str) -> str:
+        """
+        Cache key of a request: backend, model, options, response format,
+        system prompt and prompt. Backends differ in how they apply
+        options and whether answers are schema-constrained, so their
+        responses are not interchangeable.
+        """
+        return LLMResponseCache.make_key(
+            self.model.model,
+            self.model.options,
+            f"{self.model.system or ''}\n{prompt}",
+            backend=type(self.model).__name__,
+            response_format=RESPONSE_FORMAT,
+        )
+
+    def unit_fingerprint(
+        self,
+        indicators: List[Dict[str, Any]],
+        company_pages: Dict[str, Any],
+        pdf_hash: str,
+        stages: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Fingerprint of a (company, category) unit as this agent would run it.
+        """
+        return unit_fingerprint(
+            indicators=indicators,
+            company_pages=company_pages,
+            pdf_hash=pdf_hash,
+            model=self.model.model,
+            options=self.model.options,
+            prompt_template=SYSTEM_PROMPT + self.build_prompt([], ""),
+            stages={
+                **(stages or {}),
+                "response_format": RESPONSE_FORMAT,
+                "backend": type(self.model).__name__,
+            },
+        )
 
     @staticmethod
-    def _safe_parse_json(raw: str) -> Dict[str, Any]:
+    def build_prompt(
+        indicators: List[Dict[str, Any]],
+        text: str,
+    ) -> str:
         """
-        Safely extracts and parses JSON from LLM output.
+        Builds the user message for one set of indicators.
 
-        - Removes markdown fences
-        - Extracts first JSON object
-        - Returns empty dict on failure (NO crash)
+        The document text comes first and the indicator list last: the
+        instructions live in SYSTEM_PROMPT, so calls over the same text
+        differ only in their tail.
         """
+        indicator_block = "\n".join(
+            f"- {i['name']} ({i['expected_unit']}): {i['definition']}"
+            for i in indicators
+        )
+
+        prompt = f"""
+Text:
+{text}
 
-        if not raw:
-            return {}
+Indicators:
+{indicator_block}
 
-        # Remove markdown fences if present
-        cleaned = raw.replace("```json", "").replace("```", "").strip()
+Extract the indicators above from the text. Return only the JSON object.
+"""
 
-        # Extract first JSON object using regex
-        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
+        return prompt
 
-        if not match:
-            return {}
+    @staticmethod
+    def response_schema(indicators: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        JSON schema for Ollama's "format": one required object per
+        indicator, with the fields build_row persists. A missing figure
+        is a null value rather than a missing key.
+        """
+        result_schema = {
+            "type": "object",
+            "properties": {
+                "value": {"type": ["number", "null"]},
+                "unit": {"type": "string"},
+                "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                "source_page": {"type": ["integer", "null"]},
+                "notes": {"type": "string"},
+            },
+            "required": ["value", "unit", "confidence", "source_page", "notes"],
+        }
+
+        return {
+            "type": "object",
+            "properties": {i["name"]: result_schema for i in indicators},
+            "required": [i["name"] for i in indicators],
+        }
 
-        json_text = match.group(0)
+    @staticmethod
+    def _safe_parse_json(raw: str) -> Dict[str, Any]:
+        """
+        Parses LLM output indicator by indicator.
 
-        try:
-            parsed = json.loads(json_text)
-            return parsed if isinstance(parsed, dict) else {}
-        except json.JSONDecodeError:
-            return {}
+        - Ignores markdown fences and text around the object
+        - Keeps every well-formed indicator of a malformed or truncated
+          answer instead of discarding the whole category
+        - Returns empty dict when nothing is recoverable (NO crash)
+        """
+        return parse_partial_object(raw)
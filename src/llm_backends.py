@@ -0,0 +1,397 @@
+"""
+Interchangeable LLM backends.
+
+Responsibility:
+- Define the interface the extraction agent expects from an LLM
+  (LLMBackend) and the capability flags it can query
+- Share request plumbing between HTTP backends (pooled session,
+  concurrency limit, retries with backoff)
+- Provide a deterministic recorded-response backend for tests and
+  benchmarks, and a factory for the CLI
+
+No prompt building or answer parsing here.
+"""
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Protocol, TypeVar,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src import metrics
+from src.chunker import estimate_tokens
+
+
+T = TypeVar("T")
+
+
+# HTTP statuses worth retrying: overload and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+BACKENDS = ("ollama", "openai", "recorded")
+
+
+def cache_reuse(llm_invoke_stats: Dict[str, Any]) -> Optional[float]:
+    """
+    Share of prompt tokens the server served from its KV cache, from
+    summed llm_invoke counters (RunMetrics.summary()).
+
+    Only calls whose real prompt size was measured count: they carry
+    kv_prompt_tokens and kv_cached_tokens (see OpenAICompatibleLLM).
+    None when there were none, e.g. with Ollama, which reports the
+    evaluated tokens but not the prompt size.
+    """
+    prompt_tokens = llm_invoke_stats.get("kv_prompt_tokens")
+    if not prompt_tokens:
+        return None
+    return llm_invoke_stats.get("kv_cached_tokens", 0) / prompt_tokens
+
+
+class Capabilities(NamedTuple):
+    """What a backend supports beyond plain text completion."""
+    streaming: bool = False         # invoke_stream can stop generation early
+    json_schema: bool = False       # invoke(..., schema=) constrains the output
+    prefix_cache: bool = False      # a shared prompt prefix is served from a KV cache
+    exact_token_count: bool = False  # count_tokens asks the model's tokenizer
+
+
+class LLMBackend(Protocol):
+    """
+    Interface of an LLM as used by LLMExtractionAgent.
+
+    model, options and system are part of cache keys and fingerprints,
+    so two backends configured alike produce interchangeable responses.
+    """
+
+    model: str
+    options: Dict[str, Any]
+    system: Optional[str]
+    stream: bool
+    num_parallel: int
+    capabilities: Capabilities
+
+    @property
+    def last_stats(self) -> Dict[str, Any]: ...
+
+    def invoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str: ...
+
+    def invoke_stream(
+        self,
+        prompt: str,
+        expected_keys: Optional[Iterable[str]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> str: ...
+
+    async def ainvoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str: ...
+
+    def invoke_batch(
+        self,
+        prompts: List[str],
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> List[str]: ...
+
+    def count_tokens(self, text: str) -> int: ...
+
+    def close(self) -> None: ...
+
+
+# ------------------------
+# Shared behaviour
+# ------------------------
+
+class BaseBackend(ABC):
+    """
+    Default implementations of the LLMBackend methods that can be
+    expressed through invoke(), which subclasses must provide: streaming falls back to a single call,
+    ainvoke runs invoke in a worker thread, invoke_batch runs up to
+    num_parallel prompts at a time and count_tokens uses the
+    conservative chars-per-token estimate.
+    """
+
+    capabilities = Capabilities()
+
+    def __init__(self, model: str, num_parallel: int = 1, stream: bool = False):
+        self.model = model
+        self.num_parallel = max(num_parallel, 1)
+        self.stream = stream
+        self.system: Optional[str] = None
+        self.options: Dict[str, Any] = {
+            "temperature": 0,
+            "num_predict": 800,  # limit output size
+        }
+        self._local = threading.local()
+
+    @property
+    def last_stats(self) -> Dict[str, Any]:
+        return getattr(self._local, "stats", {})
+
+    @abstractmethod
+    def invoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str: ...
+
+    def invoke_stream(
+        self,
+        prompt: str,
+        expected_keys: Optional[Iterable[str]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        return self.invoke(prompt, schema=schema)
+
+    async def ainvoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str:
+        return await asyncio.to_thread(self.invoke, prompt, schema)
+
+    def invoke_batch(
+        self,
+        prompts: List[str],
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """
+        Responses to prompts, in order. Up to num_parallel prompts are in
+        flight at once; the first failure is raised.
+        """
+        if self.num_parallel <= 1 or len(prompts) <= 1:
+            return [self.invoke(prompt, schema=schema) for prompt in prompts]
+
+        with ThreadPoolExecutor(max_workers=min(self.num_parallel, len(prompts))) as pool:
+            return list(pool.map(lambda prompt: self.invoke(prompt, schema=schema), prompts))
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def _prompt_tokens_est(self, prompt: str) -> int:
+        return estimate_tokens((self.system or "") + prompt)
+
+    def close(self) -> None:
+        pass
+
+
+class HTTPBackend(BaseBackend):
+    """
+    Base for backends talking to an HTTP inference server.
+
+    Connections are kept alive in a pooled requests.Session, in-flight
+    requests are bounded by a semaphore sized to num_parallel, and
+    connection failures and retryable statuses are retried with
+    exponential backoff (see _post). A single instance is safe to share
+    between threads.
+    """
+
+    server_name = "LLM server"
+
+    def __init__(
+        self,
+        model: str,
+        num_parallel: int = 1,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 900,  # 15 minutes
+        stream: bool = False,
+    ):
+        super().__init__(model, num_parallel=num_parallel, stream=stream)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._semaphore = threading.BoundedSemaphore(self.num_parallel)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.num_parallel,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        consume: Callable[[requests.Response], T],
+        stream: bool = False,
+    ) -> T:
+        """
+        POSTs payload to url, retrying transient failures.
+
+        consume runs while the request slot is held, so a streamed body is
+        read within the concurrency limit.
+
+        Only failures before the server started on the request are
+        retried: connection errors (connect timeouts included) and
+        RETRY_STATUSES. A read timeout, or an error while consume reads
+        the body, is final; retrying would run the whole generation again.
+        """
+        attempt = 0
+        while True:
+            with self._semaphore:
+                try:
+                    response = self.session.post(
+                        url,
+                        json=payload,
+                        timeout=self.timeout,
+                        stream=stream,
+                    )
+                except requests.ReadTimeout:
+                    raise
+                except requests.ConnectionError as e:
+                    error: Exception = e
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return consume(response)
+                    response.close()
+                    error = requests.HTTPError(
+                        f"{response.status_code} from {self.server_name}", response=response
+                    )
+
+            if attempt >= self.max_retries:
+                raise error
+
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# ------------------------
+# Recorded responses
+# ------------------------
+
+def recording_key(system: Optional[str], prompt: str) -> str:
+    """Key of a recorded response: hash of the system and user prompt."""
+    return hashlib.sha256(f"{system or ''}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class RecordedLLM(BaseBackend):
+    """
+    Deterministic backend replaying recorded responses.
+
+    Responses are looked up by recording_key(system, prompt). On a miss
+    the prompt is passed to inner (a real backend) and its response is
+    recorded, or, without inner, answered by responder (default: "{}").
+    save() writes the recordings as JSON to path, which is loaded on
+    construction when it exists. Without inner or responder there must
+    be recordings to replay (path or responses); otherwise every prompt
+    would silently be answered "{}" and a whole run stored as not found,
+    so a ValueError is raised.
+
+    Calls are recorded as "llm_invoke" stages with recorded=True, so
+    benchmarks can replay a run without a model server.
+    """
+
+    capabilities = Capabilities(streaming=False, json_schema=True)
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        responses: Optional[Dict[str, str]] = None,
+        inner: Optional[LLMBackend] = None,
+        responder: Optional[Callable[[str], str]] = None,
+        model: str = "recorded",
+        num_parallel: int = 1,
+    ):
+        if inner is None and responder is None:
+            if responses is None and path is None:
+                raise ValueError("RecordedLLM needs recordings, an inner backend or a responder")
+            if responses is None and not os.path.exists(path):
+                raise ValueError(f"No recordings at {path}")
+
+        super().__init__(inner.model if inner is not None else model, num_parallel=num_parallel)
+        self.path = path
+        self.inner = inner
+        self.responder = responder
+        self.responses: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.responses.update(json.load(f))
+        if responses:
+            self.responses.update(responses)
+
+    def record(self, prompt: str, response: str) -> None:
+        with self._lock:
+            self.responses[recording_key(self.system, prompt)] = response
+
+    def invoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str:
+        key = recording_key(self.system, prompt)
+
+        with metrics.stage("llm_invoke", recorded=True) as sample:
+            sample["prompt_tokens_est"] = self._prompt_tokens_est(prompt)
+            with self._lock:
+                response = self.responses.get(key)
+                hit = response is not None
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            sample["hit"] = hit
+
+            if response is None:
+                if self.inner is not None:
+                    self.inner.system = self.system
+                    self.inner.options = self.options
+                    response = self.inner.invoke(prompt, schema=schema)
+                    self.record(prompt, response)
+                elif self.responder is not None:
+                    response = self.responder(prompt)
+                else:
+                    response = "{}"
+
+        self._local.stats = {"hit": hit}
+        return response
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save recordings to")
+
+        with self._lock:
+            responses = dict(self.responses)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(responses, f, indent=2, sort_keys=True)
+
+    def close(self) -> None:
+        if self.inner is not None:
+            self.inner.close()
+
+
+# ------------------------
+# Factory
+# ------------------------
+
+def create_backend(
+    kind: str = "ollama",
+    model: str = "qwen2.5:7b",
+    base_url: Optional[str] = None,
+    stream: bool = False,
+    recordings: Optional[str] = None,
+) -> LLMBackend:
+    """
+    Builds a backend by name (one of BACKENDS).
+
+    base_url defaults to OLLAMA_HOST for "ollama" and to OPENAI_BASE_URL
+    for "openai" (llama.cpp server, vLLM or any other server exposing
+    /v1/chat/completions). "recorded" replays the recordings file.
+    """
+    if kind == "ollama":
+        from src.ollama import OllamaLLM
+        return OllamaLLM(model=model, base_url=base_url, stream=stream)
+    if kind == "openai":
+        from src.openai_compat import OpenAICompatibleLLM
+        return OpenAICompatibleLLM(model=model, base_url=base_url, stream=stream)
+    if kind == "recorded":
+        if recordings is None:
+            raise ValueError('The "recorded" backend needs a recordings file (--recordings)')
+        return RecordedLLM(path=recordings, model=model)
+
+    raise ValueError(f"Unknown LLM backend {kind!r}, expected one of {BACKENDS}")
@@ -0,0 +1,170 @@
+"""
+Content-addressed cache of LLM responses.
+
+Responsibility:
+- Key responses on a hash of (model, options, final prompt, plus
+  whatever else the caller says shapes the output)
+- Persist them in SQLite so reruns skip identical LLM calls
+- Evict by age and by entry count (least recently used first)
+
+No PDF, no prompt-building logic here.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache (e.g. db/llm_cache.sqlite).
+
+    Only meaningful for deterministic generation (temperature 0), which
+    is what the extraction agent uses.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: Optional[int] = 10_000,
+        max_age_seconds: Optional[float] = 30 * 24 * 3600,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used
+                ON llm_responses (last_used_at)
+                """
+            )
+            conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        options: Dict[str, Any],
+        prompt: str,
+        **context: Any,
+    ) -> str:
+        """
+        Stable hash of everything that determines the model's output;
+        context holds anything beyond model, options and prompt (e.g. the
+        backend, or how the answer is constrained).
+        """
+        material = json.dumps(
+            {"model": model, "options": options, "prompt": prompt, **context},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    # ------------------------
+    # READ / WRITE API
+    # ------------------------
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row and self._expired(row[1], now):
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                row = None
+            elif row:
+                conn.execute(
+                    "UPDATE llm_responses SET last_used_at = ? WHERE key = ?",
+                    (now, key),
+                )
+            conn.commit()
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_responses (
+                    key, model, response, created_at, last_used_at
+                )
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, model, response, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.max_age_seconds is not None:
+            conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?",
+                (now - self.max_age_seconds,),
+            )
+
+        if self.max_entries is not None:
+            conn.execute(
+                """
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses
+                    ORDER BY last_used_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    # ------------------------
+    # STATS
+    # ------------------------
+    def __len__(self) -> int:
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
@@ -1,26 +1,192 @@
+import argparse
 from pathlib import Path
+from typing import List
 
+from config.indicators import INDICATORS
 from src.extractor import run_extraction
-from src.exporter import export_to_csv
+from src.exporter import export_to_csv, export_to_parquet
+from src.llm_backends import BACKENDS, create_backend
+from src.page_index import PageIndex, load_mapping, save_mapping
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ESG indicator extraction")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="PDF parsing processes; >1 overlaps parsing with LLM calls",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call the LLM, ignoring cached responses",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream LLM output and stop as soon as the JSON answer is complete",
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=8192,
+        help="Model context window; larger category text is chunked",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also export output/extractions.parquet (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Write results under this run ID instead of a new one",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="RUN_ID",
+        help="Resume a run (default: the latest), redoing only unfinished units",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only recompute units whose config, PDF, model or prompt changed",
+    )
+    parser.add_argument(
+        "--no-tables",
+        action="store_true",
+        help="Send every indicator to the LLM, skipping table pre-extraction",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="Only prompt with each indicator's K most relevant pages (plus neighbours)",
+    )
+    parser.add_argument(
+        "--no-retry",
+        action="store_true",
+        help="Do not re-prompt missing or low-confidence indicators with their own pages",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="ollama",
+        help="LLM server: Ollama, an OpenAI-compatible server (llama.cpp, vLLM) or recorded responses",
+    )
+    parser.add_argument(
+        "--model",
+        default="qwen2.5:7b",
+        help="Model name as the backend knows it",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Server URL (default: OLLAMA_HOST or OPENAI_BASE_URL)",
+    )
+    parser.add_argument(
+        "--small-model",
+        help="Try this (smaller) model first and escalate weak answers to --model",
+    )
+    parser.add_argument(
+        "--escalate-below",
+        type=float,
+        default=0.7,
+        help="With --small-model: escalate answers below this confidence",
+    )
+    parser.add_argument(
+        "--recordings",
+        metavar="JSON",
+        help="Recorded responses replayed by --backend recorded",
+    )
+    parser.add_argument(
+        "--locate",
+        action="append",
+        metavar="COMPANY=PDF",
+        help="Index a report and write proposed page ranges to --page-mapping, then exit",
+    )
+    parser.add_argument(
+        "--page-mapping",
+        metavar="JSON",
+        help="Use a generated page mapping (and its companies) instead of config/pages.py",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = parse_args()
+
     # Companies are IDENTIFIERS (strings), not dicts
     companies = ["AIB", "BPCE", "BBVA"]
 
     # Paths
     base_dir = Path(__file__).resolve().parent.parent
     db_path = base_dir / "db" / "extractions.sqlite"
+    page_text_db_path = base_dir / "db" / "page_text.sqlite"
+    llm_cache_path = base_dir / "db" / "llm_cache.sqlite"
+    page_index_path = base_dir / "db" / "page_index.sqlite"
+    generated_mapping_path = base_dir / "config" / "generated_pages.json"
     output_csv = base_dir / "output" / "extractions.csv"
+    reports_dir = base_dir / "output" / "reports"
 
     # Ensure folders exist
     db_path.parent.mkdir(exist_ok=True)
     output_csv.parent.mkdir(exist_ok=True)
 
+    if args.locate:
+        locate_pages(
+            args.locate,
+            str(page_index_path),
+            args.page_mapping or str(generated_mapping_path),
+        )
+        return
+
+    page_mapping = None
+    if args.page_mapping:
+        page_mapping = load_mapping(args.page_mapping)
+        companies = list(page_mapping)
+
+    run_id = args.run_id
+    if args.resume and args.resume != "latest":
+        run_id = args.resume
+
+    backend = create_backend(
+        args.backend,
+        model=args.model,
+        base_url=args.base_url,
+        stream=args.stream,
+        recordings=args.recordings,
+    )
+    small_backend = None
+    if args.small_model:
+        small_backend = create_backend(
+            args.backend,
+            model=args.small_model,
+            base_url=args.base_url,
+            stream=args.stream,
+            recordings=args.recordings,
+        )
+
     # Run extraction
     run_extraction(
         companies=companies,
         db_path=str(db_path),
+        page_text_db_path=str(page_text_db_path),
+        workers=args.workers,
+        llm_cache_path=None if args.no_llm_cache else str(llm_cache_path),
+        stream=args.stream,
+        context_tokens=args.context_tokens,
+        run_id=run_id,
+        resume=bool(args.resume),
+        incremental=args.incremental,
+        report_dir=str(reports_dir),
+        tables=not args.no_tables,
+        top_k=args.top_k,
+        page_mapping=page_mapping,
+        retry_below=None if args.no_retry else 0.5,
+        backend=backend,
+        small_backend=small_backend,
+        escalate_below=args.escalate_below,
     )
 
     # Export to CSV
@@ -29,6 +195,34 @@ def main() -> None:
         output_csv_path=str(output_csv),
     )
 
+    if args.parquet:
+        export_to_parquet(
+            db_path=str(db_path),
+            output_parquet_path=str(output_csv.with_suffix(".parquet")),
+        )
+
+
+def locate_pages(targets: List[str], page_index_path: str, mapping_path: str) -> None:
+    """
+    Proposes page ranges for COMPANY=PDF targets and merges them into
+    the generated mapping file.
+    """
+    index = PageIndex(page_index_path)
+    mapping = load_mapping(mapping_path) if Path(mapping_path).exists() else {}
+
+    for target in targets:
+        company, _, pdf_path = target.partition("=")
+        if not pdf_path:
+            raise SystemExit(f"--locate expects COMPANY=PDF, got {target!r}")
+
+        print(f"🔎 Indexing {pdf_path} for {company}...")
+        mapping[company] = index.generate_mapping(pdf_path, INDICATORS)
+        located = len(mapping[company]) - 1
+        print(f"  → Proposed ranges for {located}/{len(INDICATORS)} indicators")
+
+    save_mapping(mapping, mapping_path)
+    print(f"💾 Page mapping written to {mapping_path}")
+
 
 if __name__ == "__main__":
     main()
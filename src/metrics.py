@@ -0,0 +1,178 @@
+"""
+Per-stage timing and token instrumentation.
+
+Responsibility:
+- Collect one sample per timed operation (stage name, duration, counters)
+- Summarise samples per stage (count, total, p50, p95, max, counter sums)
+
+The pipeline activates one RunMetrics per run; instrumented code records
+into whichever instance is active, and into nothing when none is.
+
+No PDF, no LLM, no storage logic here.
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class RunMetrics:
+    """
+    Thread-safe collection of timing samples for one run.
+    """
+
+    def __init__(self):
+        self._samples: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Times the enclosed block as one sample of stage `name`.
+
+        Yields the sample's attribute dict so the block can add counters
+        (e.g. token counts) that are only known once it has run.
+        """
+        started = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, time.perf_counter() - started, **attrs)
+
+    def record(self, name: str, duration_s: float, **attrs: Any) -> None:
+        sample = {"stage": name, "duration_s": duration_s, **attrs}
+        with self._lock:
+            self._samples.append(sample)
+
+    def extend(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Adds samples collected elsewhere (e.g. in a worker process).
+        """
+        with self._lock:
+            self._samples.extend(samples)
+
+    @property
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage statistics; numeric counters are summed.
+        """
+        by_stage: Dict[str, List[Dict[str, Any]]] = {}
+        for sample in self.samples:
+            by_stage.setdefault(sample["stage"], []).append(sample)
+
+        summary = {}
+        for name, samples in sorted(by_stage.items()):
+            durations = sorted(s["duration_s"] for s in samples)
+            stats: Dict[str, Any] = {
+                "count": len(durations),
+                "total_s": sum(durations),
+                "p50_s": percentile(durations, 50),
+                "p95_s": percentile(durations, 95),
+                "max_s": durations[-1],
+            }
+
+            for sample in samples:
+                for key, value in sample.items():
+                    if key in ("stage", "duration_s") or isinstance(value, bool):
+                        continue
+                    if isinstance(value, (int, float)):
+                        stats[key] = stats.get(key, 0) + value
+
+            summary[name] = stats
+
+        return summary
+
+    def report(self, run_id: str, wall_time_s: float) -> Dict[str, Any]:
+        """
+        JSON-serialisable run report.
+        """
+        return {
+            "run_id": run_id,
+            "wall_time_s": wall_time_s,
+            "stages": self.summary(),
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+
+    rank = (len(sorted_values) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Resident set size of this process in MiB.
+
+    Reads /proc on Linux; elsewhere falls back to the peak RSS reported
+    by getrusage. Returns None where neither is available (Windows).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ------------------------
+# ACTIVE INSTANCE
+# ------------------------
+_active: Optional[RunMetrics] = None
+
+
+def current() -> Optional[RunMetrics]:
+    return _active
+
+
+@contextmanager
+def activate(metrics: RunMetrics) -> Iterator[RunMetrics]:
+    """
+    Makes `metrics` the instance instrumented code records into.
+    """
+    global _active
+
+    previous = _active
+    _active = metrics
+    try:
+        yield metrics
+    finally:
+        _active = previous
+
+
+@contextmanager
+def stage(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Times the block into the active RunMetrics, if any.
+    """
+    metrics = _active
+    if metrics is None:
+        yield attrs
+        return
+
+    with metrics.stage(name, **attrs) as sample:
+        yield sample
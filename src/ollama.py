@@ -1,36 +1,220 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
 import requests
 
+from src import metrics
+from src.json_utils import JSONObjectScanner
+from src.llm_backends import Capabilities, HTTPBackend
+
+
+T = TypeVar("T")
+
+
+def server_stats(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Token counts and timings Ollama reports on its final response.
+
+    Durations come back in nanoseconds and are converted to seconds.
+    prompt_eval_count only counts prompt tokens that were not served from
+    the model's KV cache.
+    """
+    stats: Dict[str, Any] = {}
+    for key in ("prompt_eval_count", "eval_count"):
+        if key in body:
+            stats[key] = body[key]
+    for key in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+        if key in body:
+            stats[f"{key}_s"] = body[key] / 1e9
+    return stats
+
 
-class OllamaLLM:
+class OllamaLLM(HTTPBackend):
     """
     Minimal Ollama client for local LLM inference.
+
+    Connections are kept alive in a pooled requests.Session, in-flight
+    requests are bounded by a semaphore sized to the server's
+    OLLAMA_NUM_PARALLEL, and transient failures are retried with
+    exponential backoff. A single instance is safe to share between
+    threads.
+
+    With stream=True, invoke_stream reads Ollama's NDJSON stream and
+    closes the connection (which stops generation) as soon as the JSON
+    answer is complete. Timing and token counts of the latest call made
+    by the current thread are available in last_stats, and every call is
+    recorded as an "llm_invoke" stage in the active RunMetrics.
+
+    When system is set, requests go to /api/chat as a fixed system
+    message followed by the prompt as user message; keeping the system
+    text (and any shared leading document text) identical across calls
+    lets Ollama reuse its KV cache for that prefix. keep_alive keeps the
+    model loaded between calls. Each llm_invoke sample carries Ollama's
+    prompt_eval_count (tokens actually evaluated, i.e. not served from the
+    cache). Ollama does not report the full prompt size, so these samples
+    do not feed llm_backends.cache_reuse().
     """
 
+    server_name = "Ollama"
+    capabilities = Capabilities(streaming=True, json_schema=True, prefix_cache=True)
+
     def __init__(
         self,
         model: str = "qwen2.5:7b",
-        base_url: str = "http://localhost:11434",
+        base_url: Optional[str] = None,
+        num_parallel: Optional[int] = None,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 900,  # 15 minutes
+        stream: bool = False,
+        keep_alive: Optional[str] = "30m",
     ):
-        self.model = model
-        self.url = f"{base_url}/api/generate"
+        if base_url is None:
+            base_url = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        if "://" not in base_url:
+            # OLLAMA_HOST is commonly given as host:port
+            base_url = f"http://{base_url}"
+
+        if num_parallel is None:
+            num_parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
 
-    def invoke(self, prompt: str) -> str:
-        payload = {
+        super().__init__(
+            model,
+            num_parallel=num_parallel,
+            max_retries=max_retries,
+            backoff=backoff,
+            timeout=timeout,
+            stream=stream,
+        )
+        self.base_url = base_url.rstrip("/")
+        self.url = f"{self.base_url}/api/generate"
+        self.chat_url = f"{self.base_url}/api/chat"
+        self.keep_alive = keep_alive
+
+    def _payload(
+        self,
+        prompt: str,
+        stream: bool,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
             "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0,
-                "num_predict": 800,  # limit output size
-            },
+            "stream": stream,
+            "options": self.options,
         }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if schema is not None:
+            # Ollama constrains sampling to JSON matching this schema
+            payload["format"] = schema
 
-        response = requests.post(
-            self.url,
-            json=payload,
-            timeout=900,  # 15 minutes
-        )
-        response.raise_for_status()
+        if self.system is None:
+            payload["prompt"] = prompt
+        else:
+            payload["messages"] = [
+                {"role": "system", "content": self.system},
+                {"role": "user", "content": prompt},
+            ]
+        return payload
 
-        return response.json()["response"]
+    @staticmethod
+    def _content(body: Dict[str, Any]) -> str:
+        # /api/chat nests the text in "message", /api/generate does not
+        if "message" in body:
+            return body["message"].get("content", "")
+        return body.get("response", "")
 
+    def invoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str:
+        payload = self._payload(prompt, stream=False, schema=schema)
+
+        with metrics.stage("llm_invoke") as sample:
+            started = time.perf_counter()
+            body = self._send(payload, lambda response: response.json())
+            sample["prompt_tokens_est"] = self._prompt_tokens_est(prompt)
+            sample.update(server_stats(body))
+            self._local.stats = {
+                "duration_s": time.perf_counter() - started,
+                **server_stats(body),
+            }
+
+        return self._content(body)
+
+    def invoke_stream(
+        self,
+        prompt: str,
+        expected_keys: Optional[Iterable[str]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Streams the generation and stops once the JSON answer is complete.
+
+        Generation stops when the top-level JSON object closes, or earlier
+        when every key in expected_keys already has a complete value.
+        schema, if given, is sent as Ollama's "format" to constrain the
+        output to matching JSON.
+
+        Returns:
+            The completed JSON object text when one was seen, otherwise
+            everything the model generated.
+        """
+        payload = self._payload(prompt, stream=True, schema=schema)
+
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {"time_to_first_token_s": None, "stopped_early": False}
+
+        def consume(response: requests.Response) -> str:
+            scanner = JSONObjectScanner(expected_keys)
+            generated = []
+
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    token = self._content(event)
+
+                    if token and stats["time_to_first_token_s"] is None:
+                        stats["time_to_first_token_s"] = time.perf_counter() - started
+
+                    generated.append(token)
+                    if event.get("done"):
+                        stats.update(server_stats(event))
+                    if scanner.feed(token):
+                        stats["stopped_early"] = not event.get("done", False)
+                        break
+                    if event.get("done"):
+                        break
+            finally:
+                # Dropping the connection makes Ollama stop generating
+                response.close()
+
+            return scanner.object_text or "".join(generated)
+
+        with metrics.stage("llm_invoke", streamed=True) as sample:
+            raw = self._send(payload, consume, stream=True)
+            sample["prompt_tokens_est"] = self._prompt_tokens_est(prompt)
+            sample.update({k: v for k, v in stats.items() if v is not None})
+
+        stats["duration_s"] = time.perf_counter() - started
+        self._local.stats = stats
+
+        if stats["time_to_first_token_s"] is not None:
+            print(
+                f"  ⏱ First token after {stats['time_to_first_token_s']:.1f}s, "
+                f"done after {stats['duration_s']:.1f}s"
+                + (" (stopped early)" if stats["stopped_early"] else "")
+            )
+
+        return raw
+
+    def _send(
+        self,
+        payload: Dict[str, Any],
+        consume: Callable[[requests.Response], T],
+        stream: bool = False,
+    ) -> T:
+        # Same body shape for both endpoints; "messages" means /api/chat
+        url = self.chat_url if "messages" in payload else self.url
+        return self._post(url, payload, consume, stream=stream)
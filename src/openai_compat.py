@@ -0,0 +1,277 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+
+from src import metrics
+from src.json_utils import JSONObjectScanner
+from src.llm_backends import Capabilities, HTTPBackend
+
+
+TOKENIZE_TIMEOUT_S = 30
+
+
+def openai_stats(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Token counts and timings of an OpenAI-style response, named like
+    Ollama's (see ollama.server_stats) so both feed the same metrics.
+
+    prompt_eval_count (prompt tokens not served from a cache) is only
+    set when the server says how many were cached: llama.cpp through
+    "timings", vLLM through usage.prompt_tokens_details.
+    """
+    stats: Dict[str, Any] = {}
+
+    usage = body.get("usage") or {}
+    if "completion_tokens" in usage:
+        stats["eval_count"] = usage["completion_tokens"]
+    if "prompt_tokens" in usage:
+        stats["prompt_tokens"] = usage["prompt_tokens"]
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached is not None and "prompt_tokens" in usage:
+        stats["prompt_eval_count"] = usage["prompt_tokens"] - cached
+
+    timings = body.get("timings") or {}
+    if "prompt_n" in timings:
+        stats["prompt_eval_count"] = timings["prompt_n"]
+    if "predicted_n" in timings:
+        stats["eval_count"] = timings["predicted_n"]
+    if "prompt_ms" in timings:
+        stats["prompt_eval_duration_s"] = timings["prompt_ms"] / 1e3
+    if "predicted_ms" in timings:
+        stats["eval_duration_s"] = timings["predicted_ms"] / 1e3
+
+    return stats
+
+
+class OpenAICompatibleLLM(HTTPBackend):
+    """
+    Client for local servers exposing the OpenAI chat completions API:
+    llama.cpp's llama-server, vLLM (including its CPU build) and others.
+
+    Shares the pooled session, concurrency limit and retries of
+    HTTPBackend; num_parallel should match the server's slots
+    (llama-server --parallel). options use Ollama's names so the agent
+    can treat backends alike: temperature, top_p and seed are passed
+    through, num_predict becomes max_tokens. num_ctx is a server setting
+    here (llama-server --ctx-size) and is not sent.
+
+    A schema is sent as response_format json_schema. With stream=True,
+    invoke_stream reads the server-sent events and closes the connection
+    once the JSON answer is complete. count_tokens asks the server's
+    /tokenize endpoint and falls back to the estimate when there is none.
+
+    When the server says how many prompt tokens it evaluated, llm_invoke
+    samples also carry the measured prompt size (usage.prompt_tokens, or
+    /tokenize) as kv_prompt_tokens and the tokens served from the cache
+    as kv_cached_tokens, see llm_backends.cache_reuse().
+    """
+
+    server_name = "OpenAI-compatible server"
+    capabilities = Capabilities(
+        streaming=True,
+        json_schema=True,
+        prefix_cache=True,
+        exact_token_count=True,
+    )
+
+    def __init__(
+        self,
+        model: str = "qwen2.5:7b",
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        num_parallel: Optional[int] = None,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 900,  # 15 minutes
+        stream: bool = False,
+    ):
+        if base_url is None:
+            base_url = os.environ.get("OPENAI_BASE_URL", "http://localhost:8080/v1")
+        if num_parallel is None:
+            num_parallel = int(os.environ.get("LLM_NUM_PARALLEL", "1"))
+
+        super().__init__(
+            model,
+            num_parallel=num_parallel,
+            max_retries=max_retries,
+            backoff=backoff,
+            timeout=timeout,
+            stream=stream,
+        )
+        self.base_url = base_url.rstrip("/")
+        self.url = f"{self.base_url}/chat/completions"
+        # /tokenize lives next to /v1 on both llama.cpp and vLLM
+        root = self.base_url[:-3] if self.base_url.endswith("/v1") else self.base_url
+        self.tokenize_url = f"{root}/tokenize"
+        self._can_tokenize = True
+
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _payload(
+        self,
+        prompt: str,
+        stream: bool,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        messages = []
+        if self.system is not None:
+            messages.append({"role": "system", "content": self.system})
+        messages.append({"role": "user", "content": prompt})
+
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+        }
+        for key in ("temperature", "top_p", "seed"):
+            if key in self.options:
+                payload[key] = self.options[key]
+        if "num_predict" in self.options:
+            payload["max_tokens"] = self.options["num_predict"]
+
+        if schema is not None:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "extraction", "schema": schema},
+            }
+        if stream:
+            # Final chunk carries the token counts
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    @staticmethod
+    def _content(choice: Dict[str, Any]) -> str:
+        # Streamed chunks carry "delta", complete responses "message"
+        message = choice.get("delta") or choice.get("message") or {}
+        return message.get("content") or ""
+
+    def invoke(self, prompt: str, schema: Optional[Dict[str, Any]] = None) -> str:
+        payload = self._payload(prompt, stream=False, schema=schema)
+
+        with metrics.stage("llm_invoke") as sample:
+            started = time.perf_counter()
+            body = self._post(self.url, payload, lambda response: response.json())
+            stats = openai_stats(body)
+            stats.update(self._kv_cache_stats(prompt, stats))
+            sample["prompt_tokens_est"] = self._prompt_tokens_est(prompt)
+            sample.update(stats)
+            self._local.stats = {"duration_s": time.perf_counter() - started, **stats}
+
+        choices = body.get("choices") or [{}]
+        return self._content(choices[0])
+
+    def invoke_stream(
+        self,
+        prompt: str,
+        expected_keys: Optional[Iterable[str]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Streams the generation and stops once the JSON answer is complete,
+        like OllamaLLM.invoke_stream.
+        """
+        payload = self._payload(prompt, stream=True, schema=schema)
+
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {"time_to_first_token_s": None, "stopped_early": False}
+
+        def consume(response: requests.Response) -> str:
+            scanner = JSONObjectScanner(expected_keys)
+            generated = []
+
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[len(b"data:"):].strip()
+                    if data == b"[DONE]":
+                        break
+
+                    event = json.loads(data)
+                    stats.update(openai_stats(event))
+                    choices = event.get("choices") or []
+                    token = self._content(choices[0]) if choices else ""
+
+                    if token and stats["time_to_first_token_s"] is None:
+                        stats["time_to_first_token_s"] = time.perf_counter() - started
+
+                    generated.append(token)
+                    if scanner.feed(token):
+                        stats["stopped_early"] = not (choices and choices[0].get("finish_reason"))
+                        break
+            finally:
+                # Dropping the connection makes the server stop generating
+                response.close()
+
+            return scanner.object_text or "".join(generated)
+
+        with metrics.stage("llm_invoke", streamed=True) as sample:
+            raw = self._post(self.url, payload, consume, stream=True)
+            stats.update(self._kv_cache_stats(prompt, stats))
+            sample["prompt_tokens_est"] = self._prompt_tokens_est(prompt)
+            sample.update({k: v for k, v in stats.items() if v is not None})
+
+        stats["duration_s"] = time.perf_counter() - started
+        self._local.stats = stats
+
+        return raw
+
+    def _kv_cache_stats(self, prompt: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        kv_prompt_tokens and kv_cached_tokens of one call, or nothing when
+        the evaluated tokens or the prompt size are unknown. Without usage
+        the prompt is tokenized; that count leaves out the chat template,
+        so the cached share comes out slightly low rather than high.
+        """
+        evaluated = stats.get("prompt_eval_count")
+        if evaluated is None:
+            return {}
+
+        prompt_tokens = stats.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = self._tokenize((self.system or "") + prompt)
+            if prompt_tokens is None:
+                return {}
+
+        return {
+            "kv_prompt_tokens": prompt_tokens,
+            "kv_cached_tokens": max(prompt_tokens - evaluated, 0),
+        }
+
+    def count_tokens(self, text: str) -> int:
+        count = self._tokenize(text)
+        return super().count_tokens(text) if count is None else count
+
+    def _tokenize(self, text: str) -> Optional[int]:
+        """
+        Exact token count from the server's /tokenize endpoint, None when
+        it cannot be had.
+
+        Tokenizing is cheap, so the request neither waits for a generation
+        slot nor is retried; a server without the endpoint is not asked
+        again.
+        """
+        if self._can_tokenize:
+            try:
+                response = self.session.post(
+                    self.tokenize_url,
+                    # llama.cpp reads "content", vLLM "model" and "prompt"
+                    json={"model": self.model, "content": text, "prompt": text},
+                    timeout=TOKENIZE_TIMEOUT_S,
+                )
+                response.raise_for_status()
+                body = response.json()
+                if "count" in body:
+                    return body["count"]
+                return len(body["tokens"])
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            except (requests.RequestException, ValueError, KeyError):
+                # No tokenizer endpoint: don't ask again
+                self._can_tokenize = False
+        return None
@@ -0,0 +1,155 @@
+"""
+Page-level text cache for PDF extraction.
+
+Responsibility:
+- Extract each physical page at most once per run
+- Key cached text on (PDF content hash, page number, extraction mode)
+- Optionally read through to a persistent PageTextStore across runs
+
+No LLM logic here.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.pdf_reader import READER_VERSION, DocumentPool, extract_pages
+from src.text_store import PageTextStore
+from src.utils import file_sha256
+
+
+# (document hash, 1-indexed page number, extraction mode)
+PageKey = Tuple[str, int, str]
+
+
+class PageTextCache:
+    """
+    In-memory page text cache shared by every indicator lookup in a run.
+
+    Pages that fall outside the document are remembered as None so they
+    do not trigger another PDF open on the next lookup.
+
+    When a PageTextStore is given, pages missing from memory are looked up
+    there before the PDF is opened, and newly extracted pages are written
+    back so the next run can skip parsing entirely.
+
+    When a DocumentPool is given, extraction reuses its open handles
+    instead of reopening the PDF for every lookup.
+    """
+
+    def __init__(
+        self,
+        store: Optional[PageTextStore] = None,
+        pool: Optional[DocumentPool] = None,
+    ):
+        self.store = store
+        self.pool = pool
+        self._pages: Dict[PageKey, Optional[str]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+
+    def document_hash(self, pdf_path: str) -> str:
+        """
+        Content hash of a PDF, computed once per path.
+        """
+        with self._lock:
+            doc_hash = self._hashes.get(pdf_path)
+
+        if doc_hash is None:
+            if self.store is not None:
+                doc_hash = self.store.document_hash(pdf_path)
+            else:
+                doc_hash = file_sha256(pdf_path)
+            with self._lock:
+                self._hashes[pdf_path] = doc_hash
+
+        return doc_hash
+
+    def get_pages(
+        self,
+        pdf_path: str,
+        page_numbers: Iterable[int],
+        mode: str = "text",
+    ) -> Dict[int, str]:
+        """
+        Returns text for the requested pages, extracting only uncached ones.
+
+        Returns:
+            Dict[page_number -> page_text], in ascending page order.
+            Pages outside the document are omitted.
+        """
+        doc_hash = self.document_hash(pdf_path)
+        wanted = sorted(set(page_numbers))
+
+        with self._lock:
+            missing = [p for p in wanted if (doc_hash, p, mode) not in self._pages]
+            self.hits += len(wanted) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = self._load_missing(pdf_path, doc_hash, missing, mode)
+            with self._lock:
+                for page_number, text in loaded.items():
+                    self._pages[(doc_hash, page_number, mode)] = text
+
+        with self._lock:
+            cached = {p: self._pages[(doc_hash, p, mode)] for p in wanted}
+
+        return {p: text for p, text in cached.items() if text is not None}
+
+    def _load_missing(
+        self,
+        pdf_path: str,
+        doc_hash: str,
+        missing: List[int],
+        mode: str,
+    ) -> Dict[int, Optional[str]]:
+        """
+        Loads pages from the persistent store, parsing the PDF only for
+        pages the store does not have.
+        """
+        loaded: Dict[int, Optional[str]] = {}
+
+        if self.store is not None:
+            loaded.update(
+                self.store.get_pages(doc_hash, READER_VERSION, mode, missing)
+            )
+            with self._lock:
+                self.store_hits += len(loaded)
+
+        to_extract = [p for p in missing if p not in loaded]
+        if to_extract:
+            extracted = extract_pages(
+                pdf_path, to_extract, mode=mode, pool=self.pool
+            )
+            parsed = {p: extracted.get(p) for p in to_extract}
+            loaded.update(parsed)
+
+            if self.store is not None:
+                self.store.put_pages(doc_hash, READER_VERSION, mode, parsed)
+
+        return loaded
+
+    def read_pages(
+        self,
+        pdf_path: str,
+        start_page: int,
+        end_page: int,
+        mode: str = "text",
+    ) -> str:
+        """
+        Cached equivalent of read_pdf_pages (1-indexed, inclusive range).
+        """
+        pages = self.get_pages(pdf_path, range(start_page, end_page + 1), mode=mode)
+        return "\n".join(pages.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._hashes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.store_hits = 0
@@ -0,0 +1,302 @@
+"""
+Whole-document inverted page index for locating indicators.
+
+Responsibility:
+- Index every page of a PDF in one pass: word terms, word bigrams and
+  number+unit tokens (e.g. "12,345 tCO2e" -> "#unit:tco2e")
+- Persist postings in a SQLite sidecar keyed on the PDF's content hash
+- Score pages per indicator (BM25) and propose page ranges
+- Read and write generated mappings in the PAGE_MAPPING shape
+
+No LLM logic here.
+"""
+
+import json
+import math
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import metrics
+from src.page_ranker import B, K1, STOPWORDS, query_terms, tokenize
+from src.pdf_reader import READER_VERSION, iter_pdf_pages
+from src.utils import file_sha256
+
+
+# Postings are keyed on this, so an index built by older rules is rebuilt
+INDEX_VERSION = f"{READER_VERSION}/index-1"
+
+# Query weights: exact phrases and figures in the expected unit say more
+# about a page than single words
+PHRASE_WEIGHT = 2.0
+UNIT_WEIGHT = 2.0
+
+_FIGURE_UNIT_RE = re.compile(r"\d[\d.,]*\s*(%|€|[a-z][a-z0-9]*)")
+
+
+def _bigrams(tokens: List[str]) -> List[str]:
+    # Bigrams with a stopword carry little signal and double the index
+    return [
+        f"{a} {b}"
+        for a, b in zip(tokens, tokens[1:])
+        if a not in STOPWORDS and b not in STOPWORDS
+    ]
+
+
+def page_terms(text: str) -> Counter:
+    """
+    Term frequencies of one page: words, word bigrams and unit tokens.
+    """
+    tokens = tokenize(text)
+    terms = Counter(tokens)
+    terms.update(_bigrams(tokens))
+    terms.update(f"#unit:{unit}" for unit in _FIGURE_UNIT_RE.findall(text.lower()))
+    return terms
+
+
+def indicator_terms(indicator: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Weighted query terms for an indicator.
+    """
+    weights = {term: 1.0 for term in query_terms(indicator)}
+
+    for label in [indicator["name"], *indicator.get("synonyms", [])]:
+        for bigram in _bigrams(tokenize(label)):
+            weights[bigram] = PHRASE_WEIGHT
+
+    for token in tokenize(indicator.get("expected_unit") or ""):
+        if token not in ("or", "per") and not token.isdigit():
+            weights[f"#unit:{token}"] = UNIT_WEIGHT
+
+    return weights
+
+
+class PageIndex:
+    """
+    SQLite sidecar (e.g. db/page_index.sqlite) holding per-page postings.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS indexed_documents (
+                    file_hash TEXT NOT NULL,
+                    index_version TEXT NOT NULL,
+                    pdf_path TEXT NOT NULL,
+                    pages INTEGER NOT NULL,
+                    indexed_at TEXT NOT NULL,
+                    PRIMARY KEY (file_hash, index_version)
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page_lengths (
+                    file_hash TEXT NOT NULL,
+                    index_version TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    PRIMARY KEY (file_hash, index_version, page)
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS postings (
+                    file_hash TEXT NOT NULL,
+                    index_version TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (file_hash, index_version, term, page)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+
+    # ------------------------
+    # INDEXING
+    # ------------------------
+    def index_document(self, pdf_path: str) -> str:
+        """
+        Indexes every page of the PDF in a single pass, unless this
+        content was already indexed. Returns the PDF's content hash.
+        """
+        file_hash = file_sha256(pdf_path)
+
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                """
+                SELECT 1 FROM indexed_documents
+                WHERE file_hash = ? AND index_version = ?
+                """,
+                (file_hash, INDEX_VERSION),
+            ).fetchone()
+            if row:
+                return file_hash
+
+            pages = 0
+            with metrics.stage("page_index") as sample:
+                for page, text in iter_pdf_pages(pdf_path):
+                    terms = page_terms(text)
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (file_hash, INDEX_VERSION, term, page, tf)
+                            for term, tf in terms.items()
+                        ],
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO page_lengths VALUES (?, ?, ?, ?)",
+                        (file_hash, INDEX_VERSION, page, len(tokenize(text))),
+                    )
+                    pages = page
+                sample["pages"] = pages
+
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_documents VALUES (?, ?, ?, ?, ?)",
+                (
+                    file_hash,
+                    INDEX_VERSION,
+                    str(pdf_path),
+                    pages,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            conn.commit()
+
+        return file_hash
+
+    # ------------------------
+    # LOOKUP
+    # ------------------------
+    def page_count(self, file_hash: str) -> int:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                """
+                SELECT pages FROM indexed_documents
+                WHERE file_hash = ? AND index_version = ?
+                """,
+                (file_hash, INDEX_VERSION),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def score_pages(
+        self,
+        file_hash: str,
+        indicator: Dict[str, Any],
+    ) -> Dict[int, float]:
+        """
+        Weighted BM25 score of every page that matches any query term.
+        """
+        weights = indicator_terms(indicator)
+        placeholders = ",".join("?" * len(weights))
+
+        with sqlite3.connect(self.db_path) as conn:
+            lengths = dict(
+                conn.execute(
+                    """
+                    SELECT page, length FROM page_lengths
+                    WHERE file_hash = ? AND index_version = ?
+                    """,
+                    (file_hash, INDEX_VERSION),
+                ).fetchall()
+            )
+            postings = conn.execute(
+                f"""
+                SELECT term, page, tf FROM postings
+                WHERE file_hash = ? AND index_version = ?
+                  AND term IN ({placeholders})
+                """,
+                (file_hash, INDEX_VERSION, *weights),
+            ).fetchall()
+
+        if not lengths:
+            return {}
+
+        total_pages = len(lengths)
+        avg_length = sum(lengths.values()) / total_pages or 1.0
+        doc_freq = Counter(term for term, _, _ in postings)
+
+        scores: Dict[int, float] = {}
+        for term, page, tf in postings:
+            idf = math.log(1 + (total_pages - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            length_norm = K1 * (1 - B + B * lengths.get(page, 0) / avg_length)
+            scores[page] = scores.get(page, 0.0) + (
+                weights[term] * idf * tf * (K1 + 1) / (tf + length_norm)
+            )
+        return scores
+
+    def propose_range(
+        self,
+        file_hash: str,
+        indicator: Dict[str, Any],
+        window: int = 2,
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Page range centred on the best-scoring page, `window` pages on
+        each side; None when no page matches at all.
+        """
+        scores = self.score_pages(file_hash, indicator)
+        if not scores:
+            return None
+
+        best = min(scores, key=lambda page: (-scores[page], page))
+        last_page = self.page_count(file_hash) or best
+        return max(best - window, 1), min(best + window, last_page)
+
+    def generate_mapping(
+        self,
+        pdf_path: str,
+        indicators: List[Dict[str, Any]],
+        window: int = 2,
+    ) -> Dict[str, Any]:
+        """
+        Indexes the PDF if needed and proposes a range per indicator.
+
+        Returns a company entry in the PAGE_MAPPING shape; indicators
+        that match nowhere are left out (and so reported as not found).
+        """
+        file_hash = self.index_document(pdf_path)
+
+        mapping: Dict[str, Any] = {"__pdf_path__": str(pdf_path)}
+        for indicator in indicators:
+            page_range = self.propose_range(file_hash, indicator, window)
+            if page_range:
+                mapping[indicator["name"]] = page_range
+        return mapping
+
+
+# ------------------------
+# GENERATED MAPPINGS
+# ------------------------
+def save_mapping(mapping: Dict[str, Dict[str, Any]], path: str) -> None:
+    """
+    Writes {company: company_pages} as JSON (ranges become lists).
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(mapping, indent=2), encoding="utf-8")
+
+
+def load_mapping(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads a mapping written by save_mapping, with ranges as tuples like
+    in config/pages.py.
+    """
+    raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {
+        company: {
+            key: value if key == "__pdf_path__" else tuple(value)
+            for key, value in company_pages.items()
+        }
+        for company, company_pages in raw.items()
+    }
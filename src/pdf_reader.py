@@ -1,10 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
 import fitz  # PyMuPDF
 
+from src import metrics
+
+
+# Bump the suffix whenever extraction logic changes the text produced.
+# Persisted page text is keyed on this, so stale text is never reused.
+READER_VERSION = f"pymupdf-{fitz.VersionBind}-1"
+
+
+class DocumentPool:
+    """
+    LRU pool of open PyMuPDF documents.
+
+    Opening a PDF parses its xref table, which is expensive for large
+    reports. The pool keeps up to max_open handles alive and reopens a
+    document only when its file changed on disk or it was evicted.
+
+    fitz.Document is not thread-safe, so the pool lock serialises opening
+    and evicting handles, and readers take it around each page they read
+    (see _open_document). It is not held while a handle is merely lent
+    out, so a paused or abandoned page iterator does not block other
+    threads. Documents currently in use are never evicted.
+    """
+
+    def __init__(self, max_open: int = 4):
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+
+        self.max_open = max_open
+        self._docs: "OrderedDict[str, Tuple[fitz.Document, Tuple[int, int]]]" = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        self.opens = 0
+
+    @contextmanager
+    def document(self, pdf_path: str) -> Iterator[fitz.Document]:
+        """
+        Yields an open handle for pdf_path. The handle is kept open for
+        the duration but the pool lock is not held: take it around every
+        use of the handle.
+        """
+        key = os.path.abspath(pdf_path)
+
+        with self._lock:
+            doc = self._acquire(key)
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield doc
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+                self._evict_overflow()
+
+    def _acquire(self, key: str) -> fitz.Document:
+        stat = os.stat(key)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        entry = self._docs.get(key)
+        if entry is not None:
+            doc, cached_signature = entry
+            # A changed file is only reopened once nobody is reading it
+            if cached_signature == signature or key in self._in_use:
+                self._docs.move_to_end(key)
+                return doc
+            self.evict(key)
+
+        doc = fitz.open(key)
+        self.opens += 1
+        self._docs[key] = (doc, signature)
+        self._docs.move_to_end(key)
+        return doc
+
+    def _evict_overflow(self) -> None:
+        for key in list(self._docs):
+            if len(self._docs) <= self.max_open:
+                break
+            if key not in self._in_use:
+                self.evict(key)
+
+    def evict(self, pdf_path: str) -> None:
+        """
+        Closes and forgets the handle for pdf_path, if any.
+        """
+        key = os.path.abspath(pdf_path)
+        with self._lock:
+            entry = self._docs.pop(key, None)
+            if entry is not None:
+                entry[0].close()
+
+    def close(self) -> None:
+        """
+        Closes every pooled handle.
+        """
+        with self._lock:
+            for key in list(self._docs):
+                self.evict(key)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __enter__(self) -> "DocumentPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@contextmanager
+def _open_document(
+    pdf_path: str,
+    pool: Optional[DocumentPool],
+) -> Iterator[Tuple[fitz.Document, ContextManager]]:
+    """
+    Yields a handle and the lock to hold while using it: the pool's for
+    a pooled handle, none for a private one.
+    """
+    if pool is None:
+        with fitz.open(pdf_path) as doc:
+            yield doc, nullcontext()
+    else:
+        with pool.document(pdf_path) as doc:
+            yield doc, pool._lock
+
 
 def read_pdf_pages(
     pdf_path: str,
     start_page: int,
     end_page: int,
+    pool: Optional[DocumentPool] = None,
 ) -> str:
     """
     Reads text from a PDF between start_page and end_page (inclusive).
@@ -13,18 +145,129 @@ def read_pdf_pages(
     PyMuPDF uses 0-indexed pages internally.
     """
 
-    text_chunks = []
+    with metrics.stage("pdf_read") as sample:
+        text_chunks = [
+            page_text
+            for _, page_text in iter_pdf_pages(pdf_path, start_page, end_page, pool=pool)
+        ]
+        sample["pages"] = len(text_chunks)
+
+    return "\n".join(text_chunks)
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    start_page: int = 1,
+    end_page: Optional[int] = None,
+    mode: str = "text",
+    pool: Optional[DocumentPool] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Streams (page_number, page_text) pairs from one open document.
+
+    Pages are 1-indexed and the range is inclusive. end_page defaults to
+    the last page, so a full-document scan is a single open and a single
+    pass.
+    """
 
-    with fitz.open(pdf_path) as doc:
-        total_pages = len(doc)
+    with _open_document(pdf_path, pool) as (doc, lock):
+        with lock:
+            total_pages = len(doc)
 
         # Convert to 0-based index safely
         start_idx = max(start_page - 1, 0)
-        end_idx = min(end_page, total_pages)
+        end_idx = total_pages if end_page is None else min(end_page, total_pages)
 
-        for page_number in range(start_idx, end_idx):
-            page = doc[page_number]
-            page_text = page.get_text("text")
-            text_chunks.append(page_text)
+        for page_index in range(start_idx, end_idx):
+            # Locked per page, never across the yield
+            with lock:
+                page_text = doc[page_index].get_text(mode)
+            yield page_index + 1, page_text
 
-    return "\n".join(text_chunks)
+
+def extract_pages(
+    pdf_path: str,
+    page_numbers: Iterable[int],
+    mode: str = "text",
+    pool: Optional[DocumentPool] = None,
+) -> Dict[int, str]:
+    """
+    Extracts the given 1-indexed pages from a PDF with a single open.
+
+    Pages outside the document are silently skipped, mirroring the
+    clamping done by read_pdf_pages.
+
+    Returns:
+        Dict[page_number -> page_text]
+    """
+
+    pages: Dict[int, str] = {}
+
+    with metrics.stage("pdf_read") as sample, _open_document(pdf_path, pool) as (doc, lock):
+        with lock:
+            total_pages = len(doc)
+
+        for page_number in sorted(set(page_numbers)):
+            if page_number < 1 or page_number > total_pages:
+                continue
+            with lock:
+                pages[page_number] = doc[page_number - 1].get_text(mode)
+
+        sample["pages"] = len(pages)
+
+    return pages
+
+
+# A table is a list of rows; a row a list of cell texts (None when empty).
+Table = List[List[Optional[str]]]
+
+
+def extract_tables(
+    pdf_path: str,
+    page_numbers: Iterable[int],
+    pool: Optional[DocumentPool] = None,
+    keywords: Optional[Iterable[str]] = None,
+) -> Dict[int, List[Table]]:
+    """
+    Detects tables on the given 1-indexed pages with PyMuPDF's
+    page.find_tables(), using a single open.
+
+    Table detection costs a few hundred milliseconds per page, so pages
+    are skipped when they have no vector drawings (the default "lines"
+    strategy only finds ruled tables) or, if keywords are given, when
+    their text contains none of them (case-insensitive).
+
+    Pages outside the document are skipped, like in extract_pages.
+
+    Returns:
+        Dict[page_number -> tables found on that page]
+    """
+
+    tables: Dict[int, List[Table]] = {}
+    needles = [" ".join(k.lower().split()) for k in keywords] if keywords else None
+
+    with metrics.stage("pdf_tables") as sample, _open_document(pdf_path, pool) as (doc, lock):
+        with lock:
+            total_pages = len(doc)
+        scanned = 0
+
+        for page_number in sorted(set(page_numbers)):
+            if page_number < 1 or page_number > total_pages:
+                continue
+            with lock:
+                page = doc[page_number - 1]
+
+                if needles is not None:
+                    text = " ".join(page.get_text().lower().split())
+                    if not any(needle in text for needle in needles):
+                        continue
+                if not page.get_drawings():
+                    continue
+
+                scanned += 1
+                tables[page_number] = [table.extract() for table in page.find_tables().tables]
+
+        sample["pages"] = scanned
+        sample["tables"] = sum(len(found) for found in tables.values())
+
+    return tables
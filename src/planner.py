@@ -0,0 +1,72 @@
+"""
+Page planning for category prompts.
+
+Responsibility:
+- Merge the page ranges of every indicator in a category
+- Deduplicate pages so each one appears once in the prompt
+- Render page text with explicit page markers
+
+No LLM, no PDF logic here.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+
+PAGE_MARKER = "--- Page {page} ---"
+
+
+class PagePlan(NamedTuple):
+    """
+    Unique, sorted pages for one category.
+
+    requested_pages counts pages as the indicator ranges list them
+    (overlaps included) so the deduplication saving can be reported.
+    """
+
+    pages: List[int]
+    requested_pages: int
+
+    @property
+    def duplicate_pages(self) -> int:
+        return self.requested_pages - len(self.pages)
+
+
+def merge_page_ranges(ranges: Iterable[Tuple[int, int]]) -> List[int]:
+    """
+    Returns the sorted union of inclusive, 1-indexed page ranges.
+    """
+    pages = set()
+    for start_page, end_page in ranges:
+        pages.update(range(start_page, end_page + 1))
+    return sorted(pages)
+
+
+def plan_category_pages(
+    company_pages: Dict[str, Any],
+    indicators: List[Dict[str, Any]],
+) -> PagePlan:
+    """
+    Builds the page plan for a category from the company's page mapping.
+
+    Indicators without a configured page range are ignored.
+    """
+    ranges = [
+        company_pages[indicator["name"]]
+        for indicator in indicators
+        if company_pages.get(indicator["name"])
+    ]
+
+    return PagePlan(
+        pages=merge_page_ranges(ranges),
+        requested_pages=sum(end - start + 1 for start, end in ranges),
+    )
+
+
+def build_page_text(page_texts: Dict[int, str]) -> str:
+    """
+    Joins page texts in page order, each preceded by a page marker.
+    """
+    return "\n".join(
+        f"{PAGE_MARKER.format(page=page)}\n{page_texts[page]}"
+        for page in sorted(page_texts)
+    )
@@ -0,0 +1,180 @@
+"""
+Small-model-first routing of extraction requests.
+
+Responsibility:
+- Decide per indicator whether a small model's answer, merged across
+  chunks, can be kept or must be escalated (low confidence, no value,
+  schema or unit errors)
+- Run the escalated indicators on the larger model and combine answers
+- Tag every routed answer with the model that produced it, so the
+  extractor can persist routing decisions (ExtractionStore routing table)
+
+No PDF, no storage logic here.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from src import metrics
+from src.chunker import merge_results
+from src.llm_agent import LLMExtractionAgent
+from src.llm_backends import LLMBackend
+from src.llm_cache import LLMResponseCache
+from src.units import unit_matches
+
+
+# Part of unit fingerprints: bump when escalation rules change results
+ROUTER_VERSION = "cascade-2"
+
+# Escalated answers that are discarded rather than compared with the
+# large model's
+INVALID_REASONS = ("missing", "schema", "unit")
+
+
+def escalation_reason(
+    indicator: Dict[str, Any],
+    result: Any,
+    escalate_below: float,
+) -> Optional[str]:
+    """
+    Why a small model's answer should go to the larger model, or None
+    when it can be kept: "missing", "schema", "unit", "not_found" or
+    "low_confidence".
+    """
+    if not isinstance(result, dict):
+        return "missing"
+
+    value = result.get("value")
+    confidence = result.get("confidence", 0.0)
+    if (
+        isinstance(value, bool)
+        or (value is not None and not isinstance(value, (int, float)))
+        or isinstance(confidence, bool)
+        or not isinstance(confidence, (int, float))
+    ):
+        return "schema"
+    if value is not None and not unit_matches(indicator.get("expected_unit"), result.get("unit")):
+        return "unit"
+    if value is None:
+        return "not_found"
+    if confidence < escalate_below:
+        return "low_confidence"
+    return None
+
+
+class CascadeExtractionAgent(LLMExtractionAgent):
+    """
+    Extraction agent that tries a small, fast model first.
+
+    The text goes to small first (chunked and merged as usual); indicators
+    whose merged answer has no value, a confidence below escalate_below,
+    or a schema or unit error are sent again, with the same text, to
+    large (a plain LLMExtractionAgent) in one extract_many call.
+    Answers with schema or unit errors are replaced by the large model's;
+    otherwise the better of both answers is kept (see merge_results).
+
+    Each returned answer carries a "route" dict: the model it came from
+    and the escalation reason (None unless large was asked, which may
+    still leave the small model's answer). Every call is recorded as an
+    "llm_route" stage with the number of indicators and how many were
+    escalated.
+    """
+
+    def __init__(
+        self,
+        small: LLMBackend,
+        large: Optional[LLMBackend] = None,
+        escalate_below: float = 0.7,
+        cache: Optional[LLMResponseCache] = None,
+        stream: bool = False,
+        context_tokens: int = 8192,
+    ):
+        super().__init__(
+            cache=cache,
+            stream=stream,
+            context_tokens=context_tokens,
+            backend=small,
+        )
+        self.large = LLMExtractionAgent(
+            cache=cache,
+            stream=stream,
+            context_tokens=context_tokens,
+            backend=large,
+        )
+        self.escalate_below = escalate_below
+
+    def extract_many(
+        self,
+        indicators: List[Dict[str, Any]],
+        text: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        results = super().extract_many(indicators, text)
+
+        # Decided on the merged answers: a figure found in one chunk is
+        # not escalated because the other chunks don't contain it
+        reasons = {
+            indicator["name"]: escalation_reason(
+                indicator, results.get(indicator["name"]), self.escalate_below
+            )
+            for indicator in indicators
+        }
+        escalated = [i for i in indicators if reasons[i["name"]] is not None]
+
+        large_results: Dict[str, Dict[str, Any]] = {}
+        with metrics.stage("llm_route") as sample:
+            sample["indicators"] = len(indicators)
+            sample["escalated"] = len(escalated)
+            if escalated:
+                large_results = self.large.extract_many(escalated, text)
+
+        routed = {}
+        for indicator in indicators:
+            name = indicator["name"]
+            reason = reasons[name]
+            if reason is None:
+                routed[name] = {
+                    **results[name],
+                    "route": {"model": self.model.model, "reason": None},
+                }
+                continue
+
+            candidates = [large_results]
+            if reason not in INVALID_REASONS:
+                # Both answers are well-formed; keep the better one
+                candidates.insert(0, {name: results[name]})
+
+            best = merge_results(candidates).get(name)
+            if best is None:
+                best = {
+                    "value": None,
+                    "unit": indicator.get("expected_unit"),
+                    "confidence": 0.0,
+                    "source_page": None,
+                    "notes": "Not found after escalation",
+                }
+            # The reason is kept even when the small answer wins: the
+            # large model was still called for it
+            model = self.model.model if best is results.get(name) else self.large.model.model
+            routed[name] = {**best, "route": {"model": model, "reason": reason}}
+
+        return routed
+
+    def unit_fingerprint(
+        self,
+        indicators: List[Dict[str, Any]],
+        company_pages: Dict[str, Any],
+        pdf_hash: str,
+        stages: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        return super().unit_fingerprint(
+            indicators,
+            company_pages,
+            pdf_hash,
+            stages={
+                **(stages or {}),
+                "routing": {
+                    "version": ROUTER_VERSION,
+                    "large": self.large.unit_fingerprint(indicators, company_pages, pdf_hash),
+                    "escalate_below": self.escalate_below,
+                },
+            },
+        )
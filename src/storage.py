@@ -1,23 +1,113 @@
+import json
 import sqlite3
-from typing import Optional, List, Dict, Any
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+from src import metrics
+
+
+# Bumped whenever _migrate learns a new step (stored in PRAGMA user_version)
+SCHEMA_VERSION = 5
+
+# Columns written by the pipeline, in INSERT order
+COLUMNS = (
+    "run_id",
+    "company",
+    "indicator_name",
+    "category",
+    "esrs",
+    "value",
+    "unit",
+    "confidence",
+    "source_page",
+    "source_section",
+    "notes",
+    "extracted_at",
+)
+
+KEY_COLUMNS = ("run_id", "company", "indicator_name")
+
+# Re-writing an indicator within the same run replaces the earlier row
+UPSERT_SQL = f"""
+    INSERT INTO extractions ({", ".join(COLUMNS)})
+    VALUES ({", ".join("?" * len(COLUMNS))})
+    ON CONFLICT ({", ".join(KEY_COLUMNS)}) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in COLUMNS if c not in KEY_COLUMNS)}
+"""
+
+
+def _utc_now(timespec: str = "seconds") -> str:
+    return datetime.now(timezone.utc).isoformat(timespec=timespec)
+
+
+def _latest_rows_query(where: str = "") -> str:
+    """
+    Rows that were written last per (company, indicator), among the rows
+    matching where. An upsert keeps a row's id but refreshes its
+    extracted_at, so a resumed older run wins over a newer one if it
+    wrote later; rows from before extracted_at existed fall back to id.
+    """
+    return f"""
+        SELECT * FROM extractions
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY company, indicator_name
+                    ORDER BY extracted_at DESC, id DESC
+                ) AS recency
+                FROM extractions {where}
+            )
+            WHERE recency = 1
+        )
+        ORDER BY id
+    """
+
+
+def new_run_id() -> str:
+    """
+    Sortable, unique run identifier, e.g. 20250101T120000Z-1a2b3c4d.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"{timestamp}-{uuid.uuid4().hex[:8]}"
 
 
 class ExtractionStore:
     """
     SQLite-backed storage for ESG indicator extractions.
+
+    Connections use WAL journaling with synchronous=NORMAL, so a commit
+    does not wait for a full fsync. Bulk writes go through insert_many
+    or writer(), which share one connection and one transaction.
+
+    Every row belongs to a run. Rows are unique per
+    (run_id, company, indicator_name), so re-running a run is idempotent,
+    and fetch_latest_as_dicts returns the most recently written value per
+    indicator across runs. Rows written without an explicit run_id use this
+    store's run_id.
     """
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, run_id: Optional[str] = None):
         self.db_path = db_path
+        self.run_id = run_id or new_run_id()
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
     def _init_db(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS extractions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
                     company TEXT NOT NULL,
                     indicator_name TEXT NOT NULL,
                     category TEXT,
@@ -27,12 +117,399 @@ class ExtractionStore:
                     confidence REAL,
                     source_page INTEGER,
                     source_section TEXT,
-                    notes TEXT
+                    notes TEXT,
+                    extracted_at TEXT
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    started_at TEXT,
+                    finished_at TEXT
                 )
                 """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    run_id TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    prompt_hash TEXT,
+                    fingerprint TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    duration_s REAL,
+                    error TEXT,
+                    PRIMARY KEY (run_id, company, category)
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS run_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    duration_s REAL NOT NULL,
+                    attrs TEXT
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS routing (
+                    run_id TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    indicator_name TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    escalated INTEGER NOT NULL,
+                    reason TEXT,
+                    confidence REAL,
+                    PRIMARY KEY (run_id, company, indicator_name)
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_run_metrics_run_stage
+                ON run_metrics (run_id, stage)
+                """
+            )
+            self._migrate(conn)
+            cursor.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_extractions_run_company_indicator
+                ON extractions (run_id, company, indicator_name)
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_extractions_company_indicator_written
+                ON extractions (company, indicator_name, extracted_at)
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_extractions_indicator
+                ON extractions (indicator_name)
+                """
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
 
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """
+        Upgrades databases created before run IDs existed.
+
+        Legacy rows were appended once per run, so the k-th row for a
+        (company, indicator) pair came from the k-th run; it is assigned
+        run_id "legacy-k". This keeps the full history and makes the new
+        unique key hold.
+
+        Tables added later (routing in version 4) need no step here:
+        _init_db creates them when missing. Rows from before version 5
+        have no extracted_at and rank by id among themselves.
+        """
+        checkpoint_columns = {row[1] for row in conn.execute("PRAGMA table_info(checkpoints)")}
+        if "fingerprint" not in checkpoint_columns:
+            conn.execute("ALTER TABLE checkpoints ADD COLUMN fingerprint TEXT")
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(extractions)")}
+        if "extracted_at" not in columns:
+            conn.execute("ALTER TABLE extractions ADD COLUMN extracted_at TEXT")
+            # Superseded by idx_extractions_company_indicator_written
+            conn.execute("DROP INDEX IF EXISTS idx_extractions_company_indicator")
+        if "run_id" in columns:
+            return
+
+        conn.execute("ALTER TABLE extractions ADD COLUMN run_id TEXT")
+        conn.execute(
+            """
+            UPDATE extractions
+            SET run_id = 'legacy-' || (
+                SELECT COUNT(*) FROM extractions AS earlier
+                WHERE earlier.company = extractions.company
+                AND earlier.indicator_name = extractions.indicator_name
+                AND earlier.id <= extractions.id
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO runs (run_id)
+            SELECT DISTINCT run_id FROM extractions
+            """
+        )
+
+    # ------------------------
+    # RUN API
+    # ------------------------
+    def start_run(self) -> str:
+        """
+        Registers this store's run; calling it again for the same run
+        (e.g. when resuming) keeps the original start time.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                (self.run_id, _utc_now()),
+            )
+        return self.run_id
+
+    def finish_run(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?",
+                (_utc_now(), self.run_id),
+            )
+
+    def latest_run_id(self) -> Optional[str]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                """
+                SELECT run_id FROM runs
+                WHERE started_at IS NOT NULL
+                ORDER BY started_at DESC, rowid DESC
+                LIMIT 1
+                """
+            ).fetchone()
+        return row[0] if row else None
+
+    # ------------------------
+    # CHECKPOINT API
+    # ------------------------
+    # A checkpoint tracks one (company, category) work unit of a run.
+    # Status is "running" while the LLM works on it, then "done",
+    # "empty" (no text to extract from) or "failed".
+    COMPLETED_STATUSES = ("done", "empty")
+
+    def start_unit(
+        self,
+        company: str,
+        category: str,
+        prompt_hash: Optional[str],
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO checkpoints (
+                    run_id, company, category, status, prompt_hash,
+                    fingerprint, started_at
+                )
+                VALUES (?, ?, ?, 'running', ?, ?, ?)
+                ON CONFLICT (run_id, company, category) DO UPDATE SET
+                    status = 'running',
+                    prompt_hash = excluded.prompt_hash,
+                    fingerprint = excluded.fingerprint,
+                    started_at = excluded.started_at,
+                    finished_at = NULL,
+                    duration_s = NULL,
+                    error = NULL
+                """,
+                (self.run_id, company, category, prompt_hash, fingerprint, _utc_now()),
+            )
+
+    def finish_unit(
+        self,
+        company: str,
+        category: str,
+        status: str,
+        duration_s: Optional[float] = None,
+        error: Optional[str] = None,
+        prompt_hash: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        rows: Iterable[Dict[str, Any]] = (),
+        routes: Iterable[Dict[str, Any]] = (),
+    ) -> None:
+        """
+        Records the outcome of a work unit, writing its rows (and routing
+        decisions, see build_route) in the same transaction so a unit is
+        never marked done without its results.
+        """
+        rows = list(rows)
+        with metrics.stage("store_write", rows=len(rows)), self.writer() as writer:
+            writer.insert_many(rows)
+            writer.insert_routes(company, category, routes)
+            writer.conn.execute(
+                """
+                INSERT INTO checkpoints (
+                    run_id, company, category, status, prompt_hash, fingerprint,
+                    started_at, finished_at, duration_s, error
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (run_id, company, category) DO UPDATE SET
+                    status = excluded.status,
+                    prompt_hash = COALESCE(excluded.prompt_hash, checkpoints.prompt_hash),
+                    fingerprint = COALESCE(excluded.fingerprint, checkpoints.fingerprint),
+                    finished_at = excluded.finished_at,
+                    duration_s = excluded.duration_s,
+                    error = excluded.error
+                """,
+                (
+                    self.run_id, company, category, status, prompt_hash, fingerprint,
+                    _utc_now(), _utc_now(), duration_s, error,
+                ),
+            )
+
+    def completed_units(self) -> set:
+        """
+        (company, category) pairs this run has already finished.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT company, category FROM checkpoints
+                WHERE run_id = ?
+                AND status IN ({", ".join("?" * len(self.COMPLETED_STATUSES))})
+                """,
+                (self.run_id, *self.COMPLETED_STATUSES),
+            ).fetchall()
+        return {(company, category) for company, category in rows}
+
+    def completed_fingerprints(self) -> Dict[Tuple[str, str], str]:
+        """
+        Fingerprint of the most recently completed checkpoint of every
+        (company, category), across all runs.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT company, category, fingerprint FROM checkpoints
+                WHERE fingerprint IS NOT NULL
+                AND status IN ({", ".join("?" * len(self.COMPLETED_STATUSES))})
+                ORDER BY finished_at, rowid
+                """,
+                self.COMPLETED_STATUSES,
+            ).fetchall()
+        return {(company, category): fingerprint for company, category, fingerprint in rows}
+
+    def fetch_checkpoints(self) -> List[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM checkpoints WHERE run_id = ? ORDER BY started_at",
+                (self.run_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ------------------------
+    # ROUTING API
+    # ------------------------
+    # One row per indicator a model cascade (see router.py) answered:
+    # the model whose answer was kept and why it was escalated, if it was.
+    @staticmethod
+    def build_route(
+        indicator: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Routing decision carried by a result ("route"), None if the
+        result was not routed.
+        """
+        route = (result or {}).get("route")
+        if not route:
+            return None
+
+        return {
+            "indicator_name": indicator["name"],
+            "model": route["model"],
+            "escalated": route.get("reason") is not None,
+            "reason": route.get("reason"),
+            "confidence": result.get("confidence"),
+        }
+
+    def fetch_routes(self) -> List[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM routing WHERE run_id = ? ORDER BY rowid",
+                (self.run_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def routing_stats(self) -> Dict[str, Any]:
+        """
+        Routing summary of this run: how many routed indicators the first
+        (small) model answered without escalation (hit_rate), the
+        escalation reasons and which model the kept answers came from.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            routed, kept = conn.execute(
+                "SELECT COUNT(*), COUNT(*) - SUM(escalated) FROM routing WHERE run_id = ?",
+                (self.run_id,),
+            ).fetchone()
+            reasons = conn.execute(
+                """
+                SELECT reason, COUNT(*) FROM routing
+                WHERE run_id = ? AND escalated
+                GROUP BY reason ORDER BY reason
+                """,
+                (self.run_id,),
+            ).fetchall()
+            models = conn.execute(
+                """
+                SELECT model, COUNT(*) FROM routing
+                WHERE run_id = ?
+                GROUP BY model ORDER BY model
+                """,
+                (self.run_id,),
+            ).fetchall()
+
+        return {
+            "indicators": routed,
+            "hit_rate": kept / routed if routed else None,
+            "escalations": dict(reasons),
+            "answered_by": dict(models),
+        }
+
+    # ------------------------
+    # METRICS API
+    # ------------------------
+    def save_metrics(self, samples: Iterable[Dict[str, Any]]) -> None:
+        """
+        Stores timing samples (see metrics.RunMetrics) for this run.
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO run_metrics (run_id, stage, duration_s, attrs)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (
+                        self.run_id,
+                        sample["stage"],
+                        sample["duration_s"],
+                        json.dumps({
+                            k: v for k, v in sample.items()
+                            if k not in ("stage", "duration_s")
+                        }),
+                    )
+                    for sample in samples
+                ],
+            )
+
+    def fetch_metrics(self) -> List[Dict[str, Any]]:
+        """
+        Timing samples of this run, in the shape RunMetrics records them.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT stage, duration_s, attrs FROM run_metrics WHERE run_id = ? ORDER BY id",
+                (self.run_id,),
+            ).fetchall()
+        return [
+            {"stage": stage, "duration_s": duration_s, **json.loads(attrs or "{}")}
+            for stage, duration_s, attrs in rows
+        ]
+
     # ------------------------
     # WRITE API
     # ------------------------
@@ -50,40 +527,98 @@ class ExtractionStore:
         notes: Optional[str],
     ) -> None:
         """
-        Inserts exactly one extraction row.
+        Inserts (or, within the same run, replaces) one extraction row.
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO extractions (
-                    company,
-                    indicator_name,
-                    category,
-                    esrs,
-                    value,
-                    unit,
-                    confidence,
-                    source_page,
-                    source_section,
-                    notes
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    company,
-                    indicator_name,
-                    category,
-                    esrs,
-                    value,
-                    unit,
-                    confidence,
-                    source_page,
-                    source_section,
-                    notes,
-                ),
-            )
-            conn.commit()
+        self.insert_many(
+            [
+                {
+                    "company": company,
+                    "indicator_name": indicator_name,
+                    "category": category,
+                    "esrs": esrs,
+                    "value": value,
+                    "unit": unit,
+                    "confidence": confidence,
+                    "source_page": source_page,
+                    "source_section": source_section,
+                    "notes": notes,
+                }
+            ]
+        )
+
+    def insert_result(
+        self,
+        company: str,
+        indicator: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+    ) -> None:
+        """
+        Inserts one row built from an indicator config and an LLM result.
+        """
+        self.insert_many([self.build_row(company, indicator, result)])
+
+    def insert_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upserts many rows with executemany in a single transaction.
+
+        Missing keys are stored as NULL. Returns the number of rows written.
+        """
+        rows = list(rows)
+        with metrics.stage("store_write", rows=len(rows)), self.writer() as writer:
+            return writer.insert_many(rows)
+
+    @contextmanager
+    def writer(self) -> Iterator["_StoreWriter"]:
+        """
+        Keeps one connection open for a batch of writes.
+
+        Everything written inside the block is committed once on exit,
+        or rolled back if the block raises.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                yield _StoreWriter(conn, self.run_id)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def build_row(
+        company: str,
+        indicator: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Maps an indicator config and its extraction result to a row.
+
+        A missing result is recorded explicitly as "Not found".
+        """
+        if not result:
+            return {
+                "company": company,
+                "indicator_name": indicator["name"],
+                "category": indicator.get("category"),
+                "esrs": indicator.get("esrs"),
+                "value": None,
+                "unit": indicator.get("expected_unit"),
+                "confidence": 0.0,
+                "source_page": None,
+                "source_section": None,
+                "notes": "Not found in batch extraction",
+            }
+
+        return {
+            "company": company,
+            "indicator_name": indicator["name"],
+            "category": indicator.get("category"),
+            "esrs": indicator.get("esrs"),
+            "value": result.get("value"),
+            "unit": result.get("unit"),
+            "confidence": result.get("confidence", 0.0),
+            "source_page": result.get("source_page"),
+            "source_section": result.get("source_section"),
+            "notes": result.get("notes"),
+        }
 
     # ------------------------
     # READ API (THIS FIXES YOUR ERROR)
@@ -101,3 +636,107 @@ class ExtractionStore:
             rows = cursor.fetchall()
 
             return [dict(row) for row in rows]
+
+    def fetch_latest_as_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the most recently written row per (company, indicator)
+        across runs.
+
+        The ranking walks the (company, indicator_name, extracted_at)
+        index, so this stays fast on large histories.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+
+            cursor.execute(_latest_rows_query())
+            return [dict(row) for row in cursor.fetchall()]
+
+    def iter_batches(
+        self,
+        batch_size: int = 1000,
+        latest_only: bool = False,
+        company: Optional[str] = None,
+        run_id: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Streams extraction rows in batches of at most batch_size.
+
+        Rows are read with fetchmany from one cursor, so memory use does
+        not grow with the size of the table. Filters combine with AND;
+        with latest_only, "latest" is taken among the filtered rows.
+        """
+        where, params = self._filters(company=company, run_id=run_id, category=category)
+
+        if latest_only:
+            query = _latest_rows_query(where)
+        else:
+            query = f"SELECT * FROM extractions {where} ORDER BY id"
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _filters(**filters: Optional[str]) -> Tuple[str, List[str]]:
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class _StoreWriter:
+    """
+    Write handle bound to one open connection (see ExtractionStore.writer).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_id: str):
+        self.conn = conn
+        self.run_id = run_id
+
+    def insert_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        extracted_at = _utc_now("microseconds")
+        cursor = self.conn.executemany(
+            UPSERT_SQL,
+            (self._values(row, extracted_at) for row in rows),
+        )
+        return cursor.rowcount
+
+    def insert_routes(
+        self,
+        company: str,
+        category: str,
+        routes: Iterable[Dict[str, Any]],
+    ) -> int:
+        cursor = self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO routing (
+                run_id, company, category, indicator_name, model,
+                escalated, reason, confidence
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (
+                    self.run_id, company, category, route["indicator_name"],
+                    route["model"], int(route["escalated"]), route.get("reason"),
+                    route.get("confidence"),
+                )
+                for route in routes
+            ),
+        )
+        return cursor.rowcount
+
+    def _values(self, row: Dict[str, Any], extracted_at: str) -> tuple:
+        values = {column: row.get(column) for column in COLUMNS}
+        values["run_id"] = values["run_id"] or self.run_id
+        values["extracted_at"] = values["extracted_at"] or extracted_at
+        return tuple(values[column] for column in COLUMNS)
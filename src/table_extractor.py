@@ -0,0 +1,180 @@
+"""
+Deterministic table-based pre-extraction.
+
+Responsibility:
+- Match table row labels against indicator names and synonyms
+- Parse the figure next to a matched label
+- Resolve an indicator without the LLM only when its page range yields
+  exactly one distinct value, in (or converted to) its expected unit
+
+Ambiguous or implausible matches are left for the LLM (determinism over
+recall). No LLM, no PDF logic here (tables come from
+pdf_reader.extract_tables).
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.pdf_reader import Table
+from src.units import is_scalable, to_expected_unit
+from src.utils import parse_number
+
+
+# Part of unit fingerprints: bump when matching rules change results
+TABLE_EXTRACTOR_VERSION = "tables-3"
+
+# Confidence reported for table matches
+TABLE_CONFIDENCE = 0.9
+
+_SUPERSCRIPTS_RE = re.compile(r"[\u00b9\u00b2\u00b3\u2070-\u209f]")
+
+
+def normalize_label(text: Optional[str]) -> str:
+    """
+    Lower-cased label with punctuation, superscript footnote markers and
+    repeated whitespace removed, so "Scope 1 (GHG) emissions¹:" and
+    "scope 1 ghg emissions" compare equal.
+    """
+    if not text:
+        return ""
+    text = _SUPERSCRIPTS_RE.sub("", text)
+    return " ".join(re.sub(r"[^\w%]+", " ", text.lower()).split())
+
+
+def build_label_index(indicators: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Maps every normalized name and synonym to its indicator name.
+
+    Labels shared by several indicators are dropped, since a row with
+    such a label cannot be attributed deterministically.
+    """
+    index: Dict[str, str] = {}
+    shared = set()
+
+    for indicator in indicators:
+        for label in [indicator["name"], *indicator.get("synonyms", [])]:
+            key = normalize_label(label)
+            if index.get(key, indicator["name"]) != indicator["name"]:
+                shared.add(key)
+            index[key] = indicator["name"]
+
+    for key in shared:
+        del index[key]
+    return index
+
+
+def _plausible(value: float, value_type: str) -> bool:
+    if value_type == "percentage":
+        return 0 <= value <= 100
+    if value_type == "year":
+        return value.is_integer() and 1990 <= value <= 2100
+    return True
+
+
+def _unit_column(table: Table) -> Optional[int]:
+    for col, cell in enumerate(table[0] if table else []):
+        if normalize_label(cell) in ("unit", "units"):
+            return col
+    return None
+
+
+def match_table(
+    table: Table,
+    labels: Dict[str, str],
+    indicators_by_name: Dict[str, Dict[str, Any]],
+    page: int,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Returns (indicator name, result) for every row of the table whose
+    label matches an indicator and that carries a plausible figure.
+
+    The first label cell is the row's first non-empty cell; the value is
+    the first figure to its right (the current year in most reports).
+    A figure in a scaled variant of the expected unit (e.g. ktCO2e for
+    tCO2e) is converted; a row in another unit, or without a unit column
+    when the expected unit is often scaled, is skipped.
+    """
+    unit_col = _unit_column(table)
+    matches = []
+
+    for row in table:
+        label_col = next((col for col, cell in enumerate(row) if cell and cell.strip()), None)
+        if label_col is None:
+            continue
+
+        name = labels.get(normalize_label(row[label_col]))
+        if name is None:
+            continue
+        indicator = indicators_by_name[name]
+
+        value = None
+        for col in range(label_col + 1, len(row)):
+            if col == unit_col:
+                continue
+            value = parse_number(row[col])
+            if value is not None:
+                break
+
+        if value is None:
+            continue
+
+        unit = row[unit_col] if unit_col is not None and unit_col < len(row) else None
+        if not (unit or "").strip() and is_scalable(indicator["expected_unit"]):
+            # "12,345" could be tonnes or kilotonnes
+            continue
+        converted = to_expected_unit(value, unit, indicator["expected_unit"])
+        if converted is None:
+            continue
+        value, unit = converted
+
+        if not _plausible(value, indicator.get("value_type")):
+            continue
+
+        matches.append(
+            (
+                name,
+                {
+                    "value": int(value) if value.is_integer() else value,
+                    "unit": unit,
+                    "confidence": TABLE_CONFIDENCE,
+                    "source_page": page,
+                    "source_section": "table",
+                    "notes": f"Table row '{row[label_col].strip()}'",
+                },
+            )
+        )
+
+    return matches
+
+
+def extract_from_tables(
+    indicators: List[Dict[str, Any]],
+    company_pages: Dict[str, Any],
+    tables_by_page: Dict[int, List[Table]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolves indicators from the tables on their own page ranges.
+
+    An indicator is resolved only when every match within its range has
+    the same value; the earliest page is reported as source.
+
+    Returns:
+        Dict[indicator_name -> result], same shape as the LLM's results
+    """
+    labels = build_label_index(indicators)
+    indicators_by_name = {indicator["name"]: indicator for indicator in indicators}
+
+    candidates: Dict[str, List[Dict[str, Any]]] = {}
+    for page in sorted(tables_by_page):
+        for table in tables_by_page[page]:
+            for name, result in match_table(table, labels, indicators_by_name, page):
+                page_range = company_pages.get(name)
+                if page_range and page_range[0] <= page <= page_range[1]:
+                    candidates.setdefault(name, []).append(result)
+
+    resolved = {}
+    for name, results in candidates.items():
+        if len({result["value"] for result in results}) == 1:
+            resolved[name] = results[0]
+
+    return resolved
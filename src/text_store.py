@@ -0,0 +1,162 @@
+"""
+Persistent on-disk store of extracted PDF page text.
+
+Responsibility:
+- Keep page text across runs so repeat runs skip PDF parsing
+- Key entries on (file hash, reader version, extraction mode, page)
+- Drop entries automatically once a PDF's content changes
+
+No LLM, no PDF parsing here.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+from src.utils import file_sha256
+
+
+class PageTextStore:
+    """
+    SQLite sidecar (e.g. db/page_text.sqlite) holding extracted page text.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    pdf_path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    file_hash TEXT NOT NULL
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page_text (
+                    file_hash TEXT NOT NULL,
+                    reader_version TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    text TEXT,
+                    PRIMARY KEY (file_hash, reader_version, mode, page)
+                )
+                """
+            )
+            conn.commit()
+
+    # ------------------------
+    # DOCUMENT HASHES
+    # ------------------------
+    def document_hash(self, pdf_path: str) -> str:
+        """
+        Returns the content hash of a PDF.
+
+        The hash is only recomputed when the file's size or mtime changed.
+        When it does change, page text stored for the old content is
+        deleted (unless another path still points at it).
+        """
+        stat = os.stat(pdf_path)
+        key = os.path.abspath(pdf_path)
+
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, file_hash FROM documents WHERE pdf_path = ?",
+                (key,),
+            ).fetchone()
+
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                return row[2]
+
+            file_hash = file_sha256(pdf_path)
+
+            conn.execute(
+                """
+                INSERT INTO documents (pdf_path, size, mtime_ns, file_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(pdf_path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    file_hash = excluded.file_hash
+                """,
+                (key, stat.st_size, stat.st_mtime_ns, file_hash),
+            )
+
+            if row and row[2] != file_hash:
+                self._purge_unreferenced(conn, row[2])
+
+            conn.commit()
+
+        return file_hash
+
+    @staticmethod
+    def _purge_unreferenced(conn: sqlite3.Connection, file_hash: str) -> None:
+        still_used = conn.execute(
+            "SELECT 1 FROM documents WHERE file_hash = ? LIMIT 1",
+            (file_hash,),
+        ).fetchone()
+        if not still_used:
+            conn.execute("DELETE FROM page_text WHERE file_hash = ?", (file_hash,))
+
+    # ------------------------
+    # PAGE TEXT
+    # ------------------------
+    def get_pages(
+        self,
+        file_hash: str,
+        reader_version: str,
+        mode: str,
+        page_numbers: Iterable[int],
+    ) -> Dict[int, Optional[str]]:
+        """
+        Returns stored text for whichever of the requested pages are present.
+
+        A stored None means the page is known to be outside the document.
+        """
+        wanted = sorted(set(page_numbers))
+        if not wanted:
+            return {}
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT page, text FROM page_text
+                WHERE file_hash = ? AND reader_version = ? AND mode = ?
+                AND page IN ({",".join("?" * len(wanted))})
+                """,
+                (file_hash, reader_version, mode, *wanted),
+            ).fetchall()
+
+        return {page: text for page, text in rows}
+
+    def put_pages(
+        self,
+        file_hash: str,
+        reader_version: str,
+        mode: str,
+        pages: Dict[int, Optional[str]],
+    ) -> None:
+        if not pages:
+            return
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO page_text (
+                    file_hash, reader_version, mode, page, text
+                )
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (file_hash, reader_version, mode, page, text)
+                    for page, text in pages.items()
+                ],
+            )
+            conn.commit()
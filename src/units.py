@@ -0,0 +1,117 @@
+"""
+Reported units versus expected units.
+
+Responsibility:
+- Compare the unit a figure was reported in with an indicator's
+  expected_unit, ignoring spelling variants ("t CO2e", "tCO2e")
+- Convert figures reported at another scale (ktCO2e, GWh, € thousands)
+  to the expected unit
+
+No LLM, no PDF logic here.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+
+_NON_UNIT_RE = re.compile(r"[^\w%]+")
+
+# Scaled variants of expected units (by unit_key), with the factor that
+# converts a figure in the variant to the expected unit. unit_key folds
+# case, so "Mt CO2e" (megatonnes) and "MT CO2e" (often metric tonnes)
+# cannot be told apart: neither is listed and both are left to the LLM.
+SCALED_UNITS: Dict[str, Dict[str, float]] = {
+    "tco2e": {
+        "kgco2e": 1e-3,
+        "ktco2e": 1e3,
+        "thousandtco2e": 1e3,
+        "milliontco2e": 1e6,
+    },
+    "mwh": {"kwh": 1e-3, "gwh": 1e3, "twh": 1e6},
+    "gj": {"mj": 1e-3, "tj": 1e3, "pj": 1e6},
+    "eurmillion": {
+        "eurm": 1.0,
+        "meur": 1.0,
+        "eurmn": 1.0,
+        "millioneur": 1.0,
+        "eurthousand": 1e-3,
+        "thousandeur": 1e-3,
+        "teur": 1e-3,
+        "keur": 1e-3,
+        "eurk": 1e-3,
+        "eurbillion": 1e3,
+        "billioneur": 1e3,
+        "eurbn": 1e3,
+        "bneur": 1e3,
+    },
+}
+
+
+def unit_key(unit: str) -> str:
+    """
+    Spelling-independent form of a unit: lower case, no spaces or
+    punctuation, no plural "s", "per" dropped, "€" read as "eur",
+    "percent" as "%" and "₂" as "2", so "t CO₂e" and "tCO2e", or
+    "€ millions" and "EUR million", compare equal.
+    """
+    # NFKC folds sub- and superscripts: "tCO₂e" reads as "tCO2e"
+    unit = unicodedata.normalize("NFKC", unit).replace("€", " eur ").lower()
+    words = _NON_UNIT_RE.sub(" ", unit).split()
+    return "".join(
+        "%" if word in ("percent", "percentage") else word.rstrip("s")
+        for word in words
+        if word != "per"
+    )
+
+
+def _stated(unit: Any) -> bool:
+    return unit is not None and bool(str(unit).strip())
+
+
+def unit_matches(expected_unit: Optional[str], unit: Any) -> bool:
+    """
+    Whether a unit is one of the expected ones, as is ("MWh or GJ"
+    accepts either). An empty unit is not an error: the expected unit
+    is assumed.
+    """
+    if not expected_unit or not _stated(unit):
+        return True
+    if not isinstance(unit, str):
+        return False
+
+    return unit_key(unit) in {unit_key(option) for option in expected_unit.split(" or ")}
+
+
+def is_scalable(expected_unit: Optional[str]) -> bool:
+    """Whether figures for this unit are commonly reported at other scales."""
+    return bool(expected_unit) and any(
+        unit_key(option) in SCALED_UNITS for option in expected_unit.split(" or ")
+    )
+
+
+def to_expected_unit(
+    value: float,
+    unit: Any,
+    expected_unit: Optional[str],
+) -> Optional[Tuple[float, str]]:
+    """
+    The figure converted to the expected unit, with the unit to report
+    it in; None when the unit is neither expected nor a known scaled
+    variant of it. An empty unit is taken to be the expected one.
+    """
+    if not expected_unit or not _stated(unit):
+        return value, expected_unit or ""
+    if not isinstance(unit, str):
+        return None
+
+    key = unit_key(unit)
+    for option in expected_unit.split(" or "):
+        expected_key = unit_key(option)
+        if key == expected_key:
+            return value, unit.strip()
+        factor = SCALED_UNITS.get(expected_key, {}).get(key)
+        if factor is not None:
+            # Rounded so 12.345 ktCO2e becomes 12345, not 12345.000000000002
+            return round(value * factor, 6), option.strip()
+    return None
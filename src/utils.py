@@ -1,6 +1,8 @@
 # src/utils.py
 
+import hashlib
 import re
+from typing import Optional
 
 
 def extract_number(text: str):
@@ -11,3 +13,78 @@ def extract_number(text: str):
     if match:
         return float(match.group(1).replace(",", ""))
     return None
+
+
+# A figure as printed in reports: optional sign or opening parenthesis,
+# then digit groups joined by "," or "." or, before exactly three digits,
+# by a space or apostrophe (thousands separators).
+_FIGURE_RE = re.compile(
+    r"([-\u2212\u2013]?\(?)\s*"
+    r"(\d+(?:(?:[.,]|[ '\u00a0\u202f](?=\d{3}(?!\d)))\d+)*)"
+)
+
+
+def parse_number(text: Optional[str]) -> Optional[float]:
+    """
+    Parses the first figure in a report cell such as "1,234.5",
+    "1.234,5", "12,5 %", "(3,200)" or "1 234 567".
+
+    - "(x)" and leading minus signs (incl. unicode ones) give negatives
+    - with both "," and ".", the last one is the decimal separator
+    - a single "," followed by exactly three digits is a thousands
+      separator, unless the integer part is 0 ("0,123"); otherwise it is
+      a decimal comma
+    - repeated separators are always thousands separators
+
+    Returns None when there is no figure (e.g. "n/a", "–").
+    """
+    if not text:
+        return None
+
+    match = _FIGURE_RE.search(text)
+    if not match:
+        return None
+
+    sign, digits = match.groups()
+    digits = re.sub(r"[\s'\u00a0\u202f]", "", digits)
+
+    commas, dots = digits.count(","), digits.count(".")
+    if commas and dots:
+        decimal = "," if digits.rfind(",") > digits.rfind(".") else "."
+    elif commas == 1 and (
+        len(digits) - digits.index(",") - 1 != 3 or digits.startswith("0,")
+    ):
+        decimal = ","
+    elif dots == 1:
+        decimal = "."
+    else:
+        decimal = None
+
+    thousands = {",", "."} - {decimal}
+    for separator in thousands:
+        digits = digits.replace(separator, "")
+    if decimal:
+        digits = digits.replace(decimal, ".")
+
+    try:
+        value = float(digits)
+    except ValueError:
+        return None
+
+    negative = bool(sign.strip("(")) or ("(" in sign and ")" in text[match.end():])
+    return -value if negative else value
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content.
+
+    Read in chunks so large annual reports are never loaded in one piece.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
@@ -4,3 +4,149 @@ from pathlib import Path
 # Add project root to sys.path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """
+    Writes a small 10-page PDF whose pages read "Page <n> content".
+    """
+    import fitz
+
+    pdf_path = tmp_path / "sample.pdf"
+
+    doc = fitz.open()
+    for page_number in range(1, 11):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {page_number} content")
+    doc.save(str(pdf_path))
+    doc.close()
+
+    return str(pdf_path)
+
+
+@pytest.fixture
+def ollama_stub():
+    """
+    Local HTTP server imitating Ollama's /api/generate and /api/chat.
+
+    Configure via the returned object:
+      - statuses: HTTP statuses to return first (then 200)
+      - response: text placed in the "response" field
+      - delay: seconds to sleep per request
+      - token_size / token_delay: chunking of streamed ("stream": true) replies
+    It records received payloads and paths, the peak number of concurrent requests
+    and how many stream events were written before the client hung up.
+    """
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Stub:
+        statuses = []
+        response = "{}"
+        delay = 0.0
+        token_size = 4
+        token_delay = 0.0
+        events_sent = 0
+        payloads = []
+        paths = []
+        in_flight = 0
+        max_in_flight = 0
+        lock = threading.Lock()
+
+        @staticmethod
+        def content(path, text):
+            # /api/chat nests the generated text in a message
+            if path.endswith("/api/chat"):
+                return {"message": {"role": "assistant", "content": text}}
+            return {"response": text}
+
+        @staticmethod
+        def final_stats():
+            # Shape of the counters Ollama adds to its final response
+            return {
+                "done": True,
+                "prompt_eval_count": 100,
+                "eval_count": 20,
+                "prompt_eval_duration": 500_000_000,
+                "eval_duration": 1_000_000_000,
+            }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+
+            with Stub.lock:
+                Stub.payloads.append(payload)
+                Stub.paths.append(self.path)
+                Stub.in_flight += 1
+                Stub.max_in_flight = max(Stub.max_in_flight, Stub.in_flight)
+                status = Stub.statuses.pop(0) if Stub.statuses else 200
+
+            time.sleep(Stub.delay)
+
+            if payload.get("stream") and status == 200:
+                try:
+                    self._stream_reply()
+                finally:
+                    with Stub.lock:
+                        Stub.in_flight -= 1
+                return
+
+            body = json.dumps(
+                {**Stub.content(self.path, Stub.response), **Stub.final_stats()}
+            ).encode()
+            with Stub.lock:
+                Stub.in_flight -= 1
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_reply(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            text = Stub.response
+            tokens = [
+                text[i:i + Stub.token_size]
+                for i in range(0, len(text), Stub.token_size)
+            ]
+            events = [{**Stub.content(self.path, t), "done": False} for t in tokens]
+            events.append({**Stub.content(self.path, ""), **Stub.final_stats()})
+
+            try:
+                for event in events:
+                    line = (json.dumps(event) + "\n").encode()
+                    self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                    self.wfile.flush()
+                    with Stub.lock:
+                        Stub.events_sent += 1
+                    time.sleep(Stub.token_delay)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    Stub.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield Stub
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.chunker import estimate_tokens
+from src.llm_agent import LLMExtractionAgent
+from src import metrics
+from src.llm_backends import RecordedLLM, cache_reuse, create_backend, recording_key
+from src.metrics import RunMetrics
+from src.openai_compat import OpenAICompatibleLLM
+
+
+@pytest.fixture
+def openai_stub():
+    """
+    Local HTTP server imitating llama-server's /v1/chat/completions and
+    /tokenize. Set response to the generated text and tokenize=False to
+    answer /tokenize with 404.
+    """
+
+    class Stub:
+        response = "{}"
+        tokenize = True
+        payloads = []
+        paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            Stub.payloads.append(payload)
+            Stub.paths.append(self.path)
+
+            if self.path == "/tokenize":
+                if not Stub.tokenize:
+                    return self._reply(404, {"error": "not found"})
+                return self._reply(200, {"tokens": list(range(len(payload["content"].split())))})
+
+            timings = {"prompt_n": 7, "predicted_n": 3, "prompt_ms": 50.0, "predicted_ms": 20.0}
+            if not payload.get("stream"):
+                return self._reply(200, {
+                    "choices": [{"message": {"role": "assistant", "content": Stub.response},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 40, "completion_tokens": 3},
+                    "timings": timings,
+                })
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            text = Stub.response
+            chunks = [text[i:i + 4] for i in range(0, len(text), 4)]
+            try:
+                for chunk in chunks:
+                    event = {"choices": [{"delta": {"content": chunk}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                final = {"choices": [], "timings": timings}
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    Stub.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield Stub
+
+    server.shutdown()
+    server.server_close()
+
+
+INDICATORS = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+
+
+def test_openai_invoke_sends_chat_request(openai_stub):
+    openai_stub.response = '{"A": {"value": 1}}'
+    llm = OpenAICompatibleLLM(model="local", base_url=openai_stub.base_url)
+    llm.system = "be precise"
+
+    assert llm.invoke("prompt", schema={"type": "object"}) == '{"A": {"value": 1}}'
+
+    payload = openai_stub.payloads[0]
+    assert openai_stub.paths == ["/v1/chat/completions"]
+    assert payload["messages"] == [
+        {"role": "system", "content": "be precise"},
+        {"role": "user", "content": "prompt"},
+    ]
+    assert payload["max_tokens"] == 800 and payload["temperature"] == 0
+    assert payload["response_format"]["json_schema"]["schema"] == {"type": "object"}
+    assert llm.last_stats["prompt_eval_count"] == 7
+    assert llm.last_stats["eval_count"] == 3
+
+
+def test_openai_invoke_stream_stops_once_answer_is_complete(openai_stub):
+    answer = '{"A": {"value": 1}}'
+    openai_stub.response = answer + " and some rambling " * 20
+    llm = OpenAICompatibleLLM(base_url=openai_stub.base_url, stream=True)
+
+    assert llm.invoke_stream("prompt") == answer
+    assert llm.last_stats["stopped_early"] is True
+    assert openai_stub.payloads[0]["stream_options"] == {"include_usage": True}
+
+
+def test_openai_count_tokens_uses_server_tokenizer(openai_stub):
+    llm = OpenAICompatibleLLM(base_url=openai_stub.base_url)
+    assert llm.count_tokens("one two three") == 3
+    assert openai_stub.paths == ["/tokenize"]
+
+    openai_stub.tokenize = False
+    llm = OpenAICompatibleLLM(base_url=openai_stub.base_url)
+    text = "one two three " * 10
+    assert llm.count_tokens(text) == estimate_tokens(text)
+    llm.count_tokens(text)
+    # An unsupported endpoint is only asked once
+    assert openai_stub.paths.count("/tokenize") == 2
+
+
+def test_openai_cache_reuse_is_measured(openai_stub):
+    llm = OpenAICompatibleLLM(base_url=openai_stub.base_url)
+    with metrics.activate(RunMetrics()) as run_metrics:
+        llm.invoke("prompt")  # usage: 40 prompt tokens, 7 evaluated
+
+        # This stream carries no usage: the prompt is tokenized instead
+        openai_stub.response = "no json, so the stream is read to the end"
+        llm.invoke_stream("one two three four five six seven eight nine ten")
+
+    stats = run_metrics.summary()["llm_invoke"]
+    assert stats["kv_prompt_tokens"] == 50
+    assert stats["kv_cached_tokens"] == 33 + 3
+    assert cache_reuse(stats) == 36 / 50
+
+
+def test_cache_reuse_is_unknown_without_a_measured_prompt_size():
+    assert cache_reuse({"prompt_tokens_est": 1000, "prompt_eval_count": 250}) is None
+
+
+def test_openai_count_tokens_does_not_wait_for_generation_slots(openai_stub):
+    llm = OpenAICompatibleLLM(base_url=openai_stub.base_url, num_parallel=1)
+    with llm._semaphore:
+        assert llm.count_tokens("one two three") == 3
+
+
+def test_agent_counts_prompt_overhead_once_per_indicator_set(openai_stub):
+    openai_stub.response = '{"A": {"value": 5, "confidence": 0.9}}'
+    agent = LLMExtractionAgent(backend=OpenAICompatibleLLM(base_url=openai_stub.base_url))
+
+    agent.extract_many(INDICATORS, "text")
+    agent.extract_many(INDICATORS, "other text")
+    assert openai_stub.paths.count("/tokenize") == 1
+
+
+def test_agent_runs_on_openai_backend(openai_stub):
+    openai_stub.response = '{"A": {"value": 5, "confidence": 0.9}}'
+    backend = OpenAICompatibleLLM(base_url=openai_stub.base_url)
+    agent = LLMExtractionAgent(backend=backend)
+
+    assert agent.extract_many(INDICATORS, "text")["A"]["value"] == 5
+    assert openai_stub.payloads[-1]["messages"][0]["role"] == "system"
+
+
+def test_recorded_replays_and_falls_back():
+    llm = RecordedLLM(
+        responses={recording_key(None, "known"): "recorded"},
+        responder=lambda prompt: f"echo {prompt}",
+    )
+
+    assert llm.invoke("known") == "recorded"
+    assert llm.invoke("other") == "echo other"
+    assert (llm.hits, llm.misses) == (1, 1)
+    assert llm.last_stats == {"hit": False}
+
+
+def test_recorded_records_inner_backend(tmp_path):
+    path = str(tmp_path / "recordings.json")
+    inner = RecordedLLM(responder=lambda prompt: prompt.upper())
+    llm = RecordedLLM(path=path, inner=inner)
+    llm.system = "sys"
+
+    assert llm.invoke("abc") == "ABC"
+    llm.save()
+
+    replay = RecordedLLM(path=path)
+    replay.system = "sys"
+    assert replay.invoke("abc") == "ABC"
+    assert replay.hits == 1
+
+
+def test_batch_and_async_invoke_keep_order():
+    llm = RecordedLLM(responder=lambda prompt: prompt * 2, num_parallel=3)
+
+    assert llm.invoke_batch(["a", "b", "c", "d"]) == ["aa", "bb", "cc", "dd"]
+    assert asyncio.run(llm.ainvoke("x")) == "xx"
+
+
+def test_create_backend(tmp_path):
+    path = str(tmp_path / "recordings.json")
+    RecordedLLM(path=path, responses={}).save()
+
+    assert isinstance(create_backend("openai", base_url="http://x/v1"), OpenAICompatibleLLM)
+    assert isinstance(create_backend("recorded", recordings=path), RecordedLLM)
+    with pytest.raises(ValueError):
+        create_backend("unknown")
+
+
+def test_recorded_backend_needs_something_to_answer_with(tmp_path):
+    with pytest.raises(ValueError):
+        create_backend("recorded")
+    with pytest.raises(ValueError):
+        RecordedLLM(path=str(tmp_path / "missing.json"))
+
+    assert RecordedLLM(responder=lambda prompt: "{}").invoke("prompt") == "{}"
@@ -0,0 +1,46 @@
+import fitz
+
+from benchmarks.run_benchmark import sample_rss_peak
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_pdf import generate_report_pdf
+from config.indicators import INDICATORS
+from src.llm_agent import LLMExtractionAgent
+
+
+def test_synthetic_report_places_indicators_inside_their_ranges(tmp_path):
+    pdf_path = str(tmp_path / "report.pdf")
+
+    mapping = generate_report_pdf(pdf_path, 60, INDICATORS, seed=1)
+    again = generate_report_pdf(str(tmp_path / "again.pdf"), 60, INDICATORS, seed=1)
+
+    assert mapping["__pdf_path__"] == pdf_path
+    assert {k: v for k, v in mapping.items() if k != "__pdf_path__"} == {
+        k: v for k, v in again.items() if k != "__pdf_path__"
+    }
+
+    with fitz.open(pdf_path) as doc:
+        assert doc.page_count == 60
+        for indicator in INDICATORS:
+            start, end = mapping[indicator["name"]]
+            text = "".join(doc[p - 1].get_text() for p in range(start, end + 1))
+            assert indicator["name"] in text
+
+
+def test_stub_answers_every_indicator_in_the_prompt():
+    indicators = INDICATORS[:3]
+    prompt = LLMExtractionAgent.build_prompt(indicators, "some text")
+
+    answer = StubOllamaServer.answer_for(prompt)
+
+    for indicator in indicators:
+        assert f'"{indicator["name"]}"' in answer
+
+
+def test_rss_peak_is_sampled_during_the_block():
+    with sample_rss_peak(interval_s=0.01) as rss:
+        before = rss["rss_peak_mb"]
+        ballast = bytearray(64 * 1024 * 1024)
+        ballast[::4096] = b"x" * len(ballast[::4096])
+        del ballast
+
+    assert rss["rss_peak_mb"] >= before + 32
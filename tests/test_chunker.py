@@ -0,0 +1,67 @@
+from src.chunker import chunk_text, estimate_tokens, merge_results, split_page_blocks
+from src.llm_agent import LLMExtractionAgent
+from src.ollama import OllamaLLM
+from src.planner import build_page_text
+
+
+def _pages(count, size):
+    return build_page_text({p: f"page {p} " + "x" * size for p in range(1, count + 1)})
+
+
+def test_split_page_blocks_round_trip():
+    text = _pages(3, 10)
+    blocks = split_page_blocks(text)
+
+    assert [page for page, _ in blocks] == [1, 2, 3]
+    assert "\n".join(block for _, block in blocks) == text
+
+
+def test_chunks_respect_budget_and_page_boundaries():
+    text = _pages(10, 300)
+    chunks = chunk_text(text, max_tokens=300)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+    # Every page appears exactly once and starts with its marker
+    pages = [page for chunk in chunks for page, _ in split_page_blocks(chunk)]
+    assert pages == list(range(1, 11))
+
+
+def test_oversized_page_is_split_with_repeated_marker():
+    text = build_page_text({7: "\n".join(["line " * 20] * 30)})
+    chunks = chunk_text(text, max_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(chunk.startswith("--- Page 7 ---") for chunk in chunks)
+
+
+def test_merge_prefers_value_then_confidence_then_page():
+    merged = merge_results([
+        {"A": {"value": None, "confidence": 0.9}, "B": {"value": 5, "confidence": 0.5, "source_page": 20}},
+        {"A": {"value": 1, "confidence": 0.4}, "B": {"value": 6, "confidence": 0.5, "source_page": 12}},
+        {"A": {"value": 2, "confidence": 0.8}, "C": None},
+    ])
+
+    assert merged["A"]["value"] == 2
+    assert merged["B"]["value"] == 6
+    assert "C" not in merged
+
+
+def test_agent_maps_chunks_and_merges(monkeypatch):
+    prompts = []
+
+    def fake_invoke(self, prompt, schema=None):
+        prompts.append(prompt)
+        if "page 9 " in prompt:
+            return '{"A": {"value": 9, "confidence": 0.9, "source_page": 9}}'
+        return '{"A": {"value": null, "confidence": 0.0}}'
+
+    monkeypatch.setattr(OllamaLLM, "invoke", fake_invoke)
+
+    agent = LLMExtractionAgent(context_tokens=1800)
+    indicators = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+
+    result = agent.extract_many(indicators, _pages(10, 1000))
+
+    assert len(prompts) > 1
+    assert result["A"]["value"] == 9
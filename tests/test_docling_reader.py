@@ -0,0 +1,36 @@
+import pytest
+
+from src.docling_reader import extract_structured_content, referenced_pages, shard_pages
+
+
+def test_shards_are_consecutive_and_bounded():
+    assert shard_pages([1, 2, 3, 4, 5], shard_size=2) == [(1, 2), (3, 4), (5, 5)]
+    assert shard_pages([9, 3, 4, 10, 20]) == [(3, 4), (9, 10), (20, 20)]
+    assert shard_pages([]) == []
+
+    with pytest.raises(ValueError):
+        shard_pages([1], shard_size=0)
+
+
+def test_referenced_pages_merge_every_range():
+    company_pages = {"__pdf_path__": "x.pdf", "A": (3, 5), "B": (4, 7), "C": (20, 20)}
+
+    assert referenced_pages(company_pages) == [3, 4, 5, 6, 7, 20]
+
+
+def test_only_referenced_pages_are_converted(sample_pdf, monkeypatch):
+    converted = []
+
+    def fake_docling(pdf_path, page_range=None):
+        converted.append(page_range)
+        if page_range == (8, 9):
+            raise RuntimeError("conversion failed")
+        return {"tables": [{"page": page_range[0], "rows": []}], "sections": []}
+
+    monkeypatch.setattr("src.docling_reader._docling_extract", fake_docling)
+
+    content = extract_structured_content(sample_pdf, pages=[2, 3, 4, 8, 9], shard_size=2)
+
+    assert converted == [(2, 3), (4, 4), (8, 9)]
+    # The failed shard falls back to the text of its own pages
+    assert [table["page"] for table in content["tables"]] == [2, 4, 8, 9]
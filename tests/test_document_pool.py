@@ -0,0 +1,84 @@
+import threading
+
+import fitz
+
+from src.docling_reader import extract_structured_content
+from src.pdf_reader import DocumentPool, extract_pages, iter_pdf_pages, read_pdf_pages
+
+
+def _write_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_pool_reuses_one_handle(sample_pdf):
+    with DocumentPool() as pool:
+        for page_number in range(1, 11):
+            read_pdf_pages(sample_pdf, page_number, page_number, pool=pool)
+        extract_pages(sample_pdf, [2, 3], pool=pool)
+
+        assert pool.opens == 1
+        assert len(pool) == 1
+
+    assert len(pool) == 0
+
+
+def test_pool_evicts_least_recently_used(tmp_path):
+    paths = [_write_pdf(tmp_path / f"doc{i}.pdf", [f"Doc {i}"]) for i in range(3)]
+
+    pool = DocumentPool(max_open=2)
+    extract_pages(paths[0], [1], pool=pool)
+    extract_pages(paths[1], [1], pool=pool)
+    extract_pages(paths[0], [1], pool=pool)
+    extract_pages(paths[2], [1], pool=pool)  # evicts doc1, not doc0
+
+    assert len(pool) == 2
+    extract_pages(paths[0], [1], pool=pool)
+    assert pool.opens == 3
+    extract_pages(paths[1], [1], pool=pool)
+    assert pool.opens == 4
+
+    pool.close()
+
+
+def test_paused_iteration_does_not_block_the_pool(sample_pdf):
+    with DocumentPool() as pool:
+        pages = iter_pdf_pages(sample_pdf, pool=pool)
+        next(pages)
+
+        # Another thread can read while the first iterator is paused
+        reader = threading.Thread(
+            target=extract_pages,
+            args=(sample_pdf, [5]),
+            kwargs={"pool": pool},
+            daemon=True,
+        )
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+
+        # The paused iterator's handle is not evicted
+        assert len(list(pages)) == 9
+        assert pool.opens == 1
+
+
+def test_iter_pdf_pages_streams_whole_document(sample_pdf):
+    pages = list(iter_pdf_pages(sample_pdf))
+
+    assert [number for number, _ in pages] == list(range(1, 11))
+    assert "Page 10 content" in pages[-1][1]
+
+
+def test_docling_fallback_reads_every_page(sample_pdf, monkeypatch):
+    def failing_docling(pdf_path, page_range=None):
+        raise RuntimeError("conversion failed")
+
+    monkeypatch.setattr("src.docling_reader._docling_extract", failing_docling)
+
+    content = extract_structured_content(sample_pdf)
+
+    assert [table["page"] for table in content["tables"]] == list(range(1, 11))
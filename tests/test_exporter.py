@@ -0,0 +1,65 @@
+import csv
+
+import pytest
+
+from src.exporter import export_to_csv, export_to_parquet
+from src.storage import ExtractionStore
+
+
+def _seed(db_path):
+    env = {"name": "Scope 1", "category": "Environmental", "esrs": "E1"}
+    soc = {"name": "Employees", "category": "Social", "esrs": "S1"}
+
+    for run_id, offset in (("run-1", 0), ("run-2", 100)):
+        store = ExtractionStore(db_path, run_id=run_id)
+        store.insert_many(
+            ExtractionStore.build_row(company, indicator, {"value": offset + i, "confidence": 0.5})
+            for i, company in enumerate(["AIB", "BPCE", "BBVA"])
+            for indicator in (env, soc)
+        )
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_streams_in_batches_with_filters(tmp_path):
+    db_path = str(tmp_path / "db.sqlite")
+    _seed(db_path)
+    out = tmp_path / "out.csv"
+
+    export_to_csv(db_path, str(out), latest_only=False, batch_size=2)
+    assert len(_read_csv(out)) == 12
+
+    export_to_csv(db_path, str(out), batch_size=2)
+    latest = _read_csv(out)
+    assert len(latest) == 6
+    assert {row["run_id"] for row in latest} == {"run-2"}
+
+    export_to_csv(db_path, str(out), latest_only=False, run_id="run-1", category="Social")
+    rows = _read_csv(out)
+    assert [(r["company"], r["value"]) for r in rows] == [("AIB", "0"), ("BPCE", "1"), ("BBVA", "2")]
+
+
+def test_iter_batches_respects_batch_size(tmp_path):
+    db_path = str(tmp_path / "db.sqlite")
+    _seed(db_path)
+
+    sizes = [len(batch) for batch in ExtractionStore(db_path).iter_batches(batch_size=5)]
+    assert sizes == [5, 5, 2]
+
+
+def test_parquet_export(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    db_path = str(tmp_path / "db.sqlite")
+    _seed(db_path)
+    out = tmp_path / "out.parquet"
+
+    export_to_parquet(db_path, str(out), company="AIB", batch_size=1)
+
+    table = pq.read_table(str(out))
+    assert table.num_rows == 2
+    assert table.column("value").to_pylist() == ["100", "100"]
+    assert set(table.column("indicator_name").to_pylist()) == {"Scope 1", "Employees"}
@@ -1,13 +1,13 @@
+import json
+import re
 from unittest.mock import patch
 
 from src.extractor import run_extraction
 from src.storage import ExtractionStore
 
 
-def test_extractor_batch_mode(tmp_path):
-    companies = [
-        {"name": "TEST_CO", "pdf_path": "fake.pdf"}
-    ]
+def test_extractor_batch_mode(tmp_path, sample_pdf):
+    companies = ["TEST_CO"]
 
     fake_indicators = [
         {
@@ -15,17 +15,20 @@ def test_extractor_batch_mode(tmp_path):
             "expected_unit": "units",
             "category": "Test",
             "esrs": "T1",
+            "definition": "First test indicator",
         },
         {
             "name": "Indicator B",
             "expected_unit": "units",
             "category": "Test",
             "esrs": "T2",
+            "definition": "Second test indicator",
         },
     ]
 
     fake_pages = {
         "TEST_CO": {
+            "__pdf_path__": sample_pdf,
             "Indicator A": (1, 2),
             "Indicator B": (3, 4),
         }
@@ -44,8 +47,7 @@ def test_extractor_batch_mode(tmp_path):
     db_path = tmp_path / "test.sqlite"
 
     with patch("src.extractor.INDICATORS", fake_indicators), \
-         patch("src.extractor.PAGE_REFERENCES", fake_pages), \
-         patch("src.extractor.extract_text", return_value="fake text"), \
+         patch("src.extractor.PAGE_MAPPING", fake_pages), \
          patch("src.extractor.LLMExtractionAgent.extract_many", return_value=fake_llm_result):
 
         run_extraction(
@@ -60,3 +62,204 @@ def test_extractor_batch_mode(tmp_path):
 
     names = {r["indicator_name"] for r in rows}
     assert names == {"Indicator A", "Indicator B"}
+
+
+def _fake_mapping(pdf_path):
+    return {
+        "CO_A": {"__pdf_path__": pdf_path, "Indicator A": (1, 3), "Indicator B": (2, 4)},
+        "CO_B": {"__pdf_path__": pdf_path, "Indicator A": (5, 6)},
+        "CO_C": {"__pdf_path__": pdf_path, "Indicator B": (7, 9)},
+    }
+
+
+_FAKE_INDICATORS = [
+    {"name": "Indicator A", "expected_unit": "units", "category": "Test", "esrs": "T1", "definition": "A"},
+    {"name": "Indicator B", "expected_unit": "units", "category": "Test", "esrs": "T2", "definition": "B"},
+]
+
+
+def _fake_extract_many(self, indicators, text):
+    # Echo the first page marker so rows reveal which pages were sent
+    first_page = int(text.split("--- Page ")[1].split(" ")[0])
+    return {
+        i["name"]: {"value": first_page, "unit": "units", "confidence": 0.5}
+        for i in indicators
+    }
+
+
+def _run_rows(sample_pdf, db_path, workers):
+    with patch("src.extractor.INDICATORS", _FAKE_INDICATORS), \
+         patch("src.extractor.PAGE_MAPPING", _fake_mapping(sample_pdf)), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", _fake_extract_many):
+
+        run_extraction(
+            companies=["CO_A", "CO_B", "CO_C"],
+            db_path=str(db_path),
+            workers=workers,
+        )
+
+    rows = ExtractionStore(db_path=str(db_path)).fetch_all_as_dicts()
+    return [(r["company"], r["indicator_name"], r["value"]) for r in rows]
+
+
+def test_parallel_mode_matches_serial_mode(sample_pdf, tmp_path):
+    serial = _run_rows(sample_pdf, tmp_path / "serial.sqlite", workers=1)
+    parallel = _run_rows(sample_pdf, tmp_path / "parallel.sqlite", workers=2)
+
+    assert parallel == serial
+    assert serial[0] == ("CO_A", "Indicator A", "1")
+    assert serial[2] == ("CO_B", "Indicator A", "5")
+
+
+def test_resume_redoes_only_failed_units(sample_pdf, tmp_path):
+    db_path = str(tmp_path / "resume.sqlite")
+    indicators = _FAKE_INDICATORS + [
+        {"name": "Indicator C", "expected_unit": "units", "category": "Other", "esrs": "T3", "definition": "C"},
+    ]
+    mapping = {"CO_A": {"__pdf_path__": sample_pdf, "Indicator A": (1, 2), "Indicator C": (3, 4)}}
+    calls = []
+
+    def flaky_extract_many(self, indicators, text):
+        calls.append(indicators[0]["category"])
+        if indicators[0]["category"] == "Other" and calls.count("Other") == 1:
+            raise TimeoutError("Ollama timed out")
+        return _fake_extract_many(self, indicators, text)
+
+    with patch("src.extractor.INDICATORS", indicators), \
+         patch("src.extractor.PAGE_MAPPING", mapping), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", flaky_extract_many):
+
+        run_id = run_extraction(companies=["CO_A"], db_path=db_path)
+
+        store = ExtractionStore(db_path, run_id=run_id)
+        statuses = {c["category"]: c["status"] for c in store.fetch_checkpoints()}
+        assert statuses == {"Test": "done", "Other": "failed"}
+        assert len(store.fetch_all_as_dicts()) == 2
+
+        assert run_extraction(companies=["CO_A"], db_path=db_path, resume=True) == run_id
+
+    assert calls == ["Test", "Other", "Other"]
+    statuses = {c["category"]: c["status"] for c in store.fetch_checkpoints()}
+    assert statuses == {"Test": "done", "Other": "done"}
+    assert all(c["prompt_hash"] for c in store.fetch_checkpoints())
+    assert len(store.fetch_all_as_dicts()) == 3
+
+
+def test_incremental_run_recomputes_only_changed_units(sample_pdf, tmp_path):
+    db_path = str(tmp_path / "incremental.sqlite")
+    indicators = _FAKE_INDICATORS + [
+        {"name": "Indicator C", "expected_unit": "units", "category": "Other", "esrs": "T3", "definition": "C"},
+    ]
+    mapping = {
+        "CO_A": {
+            "__pdf_path__": sample_pdf,
+            "Indicator A": (1, 2),
+            "Indicator B": (2, 3),
+            "Indicator C": (3, 4),
+        }
+    }
+    calls = []
+
+    def recording_extract_many(self, indicators, text):
+        calls.append(indicators[0]["category"])
+        return _fake_extract_many(self, indicators, text)
+
+    with patch("src.extractor.INDICATORS", indicators), \
+         patch("src.extractor.PAGE_MAPPING", mapping), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", recording_extract_many):
+
+        run_extraction(companies=["CO_A"], db_path=db_path, incremental=True)
+        run_extraction(companies=["CO_A"], db_path=db_path, incremental=True)
+        assert calls == ["Test", "Other"]
+
+        # Editing one page range only invalidates that indicator's category
+        mapping["CO_A"]["Indicator C"] = (5, 6)
+        run_extraction(companies=["CO_A"], db_path=db_path, incremental=True)
+        assert calls == ["Test", "Other", "Other"]
+
+        # So does changing the retry threshold, for every category
+        run_extraction(companies=["CO_A"], db_path=db_path, incremental=True, retry_below=None)
+        assert calls == ["Test", "Other", "Other", "Test", "Other"]
+
+    latest = {
+        r["indicator_name"]: r["value"]
+        for r in ExtractionStore(db_path).fetch_latest_as_dicts()
+    }
+    assert latest == {"Indicator A": "1", "Indicator B": "1", "Indicator C": "5"}
+
+
+def test_run_report_is_stored_and_written(sample_pdf, tmp_path):
+    db_path = str(tmp_path / "report.sqlite")
+
+    with patch("src.extractor.INDICATORS", _FAKE_INDICATORS), \
+         patch("src.extractor.PAGE_MAPPING", _fake_mapping(sample_pdf)), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", _fake_extract_many):
+
+        run_id = run_extraction(
+            companies=["CO_A", "CO_B"],
+            db_path=db_path,
+            report_dir=str(tmp_path / "reports"),
+        )
+
+    report = json.loads((tmp_path / "reports" / f"run_{run_id}.json").read_text())
+    assert report["stages"]["pdf_read"]["pages"] == 6
+    assert report["stages"]["store_write"]["rows"] == 4
+
+    stages = {s["stage"] for s in ExtractionStore(db_path, run_id=run_id).fetch_metrics()}
+    assert stages == {"pdf_read", "pdf_tables", "table_match", "store_write"}
+
+
+def test_table_matches_skip_the_llm(tmp_path):
+    from benchmarks.synthetic_pdf import generate_report_pdf
+
+    pdf_path = str(tmp_path / "tables.pdf")
+    indicators = [
+        {**indicator, "category": "Test", "value_type": "number", "synonyms": []}
+        for indicator in _FAKE_INDICATORS
+    ]
+    mapping = generate_report_pdf(pdf_path, 12, indicators[:1])
+    mapping["Indicator B"] = (1, 12)
+    sent = []
+
+    def recording_extract_many(self, indicators, text):
+        sent.extend(i["name"] for i in indicators)
+        return {}
+
+    db_path = str(tmp_path / "tables.sqlite")
+    with patch("src.extractor.INDICATORS", indicators), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", recording_extract_many):
+
+        run_extraction(companies=["CO"], db_path=db_path, page_mapping={"CO": mapping})
+
+    assert sent == ["Indicator B"]
+    rows = {r["indicator_name"]: r for r in ExtractionStore(db_path).fetch_all_as_dicts()}
+    assert rows["Indicator A"]["source_section"] == "table"
+    assert rows["Indicator B"]["value"] is None
+
+
+def test_weak_indicators_are_retried_with_their_own_pages(sample_pdf, tmp_path):
+    calls = []
+
+    def batch_misses_b(self, indicators, text):
+        calls.append(([i["name"] for i in indicators], text))
+        results = _fake_extract_many(self, indicators, text)
+        if len(indicators) > 1:
+            return {"Indicator A": results["Indicator A"], "Indicator B": None}
+        return results
+
+    db_path = str(tmp_path / "retry.sqlite")
+    with patch("src.extractor.INDICATORS", _FAKE_INDICATORS), \
+         patch("src.extractor.LLMExtractionAgent.extract_many", batch_misses_b):
+
+        run_extraction(
+            companies=["CO_A"],
+            db_path=db_path,
+            page_mapping=_fake_mapping(sample_pdf),
+            retry_below=0.5,
+        )
+
+    # The retry only carried Indicator B, with only its own pages (2, 4)
+    assert [names for names, _ in calls] == [["Indicator A", "Indicator B"], ["Indicator B"]]
+    assert re.findall(r"^--- Page (\d+) ---$", calls[1][1], re.MULTILINE) == ["2", "3", "4"]
+    rows = {r["indicator_name"]: r["value"] for r in ExtractionStore(db_path).fetch_all_as_dicts()}
+    assert rows == {"Indicator A": "1", "Indicator B": "2"}
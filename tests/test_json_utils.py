@@ -0,0 +1,58 @@
+from src.json_utils import JSONObjectScanner, parse_partial_object
+
+
+def _feed_all(scanner, text, size=3):
+    for i in range(0, len(text), size):
+        if scanner.feed(text[i:i + size]):
+            return i + size
+    return None
+
+
+def test_scanner_ignores_braces_inside_strings():
+    scanner = JSONObjectScanner()
+    text = '```json\n{"A": {"notes": "a } tricky \\" {"}} trailing ramble'
+
+    consumed = _feed_all(scanner, text)
+
+    assert scanner.result == {"A": {"notes": 'a } tricky " {'}}
+    assert consumed < len(text)
+
+
+def test_scanner_stops_when_all_expected_keys_present():
+    scanner = JSONObjectScanner(expected_keys=["A", "B"])
+    text = '{"A": {"value": 1}, "B": {"value": [1, 2]}, "C": {"value": 3'
+
+    _feed_all(scanner, text, size=1)
+
+    assert scanner.done
+    assert scanner.result == {"A": {"value": 1}, "B": {"value": [1, 2]}}
+    assert scanner.object_text == '{"A": {"value": 1}, "B": {"value": [1, 2]}}'
+
+
+def test_scanner_reports_invalid_object_as_closed():
+    scanner = JSONObjectScanner()
+
+    assert scanner.feed("{not json}")
+    assert scanner.done
+    assert scanner.result is None
+
+
+def test_partial_parser_keeps_well_formed_indicators():
+    text = (
+        '```json\n{"A": {"value": 1, "unit": "t"}, '
+        '"B": {"value": 12,3, "unit": "t"}, '
+        '"C": bad, "D": null,}\n```'
+    )
+
+    assert parse_partial_object(text) == {
+        "A": {"value": 1, "unit": "t"},
+        # 12,3 is malformed; keeping 12 would be a wrong figure
+        "B": {"unit": "t"},
+        "D": None,
+    }
+
+
+def test_partial_parser_drops_what_truncation_may_have_cut():
+    assert parse_partial_object('{"A": {"value": 1}, "B": {"value": 24') == {"A": {"value": 1}}
+    assert parse_partial_object('{"A": {"notes": "cut') == {}
+    assert parse_partial_object("no json here") == {}
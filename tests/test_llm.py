@@ -15,7 +15,7 @@ def test_extract_many_parses_json(monkeypatch):
     }
     """
 
-    def fake_invoke(self, prompt):
+    def fake_invoke(self, prompt, schema=None):
         return fake_response  # ✅ return STRING
 
     monkeypatch.setattr(OllamaLLM, "invoke", fake_invoke)
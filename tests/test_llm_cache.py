@@ -0,0 +1,68 @@
+import time
+
+from src.llm_agent import LLMExtractionAgent
+from src.llm_cache import LLMResponseCache
+from src.ollama import OllamaLLM
+from src.openai_compat import OpenAICompatibleLLM
+
+
+INDICATORS = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+
+
+def test_agent_reuses_cached_response(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_invoke(self, prompt, schema=None):
+        calls.append(prompt)
+        return '{"A": {"value": 1}}'
+
+    monkeypatch.setattr(OllamaLLM, "invoke", fake_invoke)
+
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    agent = LLMExtractionAgent(cache=cache)
+
+    assert agent.extract_many(INDICATORS, "text") == {"A": {"value": 1}}
+    assert agent.extract_many(INDICATORS, "text") == {"A": {"value": 1}}
+    assert len(calls) == 1
+
+    # A different prompt or different options is a different key
+    agent.extract_many(INDICATORS, "other text")
+    agent.model.options = {**agent.model.options, "num_predict": 100}
+    agent.extract_many(INDICATORS, "text")
+    assert len(calls) == 3
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_cache_key_depends_on_backend():
+    ollama = LLMExtractionAgent(backend=OllamaLLM(model="m"))
+    openai = LLMExtractionAgent(backend=OpenAICompatibleLLM(model="m"))
+    openai.model.options = dict(ollama.model.options)
+
+    assert ollama.prompt_key("prompt") != openai.prompt_key("prompt")
+
+
+def test_unparseable_responses_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(OllamaLLM, "invoke", lambda self, prompt, schema=None: "no json here")
+
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    LLMExtractionAgent(cache=cache).extract_many(INDICATORS, "text")
+
+    assert len(cache) == 0
+
+
+def test_eviction_by_count_and_age(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), max_entries=2)
+
+    for i in range(3):
+        cache.put(f"k{i}", "m", f"r{i}")
+        time.sleep(0.01)
+
+    assert len(cache) == 2
+    assert cache.get("k0") is None
+    assert cache.get("k2") == "r2"
+
+    cache.max_age_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("k2") is None
@@ -0,0 +1,50 @@
+import json
+
+from src import metrics
+from src.metrics import RunMetrics, percentile
+from src.ollama import OllamaLLM
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 95) == 3.85
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_sums_counters_per_stage():
+    run_metrics = RunMetrics()
+    run_metrics.record("llm_invoke", 2.0, prompt_eval_count=100, eval_count=10, model="m")
+    run_metrics.record("llm_invoke", 4.0, prompt_eval_count=50, eval_count=5, stopped_early=True)
+    run_metrics.record("pdf_read", 0.1, pages=3)
+
+    summary = run_metrics.summary()
+
+    assert summary["llm_invoke"]["count"] == 2
+    assert summary["llm_invoke"]["p50_s"] == 3.0
+    assert summary["llm_invoke"]["prompt_eval_count"] == 150
+    assert "stopped_early" not in summary["llm_invoke"]
+    assert summary["pdf_read"]["pages"] == 3
+
+
+def test_stage_without_active_metrics_is_a_no_op():
+    with metrics.stage("anything") as sample:
+        sample["x"] = 1
+
+
+def test_ollama_token_counts_are_recorded(ollama_stub):
+    ollama_stub.response = "{}"
+    llm = OllamaLLM(base_url=ollama_stub.base_url)
+
+    with metrics.activate(RunMetrics()) as run_metrics:
+        llm.invoke("prompt")
+
+    (sample,) = run_metrics.samples
+    assert sample["stage"] == "llm_invoke"
+    assert sample["duration_s"] > 0
+    assert sample["prompt_eval_count"] == 100
+    assert sample["eval_duration_s"] == 1.0
+    assert llm.last_stats["eval_count"] == 20
+    json.dumps(run_metrics.report("run", 1.0))
+
@@ -0,0 +1,141 @@
+import pytest
+import requests
+
+from src.llm_agent import LLMExtractionAgent
+from src.ollama import OllamaLLM
+
+
+def test_invoke_against_stub(ollama_stub):
+    ollama_stub.response = "hello"
+    llm = OllamaLLM(base_url=ollama_stub.base_url)
+
+    assert llm.invoke("prompt") == "hello"
+    assert ollama_stub.payloads[0]["model"] == "qwen2.5:7b"
+    assert ollama_stub.payloads[0]["options"]["temperature"] == 0
+
+
+def test_invoke_retries_transient_failures(ollama_stub):
+    ollama_stub.statuses = [503, 502]
+    ollama_stub.response = "recovered"
+    llm = OllamaLLM(base_url=ollama_stub.base_url, backoff=0)
+
+    assert llm.invoke("prompt") == "recovered"
+    assert len(ollama_stub.payloads) == 3
+
+
+def test_invoke_gives_up_after_max_retries(ollama_stub):
+    ollama_stub.statuses = [503] * 5
+    llm = OllamaLLM(base_url=ollama_stub.base_url, max_retries=2, backoff=0)
+
+    with pytest.raises(requests.HTTPError):
+        llm.invoke("prompt")
+    assert len(ollama_stub.payloads) == 3
+
+
+def test_client_errors_are_not_retried(ollama_stub):
+    ollama_stub.statuses = [404]
+    llm = OllamaLLM(base_url=ollama_stub.base_url, backoff=0)
+
+    with pytest.raises(requests.HTTPError):
+        llm.invoke("prompt")
+    assert len(ollama_stub.payloads) == 1
+
+
+def test_read_timeouts_are_not_retried(ollama_stub):
+    ollama_stub.delay = 0.5
+    llm = OllamaLLM(base_url=ollama_stub.base_url, backoff=0, timeout=0.1)
+
+    with pytest.raises(requests.ReadTimeout):
+        llm.invoke("prompt")
+    assert len(ollama_stub.payloads) == 1
+
+
+def test_extract_batches_respects_num_parallel(ollama_stub):
+    ollama_stub.delay = 0.1
+    ollama_stub.response = '{"A": {"value": 1}}'
+
+    agent = LLMExtractionAgent()
+    agent.model = OllamaLLM(base_url=ollama_stub.base_url, num_parallel=2)
+
+    indicators = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+    results = agent.extract_batches([(indicators, f"text {i}") for i in range(5)])
+
+    assert results == [{"A": {"value": 1}}] * 5
+    assert ollama_stub.max_in_flight == 2
+
+
+def test_invoke_stream_stops_once_answer_is_complete(ollama_stub):
+    answer = '{"A": {"value": 1}, "B": {"value": 2}}'
+    ollama_stub.response = answer + " and some rambling " * 20
+    ollama_stub.token_delay = 0.005
+
+    llm = OllamaLLM(base_url=ollama_stub.base_url, stream=True)
+    raw = llm.invoke_stream("prompt", expected_keys=["A", "B"])
+
+    assert raw == answer
+    assert ollama_stub.payloads[0]["stream"] is True
+    assert llm.last_stats["stopped_early"] is True
+    assert llm.last_stats["time_to_first_token_s"] is not None
+    # The stub stopped well before writing the whole reply
+    assert ollama_stub.events_sent < len(ollama_stub.response) // ollama_stub.token_size
+
+
+def test_streaming_agent_parses_result(ollama_stub):
+    ollama_stub.response = '{"A": {"value": 1}, "B": {"value": 2'
+
+    agent = LLMExtractionAgent(stream=True)
+    agent.model = OllamaLLM(base_url=ollama_stub.base_url, stream=True)
+
+    indicators = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+
+    assert agent.extract_many(indicators, "text") == {"A": {"value": 1}}
+
+
+def test_system_prompt_uses_chat_with_keep_alive(ollama_stub):
+    ollama_stub.response = "hi"
+    llm = OllamaLLM(base_url=ollama_stub.base_url, keep_alive="10m")
+    llm.system = "fixed instructions"
+
+    assert llm.invoke("document, then indicators") == "hi"
+
+    payload = ollama_stub.payloads[0]
+    assert ollama_stub.paths == ["/api/chat"]
+    assert payload["keep_alive"] == "10m"
+    assert payload["messages"] == [
+        {"role": "system", "content": "fixed instructions"},
+        {"role": "user", "content": "document, then indicators"},
+    ]
+
+
+
+def test_prompt_puts_document_before_indicators():
+    indicators = [{"name": "A", "expected_unit": "u", "definition": "d"}]
+
+    first = LLMExtractionAgent.build_prompt(indicators, "shared text")
+    second = LLMExtractionAgent.build_prompt(
+        indicators + [{"name": "B", "expected_unit": "u", "definition": "d"}], "shared text"
+    )
+
+    assert first.index("shared text") < first.index("- A (u)")
+    # Same text, different indicators: only the tail differs
+    prefix = first[: first.index("- A (u)")]
+    assert second.startswith(prefix)
+
+
+def test_agent_constrains_output_to_indicator_schema(ollama_stub):
+    ollama_stub.response = '{"A": {"value": 1, "unit": "u"}, "B": {"value": 2,5}}'
+
+    agent = LLMExtractionAgent()
+    agent.model = OllamaLLM(base_url=ollama_stub.base_url)
+    agent.model.system = "instructions"
+    indicators = [
+        {"name": "A", "expected_unit": "u", "definition": "d"},
+        {"name": "B", "expected_unit": "u", "definition": "d"},
+    ]
+
+    result = agent.extract_many(indicators, "text")
+
+    schema = ollama_stub.payloads[0]["format"]
+    assert schema["required"] == ["A", "B"]
+    assert schema["properties"]["A"]["properties"]["value"]["type"] == ["number", "null"]
+    assert result == {"A": {"value": 1, "unit": "u"}}
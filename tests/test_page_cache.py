@@ -0,0 +1,36 @@
+import src.page_cache as page_cache_module
+from src.page_cache import PageTextCache
+from src.pdf_reader import read_pdf_pages
+
+
+def test_read_pages_matches_pdf_reader(sample_pdf):
+    cache = PageTextCache()
+
+    assert cache.read_pages(sample_pdf, 2, 4) == read_pdf_pages(sample_pdf, 2, 4)
+    # Out-of-range pages are clamped the same way
+    assert cache.read_pages(sample_pdf, 9, 15) == read_pdf_pages(sample_pdf, 9, 15)
+
+
+def test_overlapping_ranges_extract_each_page_once(sample_pdf, monkeypatch):
+    extracted = []
+    original = page_cache_module.extract_pages
+
+    def counting_extract(pdf_path, page_numbers, mode="text", pool=None):
+        page_numbers = list(page_numbers)
+        extracted.extend(page_numbers)
+        return original(pdf_path, page_numbers, mode=mode, pool=pool)
+
+    monkeypatch.setattr(page_cache_module, "extract_pages", counting_extract)
+
+    cache = PageTextCache()
+    cache.read_pages(sample_pdf, 1, 5)
+    cache.read_pages(sample_pdf, 1, 5)
+    cache.read_pages(sample_pdf, 3, 7)
+
+    assert sorted(extracted) == [1, 2, 3, 4, 5, 6, 7]
+    assert cache.misses == 7
+    assert cache.hits == 8
+
+    # A different extraction mode is a different cache entry
+    cache.get_pages(sample_pdf, [1], mode="html")
+    assert extracted.count(1) == 2
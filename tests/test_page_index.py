@@ -0,0 +1,49 @@
+from benchmarks.synthetic_pdf import generate_report_pdf
+from config.indicators import INDICATORS
+from src.page_index import PageIndex, load_mapping, page_terms, save_mapping
+from src.pdf_reader import iter_pdf_pages
+
+
+def test_page_terms_include_bigrams_and_unit_tokens():
+    terms = page_terms("Scope 1 emissions of 12,345 tCO2e and 41.5 %")
+
+    assert terms["scope 1"] == 1
+    assert terms["#unit:tco2e"] == 1
+    assert terms["#unit:%"] == 1
+    assert "emissions of" not in terms
+
+
+def test_generated_ranges_cover_the_indicator_tables(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "report.pdf")
+    expected = generate_report_pdf(pdf_path, 80, INDICATORS, seed=3)
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+
+    mapping = index.generate_mapping(pdf_path, INDICATORS)
+
+    assert mapping["__pdf_path__"] == pdf_path
+    for indicator in INDICATORS:
+        start, end = mapping[indicator["name"]]
+        table_start, table_end = expected[indicator["name"]]
+        assert table_start <= start <= end <= table_end
+        assert end - start <= 4
+
+    # Content already indexed is not parsed again
+    pages_read = []
+
+    def counting_iter_pdf_pages(*args, **kwargs):
+        for page, text in iter_pdf_pages(*args, **kwargs):
+            pages_read.append(page)
+            yield page, text
+
+    monkeypatch.setattr("src.page_index.iter_pdf_pages", counting_iter_pdf_pages)
+    index.index_document(pdf_path)
+    assert pages_read == []
+
+
+def test_mapping_round_trips_as_page_mapping_shape(tmp_path):
+    mapping = {"CO": {"__pdf_path__": "data/co.pdf", "Total Employees": (3, 7)}}
+    path = str(tmp_path / "generated_pages.json")
+
+    save_mapping(mapping, path)
+
+    assert load_mapping(path) == mapping
@@ -0,0 +1,58 @@
+from src.page_ranker import PHRASE_BONUS, phrase_count, query_terms, score_pages, select_pages
+
+
+INDICATOR = {
+    "name": "Total Scope 1 GHG Emissions",
+    "esrs": "E1",
+    "expected_unit": "tCO2e",
+    "synonyms": ["Scope 1 emissions"],
+}
+
+FILLER = "Our strategy supports customers through the transition. " * 20
+
+
+def _pages():
+    pages = {p: FILLER for p in range(10, 21)}
+    pages[14] = FILLER + "Total Scope 1 GHG emissions were 12,345 tCO2e in 2024."
+    pages[18] = FILLER + "Scope 2 emissions are reported separately."
+    return pages
+
+
+def test_query_terms_cover_name_synonyms_esrs_and_unit():
+    terms = query_terms(INDICATOR)
+
+    assert terms[:3] == ["total", "scope", "1"]
+    assert "e1" in terms and "tco2e" in terms and "emissions" in terms
+    assert terms.count("scope") == 1
+
+
+def test_page_with_the_figure_scores_highest():
+    scores = score_pages(INDICATOR, _pages())
+
+    assert max(scores, key=scores.get) == 14
+    assert scores[10] == 0
+
+
+def test_top_k_keeps_neighbours_within_the_range():
+    assert select_pages(INDICATOR, (10, 20), _pages(), top_k=1) == [13, 14, 15]
+    assert select_pages(INDICATOR, (14, 16), _pages(), top_k=1) == [14, 15]
+    assert select_pages(INDICATOR, (10, 20), _pages(), top_k=2) == [13, 14, 15, 17, 18, 19]
+
+
+def test_falls_back_to_full_range_without_matches():
+    pages = {p: FILLER for p in range(1, 6)}
+
+    assert select_pages(INDICATOR, (2, 4), pages, top_k=1) == [2, 3, 4]
+
+
+def test_phrases_match_whole_tokens_only():
+    indicator = {"name": "Scope 1", "synonyms": ["Water"]}
+    pages = {1: "scope 12 wastewater", 2: "scope 1 water"}
+
+    scores = score_pages(indicator, pages)
+
+    assert phrase_count(["scope", "12"], ("scope", "1")) == 0
+    assert phrase_count(["scope", "1", "scope", "1"], ("scope", "1")) == 2
+    assert scores[1] < scores[2]
+    # Only BM25 credit for "scope" on page 1, no phrase bonus
+    assert scores[1] < PHRASE_BONUS
@@ -0,0 +1,34 @@
+from src.planner import build_page_text, merge_page_ranges, plan_category_pages
+
+
+def test_merge_page_ranges_deduplicates_overlaps():
+    assert merge_page_ranges([(50, 52), (50, 52), (51, 54), (60, 60)]) == [
+        50, 51, 52, 53, 54, 60,
+    ]
+
+
+def test_plan_category_pages_counts_duplicates():
+    company_pages = {
+        "__pdf_path__": "fake.pdf",
+        "Scope 1": (50, 90),
+        "Scope 2": (50, 90),
+        "Green Financing": (50, 70),
+    }
+    indicators = [
+        {"name": "Scope 1"},
+        {"name": "Scope 2"},
+        {"name": "Green Financing"},
+        {"name": "Unmapped"},
+    ]
+
+    plan = plan_category_pages(company_pages, indicators)
+
+    assert plan.pages == list(range(50, 91))
+    assert plan.requested_pages == 41 + 41 + 21
+    assert plan.duplicate_pages == 62
+
+
+def test_build_page_text_adds_markers_in_page_order():
+    text = build_page_text({3: "third", 1: "first"})
+
+    assert text == "--- Page 1 ---\nfirst\n--- Page 3 ---\nthird"
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import patch
+
+from src.extractor import run_extraction
+from src.llm_backends import RecordedLLM
+from src.planner import PAGE_MARKER
+from src.router import CascadeExtractionAgent, escalation_reason
+from src.storage import ExtractionStore
+
+
+INDICATORS = [
+    {"name": "A", "expected_unit": "tCO2e", "category": "Test", "esrs": "T1", "definition": "a"},
+    {"name": "B", "expected_unit": "MWh or GJ", "category": "Test", "esrs": "T2", "definition": "b"},
+    {"name": "C", "expected_unit": "%", "category": "Test", "esrs": "T3", "definition": "c"},
+]
+
+
+def _answer(value, unit, confidence):
+    return {"value": value, "unit": unit, "confidence": confidence, "source_page": 1, "notes": ""}
+
+
+def _backend(model, answers):
+    """Recorded backend answering every prompt with the listed indicators' answers."""
+    def respond(prompt):
+        return json.dumps({name: answer for name, answer in answers.items() if f"- {name} (" in prompt})
+
+    return RecordedLLM(responder=respond, model=model)
+
+
+def test_escalation_reason():
+    indicator = INDICATORS[0]
+    assert escalation_reason(indicator, _answer(5, "tCO2e", 0.9), 0.7) is None
+    assert escalation_reason(indicator, None, 0.7) == "missing"
+    assert escalation_reason(indicator, _answer("5 t", "tCO2e", 0.9), 0.7) == "schema"
+    assert escalation_reason(indicator, _answer(5, "MWh", 0.9), 0.7) == "unit"
+    assert escalation_reason(indicator, _answer(None, "tCO2e", 0.0), 0.7) == "not_found"
+    assert escalation_reason(indicator, _answer(5, "tCO2e", 0.5), 0.7) == "low_confidence"
+
+
+def test_only_weak_answers_are_escalated():
+    small = _backend("small", {
+        "A": _answer(1, "tCO2e", 0.95),
+        "B": _answer(2, "tCO2e", 0.95),  # wrong unit
+        "C": _answer(3, "%", 0.4),
+    })
+    large = _backend("large", {
+        "A": _answer(10, "tCO2e", 0.9),
+        "B": _answer(20, "MWh", 0.9),
+        "C": _answer(30, "%", 0.3),
+    })
+    agent = CascadeExtractionAgent(small=small, large=large, escalate_below=0.7)
+
+    results = agent.extract_many(INDICATORS, "text")
+
+    assert results["A"]["value"] == 1
+    assert results["A"]["route"] == {"model": "small", "reason": None}
+    assert results["B"]["value"] == 20
+    assert results["B"]["route"] == {"model": "large", "reason": "unit"}
+    # Less confident large answer loses to the small one
+    assert results["C"]["value"] == 3
+    assert results["C"]["route"] == {"model": "small", "reason": "low_confidence"}
+    assert large.misses == 1  # one call, for B and C only
+
+
+def test_escalation_is_decided_after_merging_chunks():
+    pages = [PAGE_MARKER.format(page=page) + "\n" + "filler " * 300 for page in (1, 2)]
+
+    def respond(prompt):
+        if PAGE_MARKER.format(page=1) in prompt:
+            return json.dumps({"A": _answer(1, "tCO2e", 0.9), "C": _answer(None, "%", 0.0)})
+        return json.dumps({"A": _answer(None, "tCO2e", 0.0), "C": _answer(None, "%", 0.0)})
+
+    small = RecordedLLM(responder=respond, model="small")
+    large = _backend("large", {"C": _answer(3, "%", 0.8)})
+    agent = CascadeExtractionAgent(small=small, large=large, context_tokens=2000)
+
+    results = agent.extract_many([INDICATORS[0], INDICATORS[2]], "\n".join(pages))
+
+    assert small.misses == 2
+    # A was found in one chunk: not escalated for the chunk without it
+    assert results["A"]["route"] == {"model": "small", "reason": None}
+    assert results["C"]["route"] == {"model": "large", "reason": "not_found"}
+    assert large.misses == 2  # C only, once per chunk of the large model
+
+
+def test_routing_decisions_are_stored(sample_pdf, tmp_path):
+    db_path = str(tmp_path / "test.sqlite")
+    mapping = {"CO": {"__pdf_path__": sample_pdf, "A": (1, 2), "B": (3, 4), "C": (5, 6)}}
+    small = _backend("small", {"A": _answer(1, "tCO2e", 0.9), "B": _answer(2, "GJ", 0.9)})
+    large = _backend("large", {"C": _answer(3, "%", 0.8)})
+
+    with patch("src.extractor.INDICATORS", INDICATORS):
+        run_id = run_extraction(
+            companies=["CO"],
+            db_path=db_path,
+            page_mapping=mapping,
+            tables=False,
+            retry_below=None,
+            backend=large,
+            small_backend=small,
+        )
+
+    store = ExtractionStore(db_path, run_id=run_id)
+    routes = {route["indicator_name"]: route for route in store.fetch_routes()}
+    assert routes["C"]["model"] == "large" and routes["C"]["reason"] == "missing"
+    assert routes["A"]["escalated"] == 0
+
+    stats = store.routing_stats()
+    assert stats["indicators"] == 3
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+    assert stats["escalations"] == {"missing": 1}
+    assert stats["answered_by"] == {"large": 1, "small": 2}
+
+    values = {row["indicator_name"]: row["value"] for row in store.fetch_all_as_dicts()}
+    assert values == {"A": "1", "B": "2", "C": "3"}
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 from src.storage import ExtractionStore
 
 
@@ -45,3 +46,126 @@ def test_insert_and_fetch_storage(tmp_path):
     assert row["value"] == "123"   # stored as TEXT
     assert row["unit"] == "tCO2e"
     assert row["confidence"] == 0.9
+
+
+def test_insert_many_single_transaction(tmp_path):
+    db_path = tmp_path / "test_extractions.sqlite"
+    store = ExtractionStore(db_path=str(db_path))
+
+    indicator = {"name": "Ind", "category": "Social", "esrs": "S1", "expected_unit": "count"}
+    rows = [
+        ExtractionStore.build_row(f"CO_{i}", indicator, {"value": i, "confidence": 0.5})
+        for i in range(100)
+    ]
+    rows.append(ExtractionStore.build_row("CO_MISSING", indicator, None))
+
+    assert store.insert_many(rows) == 101
+
+    fetched = store.fetch_all_as_dicts()
+    assert len(fetched) == 101
+    assert fetched[-1]["notes"] == "Not found in batch extraction"
+    assert fetched[-1]["unit"] == "count"
+
+
+def test_writer_rolls_back_on_error(tmp_path):
+    store = ExtractionStore(db_path=str(tmp_path / "test_extractions.sqlite"))
+    indicator = {"name": "Ind", "category": "Social", "esrs": "S1"}
+
+    try:
+        with store.writer() as writer:
+            writer.insert_many([ExtractionStore.build_row("CO", indicator, {"value": 1})])
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert store.fetch_all_as_dicts() == []
+
+    with sqlite3.connect(str(tmp_path / "test_extractions.sqlite")) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_rerun_same_run_id_is_idempotent(tmp_path):
+    db_path = str(tmp_path / "test_extractions.sqlite")
+    indicator = {"name": "Ind", "category": "Social", "esrs": "S1"}
+
+    store = ExtractionStore(db_path=db_path, run_id="run-1")
+    store.insert_result("CO", indicator, {"value": 1})
+    store.insert_result("CO", indicator, {"value": 2})
+
+    rows = store.fetch_all_as_dicts()
+    assert len(rows) == 1
+    assert rows[0]["value"] == "2"
+    assert rows[0]["run_id"] == "run-1"
+
+
+def test_fetch_latest_across_runs(tmp_path):
+    db_path = str(tmp_path / "test_extractions.sqlite")
+    a = {"name": "A", "category": "Social", "esrs": "S1"}
+    b = {"name": "B", "category": "Social", "esrs": "S1"}
+
+    ExtractionStore(db_path, run_id="run-1").insert_many([
+        ExtractionStore.build_row("CO", a, {"value": 1}),
+        ExtractionStore.build_row("CO", b, {"value": 10}),
+    ])
+    ExtractionStore(db_path, run_id="run-2").insert_result("CO", a, {"value": 2})
+
+    store = ExtractionStore(db_path)
+    latest = {r["indicator_name"]: (r["run_id"], r["value"]) for r in store.fetch_latest_as_dicts()}
+
+    assert latest == {"A": ("run-2", "2"), "B": ("run-1", "10")}
+    assert len(store.fetch_all_as_dicts()) == 3
+
+
+def test_resumed_older_run_becomes_latest(tmp_path):
+    db_path = str(tmp_path / "test_extractions.sqlite")
+    a = {"name": "A", "category": "Social", "esrs": "S1"}
+
+    ExtractionStore(db_path, run_id="run-1").insert_result("CO", a, {"value": 1})
+    ExtractionStore(db_path, run_id="run-2").insert_result("CO", a, {"value": 2})
+    # Resuming run-1 rewrites its row (same id) after run-2 wrote
+    ExtractionStore(db_path, run_id="run-1").insert_result("CO", a, {"value": 3})
+
+    store = ExtractionStore(db_path)
+    assert [(r["run_id"], r["value"]) for r in store.fetch_latest_as_dicts()] == [("run-1", "3")]
+    latest = [row for rows in store.iter_batches(latest_only=True) for row in rows]
+    assert [r["value"] for r in latest] == ["3"]
+
+
+def test_migrates_legacy_schema(tmp_path):
+    db_path = str(tmp_path / "legacy.sqlite")
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE extractions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                company TEXT NOT NULL,
+                indicator_name TEXT NOT NULL,
+                category TEXT,
+                esrs TEXT,
+                value TEXT,
+                unit TEXT,
+                confidence REAL,
+                source_page INTEGER,
+                source_section TEXT,
+                notes TEXT
+            )
+            """
+        )
+        # Two legacy runs that each appended the same two indicators
+        for value in ("1", "2"):
+            for name in ("A", "B"):
+                conn.execute(
+                    "INSERT INTO extractions (company, indicator_name, value) VALUES (?, ?, ?)",
+                    ("CO", name, value),
+                )
+
+    store = ExtractionStore(db_path)
+    rows = store.fetch_all_as_dicts()
+
+    assert [r["run_id"] for r in rows] == ["legacy-1", "legacy-1", "legacy-2", "legacy-2"]
+    assert {r["value"] for r in store.fetch_latest_as_dicts()} == {"2"}
+
+    with sqlite3.connect(db_path) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(extractions)")}
+    assert "uq_extractions_run_company_indicator" in indexes
@@ -0,0 +1,91 @@
+from src.table_extractor import build_label_index, extract_from_tables, normalize_label
+from src.utils import parse_number
+
+
+INDICATORS = [
+    {
+        "name": "Total Scope 1 GHG Emissions",
+        "expected_unit": "tCO2e",
+        "value_type": "number",
+        "synonyms": ["Scope 1 emissions", "Scope 1"],
+    },
+    {
+        "name": "Female Employees",
+        "expected_unit": "%",
+        "value_type": "percentage",
+        "synonyms": ["Women (%)"],
+    },
+]
+
+PAGES = {"Total Scope 1 GHG Emissions": (1, 5), "Female Employees": (4, 6)}
+
+
+def test_parse_number_handles_report_formats():
+    assert parse_number("1,234.5") == 1234.5
+    assert parse_number("1.234,5") == 1234.5
+    assert parse_number("12,5 %") == 12.5
+    assert parse_number("1,234") == 1234
+    assert parse_number("0,123") == 0.123
+    assert parse_number("1 234 567") == 1234567
+    assert parse_number("(3,200)") == -3200
+    assert parse_number("−4.5") == -4.5
+    assert parse_number("n/a") is None
+    assert parse_number("–") is None
+
+
+def test_labels_match_names_and_synonyms():
+    labels = build_label_index(INDICATORS)
+
+    assert normalize_label("Scope 1 emissions:") == "scope 1 emissions"
+    assert labels["scope 1"] == "Total Scope 1 GHG Emissions"
+    assert labels["women %"] == "Female Employees"
+
+
+def test_first_figure_and_unit_column_are_used():
+    tables = {
+        2: [[
+            ["Metric", "Unit", "2024", "2023"],
+            ["Scope 1 emissions¹", "ktCO2e", "12,345", "13,000"],
+            ["Women (%)", "", "n/a", "41.0"],
+        ]],
+    }
+
+    resolved = extract_from_tables(INDICATORS, PAGES, tables)
+
+    # Women (%) is on page 2, outside its indicator's range
+    assert list(resolved) == ["Total Scope 1 GHG Emissions"]
+    # Reported in kilotonnes, converted to the expected tCO2e
+    assert resolved["Total Scope 1 GHG Emissions"]["value"] == 12345000
+    assert resolved["Total Scope 1 GHG Emissions"]["unit"] == "tCO2e"
+    assert resolved["Total Scope 1 GHG Emissions"]["source_page"] == 2
+
+
+def test_rows_in_other_or_unstated_units_are_left_for_the_llm():
+    tables = {
+        1: [[["Metric", "Unit", "2024"], ["Scope 1", "MWh", "500"]]],
+        # No unit column: tonnes or kilotonnes cannot be told apart
+        2: [[["Scope 1", "12,345"]]],
+        # Percentages cannot be scaled, so no unit column is fine
+        5: [[["Women (%)", "41.0"]]],
+    }
+
+    assert extract_from_tables(INDICATORS, PAGES, tables) == {
+        "Female Employees": {
+            "value": 41,
+            "unit": "%",
+            "confidence": 0.9,
+            "source_page": 5,
+            "source_section": "table",
+            "notes": "Table row 'Women (%)'",
+        }
+    }
+
+
+def test_conflicting_or_implausible_values_are_left_for_the_llm():
+    tables = {
+        1: [[["Scope 1", "100"]]],
+        3: [[["Scope 1", "120"]]],
+        5: [[["Female Employees", "140"]]],
+    }
+
+    assert extract_from_tables(INDICATORS, PAGES, tables) == {}
@@ -0,0 +1,55 @@
+import os
+
+import fitz
+
+import src.page_cache as page_cache_module
+from src.page_cache import PageTextCache
+from src.text_store import PageTextStore
+
+
+def _count_extractions(monkeypatch):
+    extracted = []
+    original = page_cache_module.extract_pages
+
+    def counting_extract(pdf_path, page_numbers, mode="text", pool=None):
+        page_numbers = list(page_numbers)
+        extracted.extend(page_numbers)
+        return original(pdf_path, page_numbers, mode=mode, pool=pool)
+
+    monkeypatch.setattr(page_cache_module, "extract_pages", counting_extract)
+    return extracted
+
+
+def test_repeat_run_skips_pdf_parsing(sample_pdf, tmp_path, monkeypatch):
+    extracted = _count_extractions(monkeypatch)
+    store_path = str(tmp_path / "page_text.sqlite")
+
+    first = PageTextCache(store=PageTextStore(store_path)).read_pages(sample_pdf, 1, 12)
+    assert extracted == list(range(1, 13))
+
+    # New cache, same on-disk store: nothing is parsed again
+    second_cache = PageTextCache(store=PageTextStore(store_path))
+    assert second_cache.read_pages(sample_pdf, 1, 12) == first
+    assert len(extracted) == 12
+    assert second_cache.store_hits == 12
+
+
+def test_changed_pdf_invalidates_stored_text(sample_pdf, tmp_path, monkeypatch):
+    extracted = _count_extractions(monkeypatch)
+    store = PageTextStore(str(tmp_path / "page_text.sqlite"))
+
+    PageTextCache(store=store).read_pages(sample_pdf, 1, 1)
+    old_hash = store.document_hash(sample_pdf)
+
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Rewritten page")
+    doc.save(sample_pdf + ".new")
+    doc.close()
+    os.replace(sample_pdf + ".new", sample_pdf)
+
+    text = PageTextCache(store=store).read_pages(sample_pdf, 1, 1)
+
+    assert "Rewritten page" in text
+    assert extracted == [1, 1]
+    assert store.document_hash(sample_pdf) != old_hash
+    assert store.get_pages(old_hash, page_cache_module.READER_VERSION, "text", [1]) == {}
@@ -0,0 +1,30 @@
+from src.units import to_expected_unit, unit_key, unit_matches
+
+
+def test_unit_key_ignores_spelling():
+    assert unit_key("t CO₂e") == unit_key("tCO2e")
+    assert unit_key("€ millions") == unit_key("EUR million")
+
+
+def test_unit_matches():
+    assert unit_matches("tCO2e", "t CO2e")
+    assert unit_matches("MWh or GJ", "GJ")
+    assert unit_matches("tCO2e per €M revenue", "tCO2e/€m revenue")
+    assert unit_matches("%", "")
+    assert not unit_matches("MWh or GJ", "tCO2e")
+    assert not unit_matches("tCO2e", "ktCO2e")
+
+
+def test_scaled_units_are_converted():
+    assert to_expected_unit(12.345, "ktCO2e", "tCO2e") == (12345, "tCO2e")
+    assert to_expected_unit(2, "GWh", "MWh or GJ") == (2000, "MWh")
+    assert to_expected_unit(1500, "€ thousands", "€ millions") == (1.5, "€ millions")
+    assert to_expected_unit(7, None, "tCO2e") == (7, "tCO2e")
+    assert to_expected_unit(7, "MWh", "tCO2e") is None
+
+
+def test_ambiguous_megatonnes_are_not_converted():
+    # "MT" often means metric tonnes; "Mt" megatonnes
+    assert to_expected_unit(500, "MT CO2e", "tCO2e") is None
+    assert to_expected_unit(500, "Mt CO2e", "tCO2e") is None
+    assert to_expected_unit(2, "million tCO2e", "tCO2e") == (2000000, "tCO2e")